@@ -0,0 +1,108 @@
+import argparse
+import os
+import sys
+import time
+import timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+import block_markdown
+from bench_memory import load_corpus
+from block_markdown import (
+    BlockType,
+    block_lines_to_html_node,
+    block_to_html_node,
+    iter_blocks,
+    iter_lines,
+    markdown_to_blocks,
+    markdown_to_html_node,
+)
+
+
+def best_of(func, repeat):
+    # CPU time, so other load on the machine moves the numbers less
+    func()
+    return min(timeit.repeat(func, timer=time.process_time, number=1, repeat=repeat))
+
+
+def without_inline(func):
+    # The block layer on its own: inline parsing dominates conversion and
+    # would hide any difference in classification and dispatch
+    def run():
+        original = block_markdown.text_to_children
+        block_markdown.text_to_children = lambda text: []
+        try:
+            func()
+        finally:
+            block_markdown.text_to_children = original
+    return run
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Block scanning and conversion throughput on content/ scaled up"
+    )
+    parser.add_argument("--megabytes", type=float, default=4)
+    parser.add_argument("--repeat", type=int, default=9)
+    args = parser.parse_args()
+
+    markdown = load_corpus(int(args.megabytes * (1 << 20)))
+    blocks = list(iter_blocks(iter_lines(markdown)))
+    texts = markdown_to_blocks(markdown)
+    megabytes = len(markdown.encode()) / (1 << 20)
+
+    def scan():
+        for _ in iter_blocks(iter_lines(markdown)):
+            pass
+
+    def convert():
+        for block in blocks:
+            block_lines_to_html_node(block.block_type, block.lines)
+
+    def convert_texts():
+        for text in texts:
+            block_to_html_node(text)
+
+    def parse():
+        markdown_to_html_node(markdown)
+
+    # Paragraphs and headings on their own, the bulk of most pages; extending
+    # the block syntax should leave these untouched
+    prose = "\n\n".join(
+        "\n".join(block.lines)
+        for block in blocks
+        if block.block_type in (BlockType.PARAGRAPH, BlockType.HEADING)
+    )
+    prose_megabytes = len(prose.encode()) / (1 << 20)
+
+    def scan_prose():
+        for _ in iter_blocks(iter_lines(prose)):
+            pass
+
+    def parse_prose():
+        markdown_to_html_node(prose)
+
+    print(f"{megabytes:.1f} MB of markdown, {len(blocks)} blocks")
+    cases = (
+        ("scan + classify", scan),
+        ("convert, no inline", without_inline(convert)),
+        ("block_to_html_node, no inline", without_inline(convert_texts)),
+        ("convert", convert),
+        ("markdown_to_html_node", parse),
+    )
+    for name, func in cases:
+        seconds = best_of(func, args.repeat)
+        print(f"  {name:30} {seconds * 1000:8.1f} ms  {megabytes / seconds:6.1f} MB/s")
+    print(f"{prose_megabytes:.1f} MB of paragraphs and headings")
+    cases = (
+        ("scan + classify", scan_prose),
+        ("markdown_to_html_node, no inline", without_inline(parse_prose)),
+        ("markdown_to_html_node", parse_prose),
+    )
+    for name, func in cases:
+        seconds = best_of(func, args.repeat)
+        print(f"  {name:30} {seconds * 1000:8.1f} ms  {prose_megabytes / seconds:6.1f} MB/s")
+
+
+if __name__ == "__main__":
+    main()
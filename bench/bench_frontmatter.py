@@ -0,0 +1,54 @@
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+from corpus import CorpusGenerator
+from gencontent import build_page_node
+from metadata import scan_metadata
+
+
+def header_scan(paths):
+    return [scan_metadata(path) for path in paths]
+
+
+def full_parse(paths):
+    metadata = []
+    for path in paths:
+        with open(path, "r") as f:
+            metadata.append(build_page_node(f.read(), "/")[0])
+    return metadata
+
+
+def timed(func, paths):
+    start = time.perf_counter()
+    result = func(paths)
+    return time.perf_counter() - start, result
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Compare a header-only metadata scan with a full parse of every page"
+    )
+    parser.add_argument("--pages", type=int, default=50000)
+    parser.add_argument("--blocks", type=int, default=20, help="blocks per page")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as content_dir:
+        print(f"generating {args.pages} pages...")
+        paths = CorpusGenerator(blocks_per_page=args.blocks, front_matter=True).site(content_dir, args.pages)
+        scan_seconds, scanned = timed(header_scan, paths)
+        parse_seconds, parsed = timed(full_parse, paths)
+
+    for header, full in zip(scanned, parsed):
+        assert (header.title, header.date, header.tags) == (full.title, full.date, full.tags)
+    print(f"header-only scan: {scan_seconds:8.2f} s  {args.pages / scan_seconds:10.0f} pages/s")
+    print(f"full parse:       {parse_seconds:8.2f} s  {args.pages / parse_seconds:10.0f} pages/s")
+    print(f"speedup:          {parse_seconds / scan_seconds:8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,55 @@
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+from inline_markdown import (
+    split_nodes_delimiter,
+    split_nodes_image,
+    split_nodes_link,
+    text_to_textnodes,
+)
+from textnode import TextNode, TextType
+
+
+def chained_text_to_textnodes(text):
+    nodes = [TextNode(text, TextType.TEXT)]
+    nodes = split_nodes_delimiter(nodes, "**", TextType.BOLD)
+    nodes = split_nodes_delimiter(nodes, "_", TextType.ITALIC)
+    nodes = split_nodes_delimiter(nodes, "`", TextType.CODE)
+    nodes = split_nodes_image(nodes)
+    nodes = split_nodes_link(nodes)
+    return nodes
+
+
+def link_heavy_paragraph(count):
+    return " ".join(
+        f"see [page {i}](https://example.com/page{i}) and ![figure {i}](/images/figure{i}.png)"
+        for i in range(count)
+    )
+
+
+def emphasis_heavy_paragraph(count):
+    return " ".join(f"some **bold {i}** then _italic {i}_ and `code {i}`" for i in range(count))
+
+
+def bench(name, text, number):
+    assert chained_text_to_textnodes(text) == text_to_textnodes(text)
+    chained = min(timeit.repeat(lambda: chained_text_to_textnodes(text), number=number, repeat=3))
+    single = min(timeit.repeat(lambda: text_to_textnodes(text), number=number, repeat=3))
+    print(
+        f"{name:<28} {len(text):>8} chars  chained {chained / number * 1e3:8.3f} ms"
+        f"  single-pass {single / number * 1e3:8.3f} ms  {chained / single:5.1f}x"
+    )
+
+
+def main():
+    for count in (10, 100, 1000):
+        bench(f"link-heavy ({count})", link_heavy_paragraph(count), max(1, 2000 // count))
+    for count in (10, 100, 1000):
+        bench(f"emphasis-heavy ({count})", emphasis_heavy_paragraph(count), max(1, 2000 // count))
+
+
+if __name__ == "__main__":
+    main()
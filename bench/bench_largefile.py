@@ -0,0 +1,83 @@
+import argparse
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+import gencontent
+from corpus import CorpusGenerator
+from template import Template
+
+MODES = ("baseline", "in-memory", "mapped")
+
+
+def child(mode, path):
+    # Runs in a fresh interpreter so ru_maxrss only covers this one render
+    if mode != "baseline":
+        gencontent.LARGE_FILE_SIZE = 0 if mode == "mapped" else float("inf")
+        dest_path = os.path.join(os.path.dirname(path), f"{mode}.html")
+        start = time.perf_counter()
+        gencontent.write_page(path, Template("<html>{{ Title }}{{ Content }}</html>"), dest_path, "/")
+        print(time.perf_counter() - start)
+    else:
+        print(0.0)
+    print(peak_rss_kb())
+
+
+def peak_rss_kb():
+    # ru_maxrss survives fork and exec, so it can report the parent's peak;
+    # VmHWM belongs to this process's own address space.
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+
+def measure(mode, path):
+    output = subprocess.run(
+        [sys.executable, os.path.abspath(__file__), "--child", mode, path],
+        check=True, capture_output=True, text=True,
+    ).stdout.split()
+    return float(output[0]), int(output[1]) / 1024
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Peak RSS of rendering one large page in memory vs from a mapped file"
+    )
+    parser.add_argument("--megabytes", type=int, nargs="+", default=[8, 32])
+    parser.add_argument("--child", nargs=2, metavar=("MODE", "PATH"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.child:
+        child(*args.child)
+        return
+
+    with tempfile.TemporaryDirectory() as tmp:
+        for megabytes in args.megabytes:
+            path = os.path.join(tmp, "page.md")
+            generator = CorpusGenerator(blocks_per_page=1000)
+            with open(path, "w") as f:
+                f.write(generator.page("Reference"))
+                while f.tell() < megabytes << 20:
+                    f.write("\n" + generator.page("Section")[2:])
+            size = os.path.getsize(path) / (1 << 20)
+            results = {mode: measure(mode, path) for mode in MODES}
+            with open(os.path.join(tmp, "in-memory.html")) as a, open(os.path.join(tmp, "mapped.html")) as b:
+                assert a.read() == b.read()
+            baseline = results["baseline"][1]
+            print(f"{size:.1f} MB page (interpreter baseline {baseline:.0f} MB RSS)")
+            for mode in MODES[1:]:
+                seconds, rss = results[mode]
+                print(f"  {mode:10} {seconds:6.2f} s  peak RSS +{rss - baseline:7.1f} MB")
+
+
+if __name__ == "__main__":
+    main()
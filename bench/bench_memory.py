@@ -0,0 +1,41 @@
+import os
+import sys
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+from block_markdown import markdown_to_html_node
+
+CONTENT_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "content")
+
+
+def load_corpus(target_size):
+    sources = []
+    for root, _, filenames in os.walk(CONTENT_DIR):
+        for filename in sorted(filenames):
+            with open(os.path.join(root, filename)) as f:
+                sources.append(f.read().strip())
+    parts = []
+    size = 0
+    while size < target_size:
+        for source in sources:
+            parts.append(source)
+            size += len(source) + 2
+    return "\n\n".join(parts)
+
+
+def main():
+    markdown = load_corpus(1 << 20)
+    megabytes = len(markdown.encode()) / (1 << 20)
+    tracemalloc.start()
+    node = markdown_to_html_node(markdown)
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"markdown: {megabytes:.2f} MB")
+    print(f"node tree retained: {current / (1 << 20) / megabytes:.2f} MB per MB of markdown")
+    print(f"tracemalloc peak:   {peak / (1 << 20) / megabytes:.2f} MB per MB of markdown")
+    return node
+
+
+if __name__ == "__main__":
+    main()
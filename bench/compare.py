@@ -0,0 +1,54 @@
+import argparse
+import json
+import sys
+
+
+def compare(baseline, current, threshold):
+    regressions = []
+    lines = []
+    for name, base in sorted(baseline["results"].items()):
+        result = current["results"].get(name)
+        if result is None:
+            # a benchmark that stopped running can't be shown not to have regressed
+            lines.append(f"{name:<26} missing from current results  REGRESSION")
+            regressions.append(name)
+            continue
+        change = result["throughput"] / base["throughput"] - 1
+        marker = ""
+        if change < -threshold:
+            marker = "  REGRESSION"
+            regressions.append(name)
+        lines.append(
+            f"{name:<26} {base['throughput']:14.1f} -> {result['throughput']:14.1f} "
+            f"{result['unit']:<8} {change * 100:+7.1f}%{marker}"
+        )
+    return regressions, lines
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare two benchmark result files")
+    parser.add_argument("baseline")
+    parser.add_argument("current")
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=0.10,
+        help="maximum allowed throughput drop as a fraction (default: 0.10)",
+    )
+    args = parser.parse_args()
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    with open(args.current) as f:
+        current = json.load(f)
+    regressions, lines = compare(baseline, current, args.threshold)
+    print("\n".join(lines))
+    if regressions:
+        print(
+            f"{len(regressions)} benchmarks regressed by more than {args.threshold:.0%} "
+            "or are missing"
+        )
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
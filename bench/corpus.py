@@ -0,0 +1,146 @@
+import argparse
+import os
+import random
+
+WORDS = (
+    "the ring hobbit shire wizard elf dwarf mountain river forest road tower king "
+    "sword song star light shadow journey fellowship council gate bridge hall "
+    "ancient silver golden quiet distant long old young brave wise"
+).split()
+
+DEFAULT_MIX = {
+    "heading": 2,
+    "paragraph": 6,
+    "ulist": 2,
+    "olist": 1,
+    "code": 1,
+    "quote": 1,
+}
+
+DEFAULT_INLINE_MIX = {
+    "text": 20,
+    "bold": 2,
+    "italic": 2,
+    "code": 1,
+    "link": 2,
+    "image": 1,
+}
+
+
+def parse_mix(spec, default):
+    if not spec:
+        return dict(default)
+    mix = {}
+    for part in spec.split(","):
+        name, weight = part.split("=")
+        if name not in default:
+            raise ValueError(f"unknown mix entry: {name}")
+        mix[name] = int(weight)
+    return mix
+
+
+class CorpusGenerator:
+    def __init__(self, seed=0, mix=None, inline_mix=None, blocks_per_page=20, front_matter=False):
+        self.rng = random.Random(seed)
+        self.mix = mix or DEFAULT_MIX
+        self.inline_mix = inline_mix or DEFAULT_INLINE_MIX
+        self.blocks_per_page = blocks_per_page
+        self.front_matter = front_matter
+        self._block_kinds = list(self.mix)
+        self._block_weights = [self.mix[kind] for kind in self._block_kinds]
+        self._inline_kinds = list(self.inline_mix)
+        self._inline_weights = [self.inline_mix[kind] for kind in self._inline_kinds]
+
+    def words(self, count):
+        return " ".join(self.rng.choice(WORDS) for _ in range(count))
+
+    def inline(self, count):
+        parts = []
+        for _ in range(count):
+            kind = self.rng.choices(self._inline_kinds, self._inline_weights)[0]
+            text = self.words(self.rng.randint(1, 3))
+            if kind == "bold":
+                parts.append(f"**{text}**")
+            elif kind == "italic":
+                parts.append(f"_{text}_")
+            elif kind == "code":
+                parts.append(f"`{text}`")
+            elif kind == "link":
+                parts.append(f"[{text}](/blog/{self.rng.choice(WORDS)})")
+            elif kind == "image":
+                parts.append(f"![{text}](/images/{self.rng.choice(WORDS)}.png)")
+            else:
+                parts.append(text)
+        return " ".join(parts)
+
+    def block(self, kind):
+        rng = self.rng
+        if kind == "heading":
+            return f"{'#' * rng.randint(2, 6)} {self.inline(rng.randint(1, 3))}"
+        if kind == "paragraph":
+            return "\n".join(self.inline(rng.randint(4, 12)) for _ in range(rng.randint(1, 4)))
+        if kind == "ulist":
+            return "\n".join(f"- {self.inline(rng.randint(2, 6))}" for _ in range(rng.randint(2, 6)))
+        if kind == "olist":
+            return "\n".join(
+                f"{i}. {self.inline(rng.randint(2, 6))}" for i in range(1, rng.randint(3, 7))
+            )
+        if kind == "code":
+            lines = [f"    {self.words(rng.randint(2, 8))}" for _ in range(rng.randint(2, 8))]
+            return "```\n" + "\n".join(lines) + "\n```"
+        if kind == "quote":
+            return "\n".join(f"> {self.inline(rng.randint(3, 8))}" for _ in range(rng.randint(1, 4)))
+        raise ValueError(f"unknown block kind: {kind}")
+
+    def header(self, title):
+        rng = self.rng
+        tags = ", ".join(sorted(set(rng.choice(WORDS) for _ in range(rng.randint(1, 3)))))
+        return (
+            f"---\ntitle: \"{title}\"\n"
+            f"date: 20{rng.randint(10, 25)}-{rng.randint(1, 12):02}-{rng.randint(1, 28):02}\n"
+            f"tags: [{tags}]\n---\n"
+        )
+
+    def page(self, title):
+        blocks = [f"# {title}"]
+        for _ in range(self.blocks_per_page):
+            kind = self.rng.choices(self._block_kinds, self._block_weights)[0]
+            blocks.append(self.block(kind))
+        page = "\n\n".join(blocks) + "\n"
+        return self.header(title) + page if self.front_matter else page
+
+    def site(self, content_dir, pages):
+        paths = []
+        for i in range(pages):
+            section = f"section{i % 10}"
+            path = os.path.join(content_dir, section, f"page{i}", "index.md")
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path, "w") as f:
+                f.write(self.page(f"Page {i}"))
+            paths.append(path)
+        return paths
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate a deterministic synthetic markdown site")
+    parser.add_argument("content_dir")
+    parser.add_argument("--pages", type=int, default=100)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--blocks", type=int, default=20, help="blocks per page")
+    parser.add_argument("--mix", help="block weights, e.g. heading=2,paragraph=6,code=1")
+    parser.add_argument("--inline-mix", help="inline weights, e.g. text=20,link=5")
+    parser.add_argument("--front-matter", action="store_true", help="start pages with a YAML header")
+    args = parser.parse_args()
+    generator = CorpusGenerator(
+        args.seed,
+        parse_mix(args.mix, DEFAULT_MIX),
+        parse_mix(args.inline_mix, DEFAULT_INLINE_MIX),
+        args.blocks,
+        args.front_matter,
+    )
+    paths = generator.site(args.content_dir, args.pages)
+    print(f"Wrote {len(paths)} pages to {args.content_dir}")
+
+
+if __name__ == "__main__":
+    main()
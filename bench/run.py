@@ -0,0 +1,134 @@
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+import timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+from block_markdown import block_to_block_type, markdown_to_blocks, markdown_to_html_node
+from build import BuildConfig, build_site
+from corpus import CorpusGenerator
+from inline_markdown import text_to_textnodes
+
+ROOT_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+
+
+def measure(func, repeat, number):
+    func()
+    best = min(timeit.repeat(func, number=number, repeat=repeat))
+    return best / number
+
+
+def micro_benchmarks(generator, repeat):
+    markdown = "\n\n".join(generator.page(f"Page {i}") for i in range(20))
+    blocks = markdown_to_blocks(markdown)
+    paragraphs = [block for block in blocks if block_to_block_type(block).value == "paragraph"]
+    inline_text = " ".join(paragraphs).replace("\n", " ")
+    node = markdown_to_html_node(markdown)
+    html_size = len(node.to_html())
+
+    def run_inline():
+        text_to_textnodes(inline_text)
+
+    def run_blocks():
+        markdown_to_blocks(markdown)
+
+    def run_block_types():
+        for block in blocks:
+            block_to_block_type(block)
+
+    def run_to_html():
+        node.to_html()
+
+    def run_markdown_to_html():
+        markdown_to_html_node(markdown).to_html()
+
+    cases = (
+        ("text_to_textnodes", run_inline, len(inline_text)),
+        ("markdown_to_blocks", run_blocks, len(markdown)),
+        ("block_to_block_type", run_block_types, len(markdown)),
+        ("to_html", run_to_html, html_size),
+        ("markdown_to_html", run_markdown_to_html, len(markdown)),
+    )
+    results = {}
+    for name, func, size in cases:
+        seconds = measure(func, repeat, 10)
+        results[name] = {"seconds": seconds, "throughput": size / seconds, "unit": "chars/s"}
+    return results
+
+
+def build_benchmarks(generator, pages, jobs, repeat):
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        content_dir = os.path.join(tmp, "content")
+        generator.site(content_dir, pages)
+        modes = [("build_full", {"jobs": 1})]
+        if jobs > 1:
+            modes.append((f"build_full_j{jobs}", {"jobs": jobs}))
+        modes.append(("build_full_pipeline", {"jobs": jobs, "pipeline": True}))
+        modes.append(("build_incremental_noop", {"jobs": 1, "incremental": True}))
+        for name, options in modes:
+            config = BuildConfig(
+                content_dir=content_dir,
+                template_path=os.path.join(ROOT_DIR, "template.html"),
+                static_dir=os.path.join(ROOT_DIR, "static"),
+                dest_dir=os.path.join(tmp, "docs"),
+                manifest_path=os.path.join(tmp, "manifest.json"),
+                # nothing may land in the repository's own .cache
+                render_cache_dir=os.path.join(tmp, "fragments"),
+                site_index_path=os.path.join(tmp, "site-index.json"),
+                image_store_dir=os.path.join(tmp, "images"),
+                search_index_path=os.path.join(tmp, "search-index.json"),
+                **options,
+            )
+            timings = []
+            for _ in range(repeat):
+                start = time.perf_counter()
+                with contextlib.redirect_stdout(io.StringIO()):
+                    build_site(config)
+                timings.append(time.perf_counter() - start)
+            seconds = min(timings)
+            results[name] = {"seconds": seconds, "throughput": pages / seconds, "unit": "pages/s"}
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the benchmark suite")
+    parser.add_argument("-o", "--output", help="write results as JSON to this file")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--pages", type=int, default=200, help="pages in the end-to-end build")
+    parser.add_argument("--jobs", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--only", choices=("micro", "build"))
+    args = parser.parse_args()
+
+    results = {}
+    if args.only != "build":
+        results.update(micro_benchmarks(CorpusGenerator(args.seed), args.repeat))
+    if args.only != "micro":
+        results.update(build_benchmarks(CorpusGenerator(args.seed), args.pages, args.jobs, args.repeat))
+
+    for name, result in results.items():
+        print(f"{name:<26} {result['seconds'] * 1000:10.3f} ms  {result['throughput']:14.1f} {result['unit']}")
+
+    if args.output:
+        report = {
+            "python": platform.python_version(),
+            "machine": platform.machine(),
+            "seed": args.seed,
+            "pages": args.pages,
+            "results": results,
+        }
+        os.makedirs(os.path.dirname(args.output) or ".", exist_ok=True)
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=1, sort_keys=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,3 +1,2 @@
 #!/bin/bash
-python3 src/main.py
-cd docs && python3 -m http.server 8888
\ No newline at end of file
+python3 src/main.py serve --port 8888
@@ -1,8 +1,28 @@
+import re
 from enum import Enum
 
 from htmlnode import ParentNode
 from inline_markdown import text_to_textnodes
-from textnode import text_node_to_html_node, TextNode, TextType
+from profiling import page_timer, timed, timed_iter
+from textnode import inline_capture, text_node_to_html_node, TextNode, TextType
+
+# Bump whenever the HTML produced for a block changes, so cached
+# fragments from older parsers are not reused.
+PARSER_VERSION = 5
+
+HEADING_TAGS = (None, "h1", "h2", "h3", "h4", "h5", "h6")
+HEADING_PREFIXES = ("# ", "## ", "### ", "#### ", "##### ", "###### ")
+# lines starting with these belong to the list item above them
+INDENT_CHARS = (" ", "\t")
+OLIST_ITEM_PATTERN = re.compile(r"\d+\. ")
+CODE_LANGUAGE_PATTERN = re.compile(r"[\w#+.-]+")
+# a GFM delimiter row such as "| --- | :---: | ---: |" or "--- | :---:"; the
+# outer pipes are optional, but a lone "---" is not a table
+TABLE_DELIMITER_PATTERN = re.compile(
+    r"(?:\|\s*:?-+:?\s*|\s*:?-+:?\s*(?=\|))(?:\|\s*:?-+:?\s*)*\|?\s*$"
+)
+TABLE_CELL_SEPARATOR = re.compile(r"(?<!\\)\|")
+LINE_PATTERN = re.compile(r".*\n|.+")
 
 
 class BlockType(Enum):
@@ -12,74 +32,237 @@ class BlockType(Enum):
     QUOTE = "quote"
     OLIST = "ordered_list"
     ULIST = "unordered_list"
+    TABLE = "table"
 
 
-def markdown_to_blocks(markdown):
-    blocks = markdown.split("\n\n")
-    filtered_blocks = []
-    for block in blocks:
-        if block == "":
+class Block:
+    __slots__ = ("block_type", "lines")
+
+    def __init__(self, block_type, lines):
+        self.block_type = block_type
+        self.lines = lines
+
+    def text(self):
+        return "\n".join(self.lines)
+
+    def __eq__(self, other):
+        return self.block_type == other.block_type and self.lines == other.lines
+
+    def __repr__(self):
+        return f"Block({self.block_type.value}, {self.lines})"
+
+
+class CustomBlockType:
+    # Block type of a registered extension; BlockType members cover the
+    # built-in blocks and an Enum cannot be extended
+    __slots__ = ("value",)
+
+    def __init__(self, value):
+        self.value = value
+
+    def __repr__(self):
+        return f"CustomBlockType({self.value})"
+
+
+class BlockSyntax:
+    __slots__ = ("block_type", "markers", "starts", "continues", "convert")
+
+    def __init__(self, block_type, markers, starts, convert, continues=None):
+        self.block_type = block_type
+        # characters a block's first line can start with
+        self.markers = markers
+        # starts(line) -> whether `line` opens a block of this type
+        self.starts = starts
+        self.convert = convert
+        # continues(line, item_number) -> whether a following line keeps the
+        # block this type; None when every line does. item_number counts the
+        # block's unindented lines, including this one when it is unindented.
+        self.continues = continues
+
+    def __repr__(self):
+        return f"BlockSyntax({self.block_type.value}, markers: {self.markers!r})"
+
+
+# first character of a line -> syntaxes that may start there, tried in order
+SYNTAXES_BY_MARKER = {}
+BLOCK_CONVERTERS = {}
+
+
+def register_block_syntax(syntax):
+    # Later registrations are tried first, so an extension can claim lines
+    # a built-in block would otherwise take
+    for marker in syntax.markers:
+        SYNTAXES_BY_MARKER[marker] = (syntax,) + SYNTAXES_BY_MARKER.get(marker, ())
+    BLOCK_CONVERTERS[syntax.block_type] = syntax.convert
+    return syntax
+
+
+def register_block_type(name, markers, starts, convert, continues=None):
+    # Entry point for extensions (tables, admonitions, ...): returns the new
+    # block type. Cached fragments are keyed by `name`, so a changed
+    # `convert` needs a new name or a cleared render cache.
+    syntax = BlockSyntax(CustomBlockType(name), markers, starts, convert, continues)
+    return register_block_syntax(syntax).block_type
+
+
+def iter_lines(text):
+    # Lines of a string with their endings, sliced out as they are asked for
+    # so the page is never copied whole
+    return map(re.Match.group, LINE_PATTERN.finditer(text))
+
+
+def iter_blocks(lines):
+    timer = page_timer.get()
+    if timer is None:
+        return _scan_blocks(lines)
+    # classifying is timed inside the scan, what is left is the split
+    return timed_iter(_scan_blocks(lines, timer), timer, "block split")
+
+
+def _scan_blocks(lines, timer=None):
+    # Single pass over the lines: blank lines end a block, fenced code runs
+    # until its closing fence (blank lines included), and every block is
+    # classified line by line while it is being collected.
+    start = start_syntax
+    starts_table = _starts_table
+    if timer is not None:
+        start = timed(start_syntax, timer, "block classification")
+        starts_table = timed(_starts_table, timer, "block classification")
+    block_lines = []
+    block_type = None
+    continues = None
+    items = 0
+    indent = 0
+    in_fence = False
+    for line in lines:
+        line = line.rstrip("\r\n")
+        if in_fence:
+            block_lines.append(line)
+            if line.startswith("```"):
+                block_lines[-1] = line.rstrip()
+                yield Block(BlockType.CODE, block_lines)
+                block_lines = []
+                in_fence = False
             continue
-        block = block.strip()
-        filtered_blocks.append(block)
-    return filtered_blocks
+        if not line or line.isspace():
+            if block_lines:
+                block_lines[-1] = block_lines[-1].rstrip()
+                yield Block(block_type, block_lines)
+                block_lines = []
+            continue
+        if not block_lines:
+            stripped = line.lstrip()
+            indent = len(line) - len(stripped)
+            line = stripped
+            if line.startswith("```") and "```" not in line[3:]:
+                block_lines = [line.rstrip()]
+                in_fence = True
+                continue
+            syntax = start(line)
+            block_type = syntax.block_type
+            continues = syntax.continues
+            if timer is not None and continues is not None:
+                continues = timed(continues, timer, "block classification")
+            items = 1
+        else:
+            if indent:
+                # the block's indent is dropped from every line, so nesting
+                # is measured from its first line
+                line = line[min(indent, len(line) - len(line.lstrip())):]
+            if continues is not None:
+                if not line.startswith(INDENT_CHARS):
+                    items += 1
+                if not continues(line, items):
+                    # a list, quote or table with a stray line is a paragraph after all
+                    block_type = BlockType.PARAGRAPH
+                    continues = None
+            elif (
+                len(block_lines) == 1
+                and block_type is BlockType.PARAGRAPH
+                and starts_table(block_lines[0], line)
+            ):
+                block_type = TABLE_SYNTAX.block_type
+                continues = TABLE_SYNTAX.continues
+                if timer is not None:
+                    continues = timed(continues, timer, "block classification")
+                items = 2
+        block_lines.append(line)
+    if block_lines:
+        if not in_fence:
+            block_lines[-1] = block_lines[-1].rstrip()
+            yield Block(block_type, block_lines)
+        else:
+            # An unclosed fence runs to the end of the document
+            yield Block(BlockType.CODE, block_lines)
 
 
-def block_to_block_type(block):
-    lines = block.split("\n")
+def start_syntax(line):
+    # Most lines start with a character no block marker uses, so they cost
+    # one dict lookup before falling through to a paragraph
+    for syntax in SYNTAXES_BY_MARKER.get(line[:1], ()):
+        if syntax.starts(line):
+            return syntax
+    return PARAGRAPH_SYNTAX
+
+
+def start_block_type(line):
+    return start_syntax(line).block_type
 
-    if block.startswith(("# ", "## ", "### ", "#### ", "##### ", "###### ")):
+
+def markdown_to_blocks(markdown):
+    return [block.text() for block in iter_blocks(iter_lines(markdown))]
+
+
+def block_to_block_type(block):
+    if block.startswith(HEADING_PREFIXES):
         return BlockType.HEADING
+    lines = block.split("\n")
     if len(lines) > 1 and lines[0].startswith("```") and lines[-1].startswith("```"):
         return BlockType.CODE
-    if block.startswith(">"):
-        for line in lines:
-            if not line.startswith(">"):
-                return BlockType.PARAGRAPH
-        return BlockType.QUOTE
-    if block.startswith("- "):
-        for line in lines:
-            if not line.startswith("- "):
-                return BlockType.PARAGRAPH
-        return BlockType.ULIST
-    if block.startswith("1. "):
-        i = 1
-        for line in lines:
-            if not line.startswith(f"{i}. "):
+    syntax = start_syntax(block)
+    if syntax is PARAGRAPH_SYNTAX and len(lines) > 1 and _starts_table(lines[0], lines[1]):
+        syntax = TABLE_SYNTAX
+    if syntax.continues is not None:
+        items = 1
+        for line in lines[1:]:
+            if not line.startswith(INDENT_CHARS):
+                items += 1
+            if not syntax.continues(line, items):
                 return BlockType.PARAGRAPH
-            i += 1
-        return BlockType.OLIST
-    return BlockType.PARAGRAPH
+    return syntax.block_type
 
 
-def markdown_to_html_node(markdown):
-    blocks = markdown_to_blocks(markdown)
-    children = []
-    for block in blocks:
-        html_node = block_to_html_node(block)
-        children.append(html_node)
-    return ParentNode("div", children, None)
+def markdown_to_html_node(markdown, block_converter=None):
+    return ParentNode("div", list(iter_html_nodes(iter_lines(markdown), block_converter)), None)
+
+
+def iter_html_nodes(lines, block_converter=None):
+    convert = block_converter or block_lines_to_html_node
+    for block in iter_blocks(lines):
+        yield convert(block.block_type, block.lines)
 
 
 def block_to_html_node(block):
-    block_type = block_to_block_type(block)
-    if block_type == BlockType.PARAGRAPH:
-        return paragraph_to_html_node(block)
-    if block_type == BlockType.HEADING:
-        return heading_to_html_node(block)
-    if block_type == BlockType.CODE:
-        return code_to_html_node(block)
-    if block_type == BlockType.OLIST:
-        return olist_to_html_node(block)
-    if block_type == BlockType.ULIST:
-        return ulist_to_html_node(block)
-    if block_type == BlockType.QUOTE:
-        return quote_to_html_node(block)
-    raise ValueError("invalid block type")
+    return block_lines_to_html_node(block_to_block_type(block), block.split("\n"))
+
+
+def block_lines_to_html_node(block_type, lines):
+    convert = BLOCK_CONVERTERS.get(block_type)
+    if convert is None:
+        raise ValueError("invalid block type")
+    return convert(lines)
 
 
 def text_to_children(text):
-    text_nodes = text_to_textnodes(text)
+    timer = page_timer.get()
+    if timer is None:
+        text_nodes = text_to_textnodes(text)
+    else:
+        with timer.stage("inline parsing"):
+            text_nodes = text_to_textnodes(text)
+    capture = inline_capture.get()
+    if capture is not None:
+        capture.record(text_nodes)
     children = []
     for text_node in text_nodes:
         html_node = text_node_to_html_node(text_node)
@@ -87,59 +270,119 @@ def text_to_children(text):
     return children
 
 
-def paragraph_to_html_node(block):
-    lines = block.split("\n")
+def paragraph_to_html_node(lines):
     paragraph = " ".join(lines)
     children = text_to_children(paragraph)
     return ParentNode("p", children)
 
 
-def heading_to_html_node(block):
-    level = 0
-    for char in block:
-        if char == "#":
-            level += 1
-        else:
-            break
-    if level + 1 >= len(block):
+def heading_to_html_node(lines):
+    first_line = lines[0]
+    # the marker is all "#" up to the first space, as classification checked
+    level = first_line.find(" ")
+    if not 0 < level <= 6 or level + 1 >= len(first_line):
+        raise ValueError(f"invalid heading level: {level}")
+    if not first_line.startswith(HEADING_PREFIXES[level - 1]):
         raise ValueError(f"invalid heading level: {level}")
-    text = block[level + 1 :]
+    text = first_line[level + 1 :] if len(lines) == 1 else "\n".join(lines)[level + 1 :]
     children = text_to_children(text)
-    return ParentNode(f"h{level}", children)
+    return ParentNode(HEADING_TAGS[level], children)
 
 
-def code_to_html_node(block):
-    if not block.startswith("```") or not block.endswith("```"):
+def code_to_html_node(lines):
+    first_line = lines[0]
+    if not first_line.startswith("```"):
         raise ValueError("invalid code block")
-    text = block[4:-3]
+    if len(lines) > 1 and lines[-1].startswith("```"):
+        lines = lines[1:-1]
+    else:
+        lines = lines[1:]
+    text = "".join(line + "\n" for line in lines)
     raw_text_node = TextNode(text, TextType.TEXT)
     child = text_node_to_html_node(raw_text_node)
-    code = ParentNode("code", [child])
+    code = ParentNode("code", [child], code_language_props(first_line))
     return ParentNode("pre", [code])
 
 
-def olist_to_html_node(block):
-    items = block.split("\n")
+def code_language_props(fence):
+    # "```python" -> class="language-python", as GFM renderers emit it
+    match = CODE_LANGUAGE_PATTERN.match(fence[3:].strip())
+    if match is None:
+        return None
+    return {"class": f"language-{match.group()}"}
+
+
+def olist_to_html_node(lines):
+    if any(line.startswith(INDENT_CHARS) for line in lines):
+        return list_to_html_node(lines)
     html_items = []
-    for item in items:
-        text = item[3:]
-        children = text_to_children(text)
-        html_items.append(ParentNode("li", children))
+    for i, item in enumerate(lines, 1):
+        text = item[len(str(i)) + 2 :]
+        html_items.append(ParentNode("li", text_to_children(text)))
     return ParentNode("ol", html_items)
 
 
-def ulist_to_html_node(block):
-    items = block.split("\n")
-    html_items = []
-    for item in items:
-        text = item[2:]
-        children = text_to_children(text)
-        html_items.append(ParentNode("li", children))
-    return ParentNode("ul", html_items)
+def ulist_to_html_node(lines):
+    if any(line.startswith(INDENT_CHARS) for line in lines):
+        return list_to_html_node(lines)
+    return ParentNode("ul", [ParentNode("li", text_to_children(item[2:])) for item in lines])
 
 
-def quote_to_html_node(block):
-    lines = block.split("\n")
+def list_to_html_node(lines):
+    # Nesting follows indentation. Open lists are kept on a stack, so each
+    # line pushes at most one list and every list is popped once: linear in
+    # the number of lines however deep the nesting. An item's text is
+    # parsed as soon as the next item starts, which keeps the inline
+    # children ahead of any nested list.
+    stack = []
+    item = None
+    item_text = []
+    for line in lines:
+        if "\t" in line:
+            line = line.expandtabs(4)
+        content = line.lstrip(" ")
+        indent = len(line) - len(content)
+        if content.startswith("- "):
+            tag = "ul"
+            text = content[2:]
+        else:
+            match = OLIST_ITEM_PATTERN.match(content)
+            if match is None:
+                if item is None:
+                    raise ValueError("invalid list block")
+                # lazy continuation of the item above
+                item_text.append(content)
+                continue
+            tag = "ol"
+            text = content[match.end() :]
+        if item is not None:
+            item.children = text_to_children(" ".join(item_text))
+        popped = None
+        while len(stack) > 1 and indent < stack[-1][0]:
+            popped = stack.pop()
+        if popped is not None and indent > stack[-1][0]:
+            # dedented to between two open levels: back into the list it left
+            stack.append((indent, popped[1], popped[2]))
+        if not stack or indent > stack[-1][0] or tag != stack[-1][1].tag:
+            if stack and indent <= stack[-1][0] and stack[-1][2] is not None:
+                # a different marker at the same depth starts a sibling list
+                parent = stack.pop()[2]
+            else:
+                # nested lists go into the last item of the enclosing list
+                parent = stack[-1][1].children[-1] if stack else None
+            new_list = ParentNode(tag, [])
+            if parent is not None:
+                parent.children.append(new_list)
+            stack.append((indent, new_list, parent))
+        item = ParentNode("li", [])
+        item_text = [text]
+        stack[-1][1].children.append(item)
+    if item is not None:
+        item.children = text_to_children(" ".join(item_text))
+    return stack[0][1]
+
+
+def quote_to_html_node(lines):
     new_lines = []
     for line in lines:
         if not line.startswith(">"):
@@ -148,3 +391,89 @@ def quote_to_html_node(block):
     content = " ".join(new_lines)
     children = text_to_children(content)
     return ParentNode("blockquote", children)
+
+
+def table_to_html_node(lines):
+    # A block that starts with "|" but never got its delimiter row is
+    # rendered like any other paragraph
+    if len(lines) < 2:
+        return paragraph_to_html_node(lines)
+    header = split_table_row(lines[0])
+    alignments = []
+    for cell in split_table_row(lines[1]):
+        if cell.startswith(":"):
+            alignments.append("center" if cell.endswith(":") else "left")
+        else:
+            alignments.append("right" if cell.endswith(":") else None)
+    alignments = (alignments + [None] * len(header))[: len(header)]
+    head = ParentNode("thead", [table_row_node(header, "th", alignments)])
+    if len(lines) == 2:
+        return ParentNode("table", [head])
+    rows = []
+    for line in lines[2:]:
+        cells = split_table_row(line)
+        cells = (cells + [""] * len(header))[: len(header)]
+        rows.append(table_row_node(cells, "td", alignments))
+    return ParentNode("table", [head, ParentNode("tbody", rows)])
+
+
+def split_table_row(line):
+    line = line.strip()
+    if line.startswith("|"):
+        line = line[1:]
+    if line.endswith("|") and not line.endswith("\\|"):
+        line = line[:-1]
+    return [cell.strip().replace("\\|", "|") for cell in TABLE_CELL_SEPARATOR.split(line)]
+
+
+def table_row_node(cells, tag, alignments):
+    return ParentNode("tr", [
+        ParentNode(tag, text_to_children(cell), {"align": align} if align else None)
+        for cell, align in zip(cells, alignments)
+    ])
+
+
+def _quote_continues(line, line_number):
+    return line.startswith(">")
+
+
+def _ulist_continues(line, item_number):
+    return line.startswith("- ") or line.startswith(INDENT_CHARS)
+
+
+def _olist_continues(line, item_number):
+    # only the top level has to count 1., 2., 3., ...
+    return line.startswith(f"{item_number}. ") or line.startswith(INDENT_CHARS)
+
+
+def _table_continues(line, item_number):
+    if item_number == 2:
+        return TABLE_DELIMITER_PATTERN.match(line) is not None
+    return "|" in line
+
+
+def _starts_table(first_line, line):
+    # GFM tables may leave out the outer pipes, so a paragraph whose second
+    # line is a delimiter row is a table after all
+    return "|" in first_line and TABLE_DELIMITER_PATTERN.match(line) is not None
+
+
+PARAGRAPH_SYNTAX = BlockSyntax(BlockType.PARAGRAPH, "", lambda line: True, paragraph_to_html_node)
+BLOCK_CONVERTERS[BlockType.PARAGRAPH] = paragraph_to_html_node
+# fences are found by iter_blocks itself, since they span blank lines
+BLOCK_CONVERTERS[BlockType.CODE] = code_to_html_node
+register_block_syntax(BlockSyntax(
+    BlockType.HEADING, "#", lambda line: line.startswith(HEADING_PREFIXES), heading_to_html_node
+))
+register_block_syntax(BlockSyntax(
+    BlockType.QUOTE, ">", lambda line: True, quote_to_html_node, _quote_continues
+))
+register_block_syntax(BlockSyntax(
+    BlockType.ULIST, "-", lambda line: line.startswith("- "), ulist_to_html_node, _ulist_continues
+))
+register_block_syntax(BlockSyntax(
+    BlockType.OLIST, "1", lambda line: line.startswith("1. "), olist_to_html_node, _olist_continues
+))
+TABLE_SYNTAX = register_block_syntax(BlockSyntax(
+    BlockType.TABLE, "|", lambda line: True, table_to_html_node, _table_continues
+))
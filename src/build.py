@@ -0,0 +1,406 @@
+import os
+import shutil
+
+from copystatic import sync_tree
+from gencontent import collect_pages, generate_page
+from images import ImageStore, copy_variants, scan_images
+from links import LinkIndex, check_links
+from manifest import Manifest
+from pipeline import generate_pages_pipelined
+from precompress import DEFAULT_MIN_SIZE, Precompressor, precompress_outputs
+from profiling import BuildProfiler
+from render_cache import RenderCache
+from scheduler import generate_pages_parallel
+from search import SearchIndex
+from shards import (
+    SHARD_SEARCH_INDEX,
+    load_shard_manifests,
+    merge_shards,
+    select_shard,
+    write_shard_manifest,
+)
+from siteindex import SiteIndex, write_site_files
+from template import load_template
+
+
+class BuildConfig:
+    def __init__(
+        self,
+        content_dir="./content",
+        template_path="./template.html",
+        static_dir="./static",
+        dest_dir="./docs",
+        basepath="/",
+        incremental=False,
+        jobs=1,
+        static_mode="copy",
+        checksum=False,
+        manifest_path="./.cache/manifest.json",
+        profile_path=None,
+        cprofile_path=None,
+        render_cache=False,
+        render_cache_dir="./.cache/fragments",
+        render_cache_bytes=64 << 20,
+        render_cache_disk_bytes=256 << 20,
+        pipeline=False,
+        io_threads=4,
+        shard=None,
+        site_index_path="./.cache/site-index.json",
+        site_url="",
+        blog_section="blog",
+        listing_page_size=10,
+        precompress=False,
+        precompress_min_size=DEFAULT_MIN_SIZE,
+        minify=False,
+        image_dimensions=True,
+        image_widths=(),
+        image_store_dir="./.cache/images",
+        check_links=False,
+        search=False,
+        search_index_path="./.cache/search-index.json",
+    ):
+        self.content_dir = content_dir
+        self.template_path = template_path
+        self.static_dir = static_dir
+        self.dest_dir = dest_dir
+        self.basepath = basepath
+        self.incremental = incremental
+        self.jobs = jobs
+        self.static_mode = static_mode
+        self.checksum = checksum
+        self.manifest_path = manifest_path
+        self.profile_path = profile_path
+        self.cprofile_path = cprofile_path
+        self.render_cache = render_cache
+        self.render_cache_dir = render_cache_dir
+        self.render_cache_bytes = render_cache_bytes
+        self.render_cache_disk_bytes = render_cache_disk_bytes
+        self.pipeline = pipeline
+        self.io_threads = io_threads
+        # (index, count) when only building one shard of the pages
+        self.shard = shard
+        self.site_index_path = site_index_path
+        # prefix for the absolute urls in sitemap.xml and the feed
+        self.site_url = site_url
+        self.blog_section = blog_section
+        self.listing_page_size = listing_page_size
+        self.precompress = precompress
+        self.precompress_min_size = precompress_min_size
+        self.minify = minify
+        # width/height (and srcset when image_widths is set) on <img> tags
+        self.image_dimensions = image_dimensions
+        self.image_widths = tuple(image_widths)
+        self.image_store_dir = image_store_dir
+        # report internal links that point at no output or static asset
+        self.check_links = check_links
+        # write a full-text search index into docs/search/
+        self.search = search
+        self.search_index_path = search_index_path
+
+    def __repr__(self):
+        return f"BuildConfig({self.__dict__})"
+
+
+def create_render_cache(config):
+    if not config.render_cache:
+        return None
+    cache_dir = config.render_cache_dir if config.render_cache_disk_bytes > 0 else None
+    return RenderCache(config.render_cache_bytes, cache_dir, config.render_cache_disk_bytes)
+
+
+def create_precompressor(config):
+    if not config.precompress:
+        return None
+    return Precompressor(min_size=config.precompress_min_size)
+
+
+def scan_site_images(config, manifest=None, profiler=None):
+    # Returns (SiteImages or None, resized variants to copy). Variants are
+    # kept in the image store, so only new or changed images get resized.
+    if not config.image_dimensions or not os.path.isdir(config.static_dir):
+        return None, []
+    store = ImageStore(config.image_store_dir) if config.image_widths else None
+    if profiler is not None:
+        with profiler.build.stage("images"):
+            return scan_images(config.static_dir, manifest, store, config.image_widths)
+    return scan_images(config.static_dir, manifest, store, config.image_widths)
+
+
+def build_options(config, images):
+    return {
+        "minify": config.minify,
+        "images": images.version if images is not None else None,
+        # pages skipped by an incremental build have no text for the index
+        "search": config.search,
+    }
+
+
+def shard_settings(config, options):
+    # Everything a shard's pages depend on besides their sources; merge
+    # takes its settings from here and refuses shards that disagree
+    return dict(
+        options,
+        basepath=config.basepath,
+        image_dimensions=config.image_dimensions,
+        image_widths=list(config.image_widths),
+    )
+
+
+def build_site(config, cache=None):
+    if cache is None:
+        cache = create_render_cache(config)
+    # shards are compressed once merged
+    precompressor = create_precompressor(config) if config.shard is None else None
+    profiler = None
+    if config.profile_path is not None:
+        profiler = BuildProfiler(config.profile_path, config.cprofile_path)
+        profiler.start()
+
+    manifest_path = config.manifest_path
+    manifest = Manifest.load(manifest_path) if config.incremental else Manifest(manifest_path)
+    # image sizes end up in page markup, so any change to them rebuilds every page
+    images, image_variants = scan_site_images(config, manifest, profiler)
+    options = build_options(config, images)
+    if manifest.basepath != config.basepath or manifest.options != options:
+        manifest = Manifest(manifest_path)
+    manifest.basepath = config.basepath
+    manifest.options = options
+
+    dest_dir = config.dest_dir
+    site_index = SiteIndex(config.site_index_path, dest_dir)
+    if manifest.outputs:
+        site_index = SiteIndex.load(config.site_index_path, dest_dir)
+    site_index.basepath = config.basepath
+    search_index = None
+    if config.search:
+        if manifest.outputs:
+            search_index = SearchIndex.load(config.search_index_path)
+        if search_index is None:
+            search_index = SearchIndex(config.search_index_path)
+
+    if not manifest.outputs and os.path.exists(dest_dir):
+        print("Deleting docs directory...")
+        shutil.rmtree(dest_dir)
+    os.makedirs(dest_dir, exist_ok=True)
+
+    copied = 0
+    if config.shard is None:
+        copied = copy_static(config, manifest, profiler)
+        copied += copy_variants(image_variants, dest_dir, manifest)
+
+    print("Generating content...")
+    template_path = config.template_path
+    pages = collect_pages(config.content_dir, dest_dir)
+    if config.shard is not None:
+        pages = select_shard(pages, config.content_dir, *config.shard)
+    site_index.retain(from_path for from_path, _ in pages)
+    stale = []
+    for from_path, dest_path in pages:
+        indexed = from_path in site_index.pages and (search_index is None or from_path in search_index.pages)
+        if indexed and manifest.is_fresh(dest_path, [from_path, template_path]):
+            manifest.record(dest_path, [from_path, template_path])
+        else:
+            stale.append((from_path, dest_path))
+
+    failures = []
+    if profiler is not None and (config.jobs > 1 or config.pipeline):
+        print("--profile renders pages sequentially")
+    if profiler is None and config.pipeline:
+        failures = generate_pages_pipelined(
+            stale, template_path, config.basepath, config.jobs, cache, config.io_threads,
+            site_index=site_index, precompressor=precompressor, minify=config.minify,
+            images=images, search=config.search,
+        )
+    elif profiler is None and config.jobs > 1:
+        failures = generate_pages_parallel(
+            stale, template_path, config.basepath, config.jobs, cache, site_index, precompressor,
+            config.minify, images, config.search,
+        )
+    else:
+        for from_path, dest_path in stale:
+            timer = profiler.page(from_path) if profiler is not None else None
+            metadata = generate_page(
+                from_path, template_path, dest_path, config.basepath, cache, precompressor,
+                config.minify, images, config.search, timer,
+            )
+            site_index.update(from_path, dest_path, metadata)
+    failed = {from_path for from_path, _ in failures}
+    compressed = 0
+    for from_path, dest_path in stale:
+        if from_path not in failed:
+            manifest.record(dest_path, [from_path, template_path])
+            if precompressor is not None:
+                compressed += precompressor.record(manifest, dest_path)
+    rendered = len(stale) - len(failures)
+
+    if search_index is not None:
+        if profiler is not None:
+            with profiler.build.stage("search index"):
+                update_search_index(config, search_index, site_index, manifest)
+        else:
+            update_search_index(config, search_index, site_index, manifest)
+
+    link_report = None
+    if config.shard is None:
+        write_site_index(config, site_index, manifest)
+        write_nojekyll(dest_dir, manifest)
+        if precompressor is not None:
+            compressed += compress_outputs(manifest, precompressor, profiler)
+        if config.check_links:
+            link_report = check_site_links(config, site_index, manifest.recorded_outputs(), profiler)
+    elif config.check_links:
+        print("Links are checked when the shards are merged")
+
+    removed = remove_orphans(manifest.orphans(), dest_dir)
+    manifest.save()
+    site_index.save()
+    if config.shard is not None:
+        write_shard_manifest(
+            dest_dir, *config.shard, shard_settings(config, options), pages, site_index
+        )
+    print(f"Rendered {rendered} pages, copied {copied} files, removed {removed} orphans")
+    if precompressor is not None:
+        print(f"Compressed {compressed} outputs ({', '.join(precompressor.encodings)})")
+    if cache is not None:
+        cache.prune_disk()
+        print(cache.summary())
+    if profiler is not None:
+        profiler.stop()
+        profiler.save()
+        print(profiler.summary())
+    if link_report is not None:
+        print(link_report.summary())
+    if failures:
+        raise ValueError(f"{len(failures)} pages failed to build")
+    if link_report is not None and link_report.broken:
+        raise ValueError(f"{link_report.broken_count()} broken links")
+
+
+def copy_static(config, manifest, profiler=None):
+    print("Copying static files to docs directory...")
+    if profiler is not None:
+        with profiler.build.stage("static copy"):
+            synced = sync_tree(config.static_dir, config.dest_dir, config.static_mode, config.checksum)
+    else:
+        synced = sync_tree(config.static_dir, config.dest_dir, config.static_mode, config.checksum)
+    for from_path, dest_path in synced.files:
+        manifest.record(dest_path, [from_path])
+    return len(synced.copied)
+
+
+def compress_outputs(manifest, precompressor, profiler=None):
+    print("Compressing outputs...")
+    if profiler is not None:
+        with profiler.build.stage("precompress"):
+            return precompress_outputs(manifest, precompressor)
+    return precompress_outputs(manifest, precompressor)
+
+
+def write_site_index(config, site_index, manifest=None):
+    if not config.site_url:
+        print("No --site-url given, skipping sitemap.xml and the feed")
+    template = load_template(config.template_path, config.basepath, config.minify)
+    outputs = write_site_files(
+        site_index, template, config.site_url, config.basepath,
+        config.blog_section, config.listing_page_size,
+    )
+    if manifest is not None:
+        for dest_path in outputs:
+            manifest.record(dest_path, [])
+    return outputs
+
+
+def update_search_index(config, search_index, site_index, manifest):
+    # Pages rendered by this build carry their text; the postings of every
+    # other page are left as they are. Shard builds only save the index,
+    # the search files are written once the shards are merged.
+    search_index.retain(site_index.pages)
+    # in source order, so page ids don't depend on which worker finished first
+    for source, metadata in sorted(site_index.pages.items()):
+        if metadata.text is not None:
+            search_index.update(source, metadata.url, metadata.title, metadata.text)
+    if config.shard is None:
+        for path in search_index.write(config.dest_dir, config.basepath):
+            manifest.record(path, [])
+    search_index.save()
+
+
+def check_site_links(config, site_index, outputs, profiler=None):
+    # Every page's links were collected while it was parsed and are kept in
+    # the site index, so pages skipped by an incremental build or rendered
+    # in another process are checked without reading their html back.
+    if profiler is not None:
+        with profiler.build.stage("link check"):
+            return check_links(site_index.pages.values(), LinkIndex.from_outputs(outputs, config.dest_dir))
+    return check_links(site_index.pages.values(), LinkIndex.from_outputs(outputs, config.dest_dir))
+
+
+def write_nojekyll(dest_dir, manifest):
+    # ✅ Desactiva Jekyll para evitar errores de GitHub Pages
+    nojekyll_path = os.path.join(dest_dir, ".nojekyll")
+    if not os.path.exists(nojekyll_path):
+        open(nojekyll_path, "w").close()
+    manifest.record(nojekyll_path, [])
+
+
+def merge_site(config, shard_dirs):
+    manifests = load_shard_manifests(shard_dirs)
+    # the merged site is built with the settings the shards were built with
+    settings = manifests[0][1]["settings"]
+    basepath = config.basepath = settings["basepath"]
+    config.minify = settings["minify"]
+    config.search = settings["search"]
+    config.image_dimensions = settings["image_dimensions"]
+    config.image_widths = tuple(settings["image_widths"])
+    manifest = Manifest(config.manifest_path)
+    manifest.basepath = basepath
+    images, image_variants = scan_site_images(config, manifest)
+    manifest.options = build_options(config, images)
+    if shard_settings(config, manifest.options) != settings:
+        raise ValueError("static images changed since the shards were built, rebuild them")
+    outputs, pages = merge_shards(manifests, config.dest_dir, config.static_dir)
+    for dest_path in outputs:
+        manifest.record(dest_path, [])
+    site_index = SiteIndex(config.site_index_path, config.dest_dir, basepath, pages)
+    copy_static(config, manifest)
+    copy_variants(image_variants, config.dest_dir, manifest)
+    write_site_index(config, site_index, manifest)
+    write_nojekyll(config.dest_dir, manifest)
+    if config.search:
+        shard_indexes = []
+        for shard_dir in shard_dirs:
+            shard_index = SearchIndex.load(os.path.join(shard_dir, SHARD_SEARCH_INDEX))
+            if shard_index is None:
+                raise ValueError(f"shard {shard_dir} has no search index")
+            shard_indexes.append(shard_index)
+        search_index = SearchIndex(config.search_index_path)
+        search_index.merge(shard_indexes)
+        for path in search_index.write(config.dest_dir, basepath):
+            manifest.record(path, [])
+        search_index.save()
+    precompressor = create_precompressor(config)
+    if precompressor is not None:
+        compress_outputs(manifest, precompressor)
+    manifest.save()
+    site_index.save()
+    if config.check_links:
+        report = check_site_links(config, site_index, manifest.recorded_outputs())
+        print(report.summary())
+        if report.broken:
+            raise ValueError(f"{report.broken_count()} broken links")
+
+
+def remove_orphans(orphans, dest_dir):
+    removed = 0
+    for path in orphans:
+        if os.path.isfile(path):
+            os.remove(path)
+            removed += 1
+        parent = os.path.dirname(path)
+        while parent and os.path.normpath(parent) != os.path.normpath(dest_dir):
+            try:
+                os.rmdir(parent)
+            except OSError:
+                break
+            parent = os.path.dirname(parent)
+    return removed
@@ -1,16 +1,132 @@
+import errno
 import os
 import shutil
+from concurrent.futures import ThreadPoolExecutor
+
+from manifest import file_digest
+
+SYNC_MODES = ("copy", "hardlink", "reflink")
+
+# ioctl request number for FICLONE on Linux (btrfs, xfs, ...)
+FICLONE = 0x40049409
+
+
+class SyncResult:
+    def __init__(self):
+        self.files = []
+        self.copied = []
+        self.skipped = 0
+        self.pruned = []
+
+    def __repr__(self):
+        return (
+            f"SyncResult(files: {len(self.files)}, copied: {len(self.copied)}, "
+            f"skipped: {self.skipped}, pruned: {len(self.pruned)})"
+        )
 
 
 def copy_files_recursive(source_dir_path, dest_dir_path):
-    if not os.path.exists(dest_dir_path):
-        os.mkdir(dest_dir_path)
-
-    for filename in os.listdir(source_dir_path):
-        from_path = os.path.join(source_dir_path, filename)
-        dest_path = os.path.join(dest_dir_path, filename)
-        print(f" * {from_path} -> {dest_path}")
-        if os.path.isfile(from_path):
-            shutil.copy(from_path, dest_path)
+    return sync_tree(source_dir_path, dest_dir_path)
+
+
+def list_files(source_dir_path, dest_dir_path):
+    files = []
+    for root, dirs, filenames in os.walk(source_dir_path):
+        dirs.sort()
+        rel_root = os.path.relpath(root, source_dir_path)
+        for filename in sorted(filenames):
+            from_path = os.path.join(root, filename)
+            dest_path = os.path.normpath(os.path.join(dest_dir_path, rel_root, filename))
+            files.append((from_path, dest_path))
+    return files
+
+
+def sync_tree(source_dir_path, dest_dir_path, mode="copy", checksum=False, prune=False, jobs=None):
+    if mode not in SYNC_MODES:
+        raise ValueError(f"invalid sync mode: {mode}")
+    result = SyncResult()
+    result.files = list_files(source_dir_path, dest_dir_path)
+    changed = []
+    for from_path, dest_path in result.files:
+        if is_up_to_date(from_path, dest_path, mode, checksum):
+            result.skipped += 1
         else:
-            copy_files_recursive(from_path, dest_path)
\ No newline at end of file
+            changed.append((from_path, dest_path))
+
+    for dest_parent in sorted({os.path.dirname(dest_path) for _, dest_path in changed}):
+        os.makedirs(dest_parent, exist_ok=True)
+    if len(changed) > 1 and jobs != 1:
+        with ThreadPoolExecutor(max_workers=jobs) as executor:
+            list(executor.map(lambda pair: sync_file(pair[0], pair[1], mode), changed))
+    else:
+        for from_path, dest_path in changed:
+            sync_file(from_path, dest_path, mode)
+    result.copied = changed
+
+    if prune:
+        result.pruned = prune_tree(dest_dir_path, {dest_path for _, dest_path in result.files})
+    return result
+
+
+def is_up_to_date(from_path, dest_path, mode, checksum):
+    try:
+        dest_stat = os.stat(dest_path)
+    except FileNotFoundError:
+        return False
+    from_stat = os.stat(from_path)
+    if mode == "hardlink" and os.path.samestat(from_stat, dest_stat):
+        return True
+    if from_stat.st_size != dest_stat.st_size:
+        return False
+    if checksum:
+        return file_digest(from_path) == file_digest(dest_path)
+    return from_stat.st_mtime_ns == dest_stat.st_mtime_ns
+
+
+def sync_file(from_path, dest_path, mode="copy"):
+    tmp_path = f"{dest_path}.tmp"
+    if os.path.lexists(tmp_path):
+        os.remove(tmp_path)
+    if mode == "hardlink":
+        try:
+            os.link(from_path, tmp_path)
+            os.replace(tmp_path, dest_path)
+            return
+        except OSError:
+            pass
+    if mode == "reflink" and reflink_file(from_path, tmp_path):
+        shutil.copystat(from_path, tmp_path)
+        os.replace(tmp_path, dest_path)
+        return
+    shutil.copy2(from_path, tmp_path)
+    os.replace(tmp_path, dest_path)
+
+
+def reflink_file(from_path, dest_path):
+    try:
+        import fcntl
+    except ImportError:
+        return False
+    with open(from_path, "rb") as from_file, open(dest_path, "wb") as dest_file:
+        try:
+            fcntl.ioctl(dest_file.fileno(), FICLONE, from_file.fileno())
+        except OSError as e:
+            if e.errno in (errno.EOPNOTSUPP, errno.EXDEV, errno.EINVAL, errno.ENOTTY, errno.EBADF):
+                dest_file.close()
+                os.remove(dest_path)
+                return False
+            raise
+    return True
+
+
+def prune_tree(dest_dir_path, keep):
+    pruned = []
+    for root, dirs, filenames in os.walk(dest_dir_path, topdown=False):
+        for filename in filenames:
+            path = os.path.normpath(os.path.join(root, filename))
+            if path not in keep:
+                os.remove(path)
+                pruned.append(path)
+        if root != dest_dir_path and not os.listdir(root):
+            os.rmdir(root)
+    return sorted(pruned)
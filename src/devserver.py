@@ -0,0 +1,313 @@
+import html
+import mimetypes
+import os
+import posixpath
+import threading
+import urllib.parse
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from gencontent import build_page_node, collect_pages, render_page
+from images import IMAGE_EXTENSIONS, scan_images
+from metadata import scan_metadata
+from siteindex import SiteIndex, site_pages
+from template import load_template
+from watch import collect_changes, create_watcher
+
+RELOAD_PATH = "/__reload"
+RELOAD_SCRIPT = f'<script>new EventSource("{RELOAD_PATH}").onmessage = () => location.reload();</script>'
+# idle SSE connections get a comment this often, so dead clients are noticed
+KEEPALIVE_SECONDS = 15
+
+
+class ReloadNotifier:
+    def __init__(self):
+        self.condition = threading.Condition()
+        self.generation = 0
+
+    def notify(self):
+        with self.condition:
+            self.generation += 1
+            self.condition.notify_all()
+
+    def wait(self, generation, timeout):
+        # Returns the current generation once it differs from `generation`,
+        # or unchanged after `timeout` seconds
+        with self.condition:
+            self.condition.wait_for(lambda: self.generation != generation, timeout)
+            return self.generation
+
+
+class DevSite:
+    # Renders pages from content/ the first time they are requested and
+    # keeps them until one of their inputs changes. Nothing is rendered or
+    # scanned up front, so startup does not depend on the size of the site.
+    def __init__(self, config):
+        self.config = config
+        self.content_dir = os.path.normpath(config.content_dir)
+        self.static_dir = os.path.normpath(config.static_dir)
+        self.template_path = os.path.normpath(config.template_path)
+        self.lock = threading.Lock()
+        # source path -> rendered page bytes
+        self.pages = {}
+        # url -> rendered listing bytes, built from the site index
+        self.listings = {}
+        self.site_index = None
+        # front matter and titles only, enough to tell which listing urls
+        # exist without parsing every page
+        self.header_index = None
+        self.images = None
+        # bumped by invalidate(); whatever was rendered while it changed is
+        # not kept, since it may have read the old inputs
+        self.generation = 0
+        self.notifier = ReloadNotifier()
+
+    def template(self):
+        return load_template(self.template_path, "/", self.config.minify)
+
+    def site_images(self):
+        with self.lock:
+            images = self.images
+            generation = self.generation
+        if images is None and self.config.image_dimensions and os.path.isdir(self.static_dir):
+            images = scan_images(self.static_dir)[0]
+            with self.lock:
+                if self.generation == generation:
+                    self.images = images
+        return images
+
+    def resolve(self, url_path):
+        # Returns ("page", source), ("static", path), ("listing", url),
+        # ("redirect", url) or None for a decoded, normalized url path
+        rel_path = url_path.lstrip("/")
+        if not rel_path or rel_path.endswith("/"):
+            source = os.path.join(self.content_dir, rel_path, "index.md")
+        elif rel_path.endswith(".html"):
+            source = os.path.join(self.content_dir, rel_path[: -len(".html")] + ".md")
+        else:
+            source = os.path.join(self.content_dir, rel_path + ".md")
+        if os.path.isfile(source):
+            return "page", os.path.normpath(source)
+        static_path = os.path.join(self.static_dir, rel_path)
+        if os.path.isfile(static_path):
+            return "static", static_path
+        if rel_path and not rel_path.endswith("/"):
+            if os.path.isdir(os.path.join(self.content_dir, rel_path)) or self.is_listing(url_path + "/"):
+                return "redirect", url_path + "/"
+            return None
+        if self.is_listing(url_path):
+            return "listing", url_path
+        return None
+
+    def page(self, source):
+        with self.lock:
+            body = self.pages.get(source)
+            generation = self.generation
+        if body is None:
+            with open(source, "r") as f:
+                markdown_content = f.read()
+            html_text, _ = render_page(markdown_content, self.template(), "/", images=self.site_images())
+            body = inject_reload_script(html_text).encode()
+            with self.lock:
+                if self.generation == generation:
+                    self.pages[source] = body
+        return body
+
+    def index(self):
+        # Built by parsing every page, but only once a listing is rendered;
+        # summaries need the page bodies
+        with self.lock:
+            site_index = self.site_index
+            generation = self.generation
+        if site_index is None:
+            site_index = SiteIndex(None, self.content_dir, "/")
+            for source, dest_path in collect_pages(self.content_dir, self.content_dir):
+                with open(source, "r") as f:
+                    metadata, _ = build_page_node(f.read(), "/")
+                site_index.update(source, dest_path, metadata)
+            with self.lock:
+                if self.generation == generation:
+                    self.site_index = site_index
+        return site_index
+
+    def headers(self):
+        # Lists the same urls as index(): they only depend on page paths,
+        # dates and tags, which all come from the front matter
+        with self.lock:
+            header_index = self.header_index
+            generation = self.generation
+        if header_index is None:
+            header_index = SiteIndex(None, self.content_dir, "/")
+            for source, dest_path in collect_pages(self.content_dir, self.content_dir):
+                header_index.update(source, dest_path, scan_metadata(source))
+            with self.lock:
+                if self.generation == generation:
+                    self.header_index = header_index
+        return header_index
+
+    def listing_pages(self, site_index):
+        content_urls = site_index.by_url()
+        return {
+            url: (title, build_node)
+            for url, title, build_node in site_pages(site_index, self.config.blog_section, self.config.listing_page_size)
+            if url not in content_urls
+        }
+
+    def is_listing(self, url):
+        if not url.startswith((f"/{self.config.blog_section}/", "/tags/")):
+            return False
+        return url in self.listing_pages(self.headers())
+
+    def listing(self, url):
+        with self.lock:
+            body = self.listings.get(url)
+            generation = self.generation
+        if body is None:
+            listing = self.listing_pages(self.index()).get(url)
+            if listing is None:
+                return None
+            title, build_node = listing
+            body = inject_reload_script(self.template().render(Title=title, Content=build_node("/"))).encode()
+            with self.lock:
+                if self.generation == generation:
+                    self.listings[url] = body
+        return body
+
+    def invalidate(self, changed):
+        # Drops everything built from the changed paths and tells open
+        # pages to reload
+        changed = {os.path.normpath(path) for path in changed}
+        content_prefix = self.content_dir + os.sep
+        with self.lock:
+            self.generation += 1
+            if self.template_path in changed:
+                self.pages.clear()
+            for path in changed:
+                self.pages.pop(path, None)
+            if any(path.startswith(content_prefix) for path in changed) or self.template_path in changed:
+                self.listings.clear()
+                self.site_index = None
+                self.header_index = None
+            if any(path.lower().endswith(IMAGE_EXTENSIONS) for path in changed):
+                self.images = None
+                self.pages.clear()
+        self.notifier.notify()
+
+    def __repr__(self):
+        return f"DevSite({self.content_dir}, pages: {len(self.pages)}, listings: {len(self.listings)})"
+
+
+def inject_reload_script(page):
+    position = page.rfind("</body>")
+    if position < 0:
+        return page + RELOAD_SCRIPT
+    return page[:position] + RELOAD_SCRIPT + page[position:]
+
+
+def clean_path(raw_path):
+    # Decoded url path without query, or None when it tries to leave the site
+    path = urllib.parse.unquote(urllib.parse.urlsplit(raw_path).path)
+    normalized = posixpath.normpath(path)
+    if ".." in normalized.split("/"):
+        return None
+    if path.endswith("/") and normalized != "/":
+        normalized += "/"
+    return normalized
+
+
+class DevRequestHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        site = self.server.site
+        path = clean_path(self.path)
+        if path == RELOAD_PATH:
+            self.stream_reloads(site.notifier)
+            return
+        try:
+            target = site.resolve(path) if path is not None else None
+            if target is None:
+                self.respond(HTTPStatus.NOT_FOUND, b"Not found", "text/plain; charset=utf-8")
+                return
+            kind, value = target
+            if kind == "redirect":
+                self.send_response(HTTPStatus.MOVED_PERMANENTLY)
+                self.send_header("Location", value)
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+            elif kind == "static":
+                with open(value, "rb") as f:
+                    body = f.read()
+                content_type = mimetypes.guess_type(value)[0] or "application/octet-stream"
+                self.respond(HTTPStatus.OK, body, content_type)
+            elif kind == "page":
+                self.respond(HTTPStatus.OK, site.page(value), "text/html; charset=utf-8")
+            else:
+                self.respond(HTTPStatus.OK, site.listing(value), "text/html; charset=utf-8")
+        except Exception as e:
+            message = f"<pre>{html.escape(f'{type(e).__name__}: {e}')}</pre>{RELOAD_SCRIPT}"
+            self.respond(HTTPStatus.INTERNAL_SERVER_ERROR, message.encode(), "text/html; charset=utf-8")
+
+    def respond(self, status, body, content_type):
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.send_header("Cache-Control", "no-store")
+        self.end_headers()
+        self.wfile.write(body)
+
+    def stream_reloads(self, notifier):
+        self.send_response(HTTPStatus.OK)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Cache-Control", "no-store")
+        self.end_headers()
+        self.close_connection = True
+        generation = notifier.generation
+        try:
+            self.wfile.write(b"retry: 1000\n\n")
+            self.wfile.flush()
+            while True:
+                current = notifier.wait(generation, KEEPALIVE_SECONDS)
+                if current != generation:
+                    generation = current
+                    self.wfile.write(b"data: reload\n\n")
+                else:
+                    self.wfile.write(b": keepalive\n\n")
+                self.wfile.flush()
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+
+    def log_message(self, format, *args):
+        if not self.path.startswith(RELOAD_PATH):
+            super().log_message(format, *args)
+
+
+def create_server(config, host="127.0.0.1", port=8888):
+    server = ThreadingHTTPServer((host, port), DevRequestHandler)
+    server.daemon_threads = True
+    server.site = DevSite(config)
+    return server
+
+
+def watch_site(site, polling=False, debounce=0.05):
+    config = site.config
+    watcher = create_watcher([config.content_dir, config.static_dir], [config.template_path], polling)
+    try:
+        while True:
+            changed = collect_changes(watcher, debounce)
+            site.invalidate(changed)
+            print(f"Changed: {', '.join(sorted(changed))}")
+    finally:
+        watcher.close()
+
+
+def serve(config, host="127.0.0.1", port=8888, polling=False):
+    server = create_server(config, host, port)
+    threading.Thread(target=watch_site, args=(server.site, polling), daemon=True).start()
+    print(f"Serving {config.content_dir} and {config.static_dir} on http://{host}:{server.server_port}/")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
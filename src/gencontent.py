@@ -1,38 +1,124 @@
 import os
 from pathlib import Path
-from block_markdown import markdown_to_html_node
+from block_markdown import block_lines_to_html_node, markdown_to_html_node
+from largefile import LARGE_FILE_SIZE, MappedContent, open_mapped
+from links import rewrite_links
+from metadata import MetadataCollector, split_front_matter
+from profiling import TimedWriter, profiled, timed, timer_stage
+from template import load_template
 
 def generate_pages_recursive(dir_path_content, template_path, dest_dir_path, basepath):
-    for filename in os.listdir(dir_path_content):
+    for from_path, dest_path in collect_pages(dir_path_content, dest_dir_path):
+        generate_page(from_path, template_path, dest_path, basepath)
+
+
+def collect_pages(dir_path_content, dest_dir_path):
+    pages = []
+    for filename in sorted(os.listdir(dir_path_content)):
         from_path = os.path.join(dir_path_content, filename)
         dest_path = os.path.join(dest_dir_path, filename)
         if os.path.isfile(from_path):
-            dest_path = Path(dest_path).with_suffix(".html")
-            generate_page(from_path, template_path, dest_path, basepath)
+            pages.append((from_path, str(Path(dest_path).with_suffix(".html"))))
         else:
-            generate_pages_recursive(from_path, template_path, dest_path, basepath)
+            pages.extend(collect_pages(from_path, dest_path))
+    return pages
 
-def generate_page(from_path, template_path, dest_path, basepath):
+def generate_page(from_path, template_path, dest_path, basepath, cache=None, precompressor=None,
+                  minify=False, images=None, search=False, timer=None):
     print(f" * {from_path} {template_path} -> {dest_path}")
 
-    with open(from_path, "r") as from_file:
-        markdown_content = from_file.read()
+    template = load_template(template_path, basepath, minify)
+    return write_page(
+        from_path, template, dest_path, basepath, cache, precompressor, images, search, timer
+    )
+
+
+def write_page(from_path, template, dest_path, basepath, cache=None, precompressor=None,
+               images=None, search=False, timer=None):
+    # `timer` is a profiling.StageTimer that the page's stages are added to
+    with profiled(timer):
+        if os.path.getsize(from_path) >= LARGE_FILE_SIZE:
+            with open(from_path, "rb") as from_file, open_mapped(from_file) as mapped:
+                content = MappedContent(
+                    mapped, basepath, cache, template.minify, images, search, timer
+                )
+                with timer_stage(timer, "template render"):
+                    write_output(
+                        dest_path, template, precompressor, timer,
+                        Title=content.title, Content=content,
+                    )
+                return content.metadata()
+
+        with timer_stage(timer, "read"):
+            with open(from_path, "r") as from_file:
+                markdown_content = from_file.read()
+
+        metadata, node = build_page_node(
+            markdown_content, basepath, cache, template.minify, images, search, timer
+        )
+        with timer_stage(timer, "template render"):
+            write_output(
+                dest_path, template, precompressor, timer, Title=metadata.title, Content=node
+            )
+        return metadata
+
+
+def write_output(dest_path, template, precompressor=None, timer=None, **values):
+    with timer_stage(timer, "write"):
+        os.makedirs(os.path.dirname(dest_path), exist_ok=True)
+    if precompressor is not None:
+        with timer_stage(timer, "write"):
+            writer = precompressor.writer(dest_path)
+        try:
+            template.write(writer if timer is None else TimedWriter(writer, timer), **values)
+        except Exception:
+            writer.abort()
+            raise
+        with timer_stage(timer, "write"):
+            writer.commit()
+        return
+
+    tmp_path = f"{dest_path}.tmp"
+    # opened outside the try: if that fails there is no tmp file to remove
+    with timer_stage(timer, "write"):
+        to_file = open(tmp_path, "w")
+    try:
+        with to_file:
+            template.write(to_file if timer is None else TimedWriter(to_file, timer), **values)
+    except Exception:
+        os.remove(tmp_path)
+        raise
+    with timer_stage(timer, "write"):
+        os.replace(tmp_path, dest_path)
 
-    with open(template_path, "r") as template_file:
-        template = template_file.read()
+def build_page_node(markdown_content, basepath, cache=None, minify=False, images=None, search=False,
+                    timer=None):
+    front_matter, body = split_front_matter(markdown_content)
+    collector = MetadataCollector(front_matter, minify, search)
+    if cache is not None:
+        block_converter = cache.converter(basepath, minify, images)
+    else:
+        block_converter = block_lines_to_html_node
+    block_converter = collector.wrap(block_converter)
+    if timer is not None:
+        # inline parsing inside the converter is timed on its own
+        block_converter = timed(block_converter, timer, "tree construction")
+    # the parser times the block split and classification through page_timer
+    with profiled(timer):
+        node = markdown_to_html_node(body, block_converter)
+    with timer_stage(timer, "tree construction"):
+        if images is not None:
+            images.annotate(node, basepath)
+        rewrite_links(node, basepath)
+    return collector.metadata(), node
 
-    node = markdown_to_html_node(markdown_content)
-    html = node.to_html()
 
-    title = extract_title(markdown_content)
-    template = template.replace("{{ Title }}", title)
-    template = template.replace("{{ Content }}", html)
-    template = template.replace('href="/', f'href="{basepath}')
-    template = template.replace('src="/', f'src="{basepath}')
+def render_page(markdown_content, template, basepath, cache=None, images=None, search=False):
+    metadata, node = build_page_node(
+        markdown_content, basepath, cache, template.minify, images, search
+    )
+    return template.render(Title=metadata.title, Content=node), metadata
 
-    os.makedirs(os.path.dirname(dest_path), exist_ok=True)
-    with open(dest_path, "w") as to_file:
-        to_file.write(template)
 
 def extract_title(md):
     for line in md.split("\n"):
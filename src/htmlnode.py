@@ -1,26 +1,59 @@
+import re
+
+# whitespace inside these is kept as is when minifying
+PREFORMATTED_TAGS = frozenset(("pre", "code", "textarea", "script", "style"))
+# A </p> may be left out when the next sibling is one of these, or when the
+# p is the last child of anything but these P_END_REQUIRED_IN tags.
+P_CLOSED_BY = frozenset((
+    "address", "article", "aside", "blockquote", "details", "div", "dl", "fieldset",
+    "figcaption", "figure", "footer", "form", "h1", "h2", "h3", "h4", "h5", "h6",
+    "header", "hgroup", "hr", "main", "menu", "nav", "ol", "p", "pre", "section",
+    "table", "ul",
+))
+P_END_REQUIRED_IN = frozenset(("a", "audio", "del", "ins", "map", "noscript", "video"))
+OPTIONAL_END_TAGS = frozenset(("li", "p"))
+WHITESPACE_PATTERN = re.compile(r"\s+")
+START_TAG_PATTERN = re.compile(r"<([a-z][a-z0-9]*)")
+
+
 class HTMLNode:
+    __slots__ = ("tag", "value", "children", "props")
+
     def __init__(self, tag=None, value=None, children=None, props=None):
         self.tag = tag
         self.value = value
         self.children = children
-        self.props = props
+        # Stored as a tuple of (name, value) pairs; dicts are accepted for convenience
+        self.props = tuple(props.items()) if isinstance(props, dict) else props
 
     def to_html(self):
         raise NotImplementedError("to_html method not implemented")
 
+    def write_html(self, out, minify=False):
+        out.writelines(iter_html(self, minify))
+
     def props_to_html(self):
-        if self.props is None:
+        if not self.props:
             return ""
-        props_html = ""
-        for prop in self.props:
-            props_html += f' {prop}="{self.props[prop]}"'
-        return props_html
+        return "".join([f' {name}="{value}"' for name, value in self.props])
+
+    def get_prop(self, name, default=None):
+        if self.props:
+            for prop_name, value in self.props:
+                if prop_name == name:
+                    return value
+        return default
+
+    def props_dict(self):
+        return dict(self.props) if self.props is not None else None
 
     def __repr__(self):
-        return f"HTMLNode({self.tag}, {self.value}, children: {self.children}, {self.props})"
+        return f"HTMLNode({self.tag}, {self.value}, children: {self.children}, {self.props_dict()})"
 
 
 class LeafNode(HTMLNode):
+    __slots__ = ()
+
     def __init__(self, tag, value, props=None):
         super().__init__(tag, value, None, props)
 
@@ -32,22 +65,111 @@ class LeafNode(HTMLNode):
         return f"<{self.tag}{self.props_to_html()}>{self.value}</{self.tag}>"
 
     def __repr__(self):
-        return f"LeafNode({self.tag}, {self.value}, {self.props})"
+        return f"LeafNode({self.tag}, {self.value}, {self.props_dict()})"
+
+
+class RawNode(LeafNode):
+    # HTML that is already rendered, e.g. a cached fragment; it is written
+    # out untouched, minified or not.
+    __slots__ = ()
+
+    def __init__(self, html):
+        super().__init__(None, html)
+
+    def __repr__(self):
+        return f"RawNode({self.value})"
 
 
 class ParentNode(HTMLNode):
+    __slots__ = ()
+
     def __init__(self, tag, children, props=None):
         super().__init__(tag, None, children, props)
 
     def to_html(self):
-        if self.tag is None:
+        return "".join(iter_html(self))
+
+    def __repr__(self):
+        return f"ParentNode({self.tag}, children: {self.children}, {self.props_dict()})"
+
+
+def iter_html(node, minify=False):
+    # Walks the tree with an explicit stack so deep nesting cannot hit the
+    # recursion limit; closing tags are pushed as plain strings.
+    if minify:
+        yield from iter_minified_html(node)
+        return
+    stack = [node]
+    while stack:
+        current = stack.pop()
+        if current.__class__ is str:
+            yield current
+            continue
+        if not isinstance(current, ParentNode):
+            yield current.to_html()
+            continue
+        if current.tag is None:
             raise ValueError("invalid HTML: no tag")
-        if self.children is None:
+        if current.children is None:
             raise ValueError("invalid HTML: no children")
-        children_html = ""
-        for child in self.children:
-            children_html += child.to_html()
-        return f"<{self.tag}{self.props_to_html()}>{children_html}</{self.tag}>"
+        yield f"<{current.tag}{current.props_to_html()}>"
+        stack.append(f"</{current.tag}>")
+        stack.extend(reversed(current.children))
 
-    def __repr__(self):
-        return f"ParentNode({self.tag}, children: {self.children}, {self.props})"
+
+def iter_minified_html(node, omit_end=False):
+    # Same walk as iter_html, but text outside preformatted elements has its
+    # whitespace collapsed and optional </li> and </p> tags are left out.
+    # Stack entries are (node, omit end tag, inside a preformatted element).
+    stack = [(node, omit_end, False)]
+    while stack:
+        item = stack.pop()
+        if item.__class__ is str:
+            yield item
+            continue
+        current, omit_end, preformatted = item
+        if current.__class__ is RawNode:
+            yield current.value
+            continue
+        tag = current.tag
+        preformatted = preformatted or tag in PREFORMATTED_TAGS
+        if not isinstance(current, ParentNode):
+            if current.value is None:
+                raise ValueError("invalid HTML: no value")
+            value = current.value
+            if not preformatted and ("  " in value or "\n" in value or "\t" in value):
+                value = WHITESPACE_PATTERN.sub(" ", value)
+            if tag is None:
+                yield value
+            elif omit_end:
+                yield f"<{tag}{current.props_to_html()}>{value}"
+            else:
+                yield f"<{tag}{current.props_to_html()}>{value}</{tag}>"
+            continue
+        if tag is None:
+            raise ValueError("invalid HTML: no tag")
+        children = current.children
+        if children is None:
+            raise ValueError("invalid HTML: no children")
+        yield f"<{tag}{current.props_to_html()}>"
+        if not omit_end:
+            stack.append(f"</{tag}>")
+        next_sibling = None
+        for child in reversed(children):
+            omit = child.tag in OPTIONAL_END_TAGS and end_tag_optional(child, next_sibling, tag)
+            stack.append((child, omit, preformatted))
+            next_sibling = child
+
+
+def end_tag_optional(node, next_sibling, parent_tag):
+    tag = node.tag
+    if tag == "li":
+        return next_sibling is None or next_sibling.tag == "li"
+    if tag == "p":
+        if next_sibling is None:
+            return parent_tag not in P_END_REQUIRED_IN
+        if next_sibling.__class__ is RawNode:
+            match = START_TAG_PATTERN.match(next_sibling.value)
+            return match is not None and match.group(1) in P_CLOSED_BY
+        return next_sibling.tag in P_CLOSED_BY
+    return False
@@ -0,0 +1,172 @@
+import struct
+import zlib
+
+try:
+    from PIL import Image
+except ImportError:
+    Image = None
+
+PNG_SIGNATURE = b"\x89PNG\r\n\x1a\n"
+# channels per pixel for 8-bit PNG color types
+PNG_CHANNELS = {0: 1, 2: 3, 3: 1, 4: 2, 6: 4}
+
+
+def resize_image(source_path, dest_path, width):
+    # Writes a copy of the image scaled down to `width` and returns True,
+    # or False when no backend can handle the format. Pillow is used when
+    # it is installed; otherwise 8-bit PNGs are resized in pure Python.
+    if Image is not None:
+        with Image.open(source_path) as image:
+            height = max(1, round(image.height * width / image.width))
+            resized = image.resize((width, height), Image.LANCZOS)
+            resized.save(dest_path, format=image.format, optimize=True)
+        return True
+    with open(source_path, "rb") as f:
+        data = f.read()
+    if not data.startswith(PNG_SIGNATURE):
+        return False
+    decoded = decode_png(data)
+    if decoded is None:
+        return False
+    with open(dest_path, "wb") as f:
+        f.write(encode_png(*downscale(*decoded, width)))
+    return True
+
+
+def decode_png(data):
+    # Returns (width, height, channels, rows) for non-interlaced 8-bit PNGs,
+    # with palette images expanded to RGB or RGBA; None for anything else.
+    position = len(PNG_SIGNATURE)
+    header = None
+    palette = None
+    transparency = None
+    idat = []
+    while position + 8 <= len(data):
+        length, kind = struct.unpack(">I4s", data[position : position + 8])
+        chunk = data[position + 8 : position + 8 + length]
+        position += 12 + length
+        if kind == b"IHDR":
+            header = struct.unpack(">IIBBBBB", chunk)
+        elif kind == b"PLTE":
+            palette = chunk
+        elif kind == b"tRNS":
+            transparency = chunk
+        elif kind == b"IDAT":
+            idat.append(chunk)
+        elif kind == b"IEND":
+            break
+    if header is None:
+        return None
+    width, height, bit_depth, color_type, _, _, interlace = header
+    if bit_depth != 8 or interlace or color_type not in PNG_CHANNELS:
+        return None
+    channels = PNG_CHANNELS[color_type]
+    rows = unfilter(zlib.decompress(b"".join(idat)), width, height, channels)
+    if color_type == 3:
+        if palette is None:
+            return None
+        rows, channels = expand_palette(rows, palette, transparency)
+    return width, height, channels, rows
+
+
+def unfilter(raw, width, height, bpp):
+    stride = width * bpp
+    rows = []
+    previous = bytearray(stride)
+    position = 0
+    for _ in range(height):
+        filter_type = raw[position]
+        row = bytearray(raw[position + 1 : position + 1 + stride])
+        position += 1 + stride
+        if filter_type == 1:
+            for i in range(bpp, stride):
+                row[i] = (row[i] + row[i - bpp]) & 0xFF
+        elif filter_type == 2:
+            for i in range(stride):
+                row[i] = (row[i] + previous[i]) & 0xFF
+        elif filter_type == 3:
+            for i in range(stride):
+                left = row[i - bpp] if i >= bpp else 0
+                row[i] = (row[i] + ((left + previous[i]) >> 1)) & 0xFF
+        elif filter_type == 4:
+            for i in range(stride):
+                if i >= bpp:
+                    a = row[i - bpp]
+                    c = previous[i - bpp]
+                else:
+                    a = c = 0
+                b = previous[i]
+                p = a + b - c
+                pa = abs(p - a)
+                pb = abs(p - b)
+                pc = abs(p - c)
+                if pa <= pb and pa <= pc:
+                    predictor = a
+                elif pb <= pc:
+                    predictor = b
+                else:
+                    predictor = c
+                row[i] = (row[i] + predictor) & 0xFF
+        elif filter_type != 0:
+            raise ValueError(f"invalid PNG filter type: {filter_type}")
+        rows.append(row)
+        previous = row
+    return rows
+
+
+def expand_palette(rows, palette, transparency):
+    colors = [palette[i : i + 3] for i in range(0, len(palette), 3)]
+    if transparency:
+        alpha = list(transparency) + [255] * (len(colors) - len(transparency))
+        table = [bytes(color) + bytes((alpha[i],)) for i, color in enumerate(colors)]
+        channels = 4
+    else:
+        table = [bytes(color) for color in colors]
+        channels = 3
+    return [bytearray(b"".join(table[index] for index in row)) for row in rows], channels
+
+
+def downscale(width, height, channels, rows, new_width):
+    # Box filter: every output pixel is the average of the source pixels it
+    # covers, first across each row, then down each column.
+    new_height = max(1, round(height * new_width / width))
+    columns = _spans(width, new_width)
+    narrow = []
+    for row in rows:
+        out = bytearray(new_width * channels)
+        for x, (start, end) in enumerate(columns):
+            count = end - start
+            for channel in range(channels):
+                total = sum(row[start * channels + channel : end * channels : channels])
+                out[x * channels + channel] = total // count
+        narrow.append(out)
+    resized = []
+    for start, end in _spans(height, new_height):
+        count = end - start
+        sums = [0] * (new_width * channels)
+        for row in narrow[start:end]:
+            sums = [total + value for total, value in zip(sums, row)]
+        resized.append(bytearray(total // count for total in sums))
+    return new_width, new_height, channels, resized
+
+
+def _spans(size, new_size):
+    return [
+        (x * size // new_size, max((x + 1) * size // new_size, x * size // new_size + 1))
+        for x in range(new_size)
+    ]
+
+
+def encode_png(width, height, channels, rows):
+    color_type = {1: 0, 2: 4, 3: 2, 4: 6}[channels]
+    raw = b"".join(b"\x00" + bytes(row) for row in rows)
+
+    def chunk(kind, body):
+        return struct.pack(">I", len(body)) + kind + body + struct.pack(">I", zlib.crc32(kind + body))
+
+    return (
+        PNG_SIGNATURE
+        + chunk(b"IHDR", struct.pack(">IIBBBBB", width, height, 8, color_type, 0, 0, 0))
+        + chunk(b"IDAT", zlib.compress(raw, 9))
+        + chunk(b"IEND", b"")
+    )
@@ -0,0 +1,207 @@
+import hashlib
+import os
+import shutil
+import struct
+
+from copystatic import list_files
+from htmlnode import ParentNode
+from imageresize import resize_image
+from manifest import file_digest
+
+IMAGE_EXTENSIONS = (".png", ".jpg", ".jpeg", ".gif", ".webp")
+
+
+def image_size(path):
+    # Reads only as much of the file as its header needs
+    with open(path, "rb") as f:
+        head = f.read(32)
+        if head.startswith(b"\x89PNG\r\n\x1a\n") and head[12:16] == b"IHDR":
+            return struct.unpack(">II", head[16:24])
+        if head[:6] in (b"GIF87a", b"GIF89a"):
+            return struct.unpack("<HH", head[6:10])
+        if head[:4] == b"RIFF" and head[8:12] == b"WEBP":
+            return _webp_size(head)
+        if head[:2] == b"\xff\xd8":
+            f.seek(2)
+            return _jpeg_size(f)
+    return None
+
+
+def _webp_size(head):
+    kind = head[12:16]
+    if kind == b"VP8 " and head[23:26] == b"\x9d\x01\x2a":
+        width, height = struct.unpack("<HH", head[26:30])
+        return width & 0x3FFF, height & 0x3FFF
+    if kind == b"VP8L" and head[20] == 0x2F:
+        bits = int.from_bytes(head[21:25], "little")
+        return (bits & 0x3FFF) + 1, ((bits >> 14) & 0x3FFF) + 1
+    if kind == b"VP8X":
+        return int.from_bytes(head[24:27], "little") + 1, int.from_bytes(head[27:30], "little") + 1
+    return None
+
+
+def _jpeg_size(f):
+    # Skips from marker to marker until a start-of-frame segment
+    while True:
+        marker = f.read(2)
+        if len(marker) < 2 or marker[0] != 0xFF:
+            return None
+        kind = marker[1]
+        if kind == 0xFF:
+            f.seek(-1, os.SEEK_CUR)
+            continue
+        if kind in (0xD8, 0x01) or 0xD0 <= kind <= 0xD7:
+            continue
+        length_bytes = f.read(2)
+        if len(length_bytes) < 2:
+            return None
+        length = struct.unpack(">H", length_bytes)[0]
+        if 0xC0 <= kind <= 0xCF and kind not in (0xC4, 0xC8, 0xCC):
+            frame = f.read(5)
+            if len(frame) < 5:
+                return None
+            height, width = struct.unpack(">HH", frame[1:5])
+            return width, height
+        f.seek(length - 2, os.SEEK_CUR)
+
+
+class ImageInfo:
+    __slots__ = ("width", "height", "variants")
+
+    def __init__(self, width, height, variants=()):
+        self.width = width
+        self.height = height
+        # (url, width) of every resized copy, smallest first
+        self.variants = tuple(variants)
+
+    def __eq__(self, other):
+        return (self.width, self.height, self.variants) == (other.width, other.height, other.variants)
+
+    def __repr__(self):
+        return f"ImageInfo({self.width}x{self.height}, variants: {self.variants})"
+
+
+class SiteImages:
+    def __init__(self, images=None):
+        # site url ("/images/tom.png") -> ImageInfo
+        self.images = images if images is not None else {}
+        digest = hashlib.sha1()
+        for url, info in sorted(self.images.items()):
+            digest.update(f"{url}\0{info.width}\0{info.height}\0{info.variants}\0".encode())
+        # changes whenever any page's image markup would
+        self.version = digest.hexdigest()
+
+    def annotate(self, node, basepath):
+        # Sets width, height and srcset on <img> nodes whose src is a
+        # known image. Runs before rewrite_links, so srcset is given the
+        # basepath here.
+        if not self.images:
+            return node
+        stack = [node]
+        while stack:
+            current = stack.pop()
+            if isinstance(current, ParentNode):
+                stack.extend(current.children)
+                continue
+            if current.tag != "img":
+                continue
+            info = self.images.get(current.get_prop("src"))
+            if info is None:
+                continue
+            props = [(name, value) for name, value in current.props if name not in ("width", "height")]
+            props.append(("width", str(info.width)))
+            props.append(("height", str(info.height)))
+            if info.variants:
+                candidates = [f"{basepath}{url[1:]} {width}w" for url, width in info.variants]
+                candidates.append(f"{basepath}{current.get_prop('src')[1:]} {info.width}w")
+                props.append(("srcset", ", ".join(candidates)))
+            current.props = tuple(props)
+        return node
+
+    def __repr__(self):
+        return f"SiteImages({len(self.images)} images, version: {self.version[:12]})"
+
+
+class ImageStore:
+    # Resized images keyed by the digest of their source, so a source that
+    # has not changed is never resized again, whatever its path or mtime.
+    def __init__(self, store_dir):
+        self.store_dir = store_dir
+
+    def path(self, digest, width, extension):
+        return os.path.join(self.store_dir, digest[:2], f"{digest[2:]}-{width}w{extension}")
+
+    def variant(self, source_path, digest, width):
+        extension = os.path.splitext(source_path)[1].lower()
+        path = self.path(digest, width, extension)
+        if os.path.exists(path):
+            return path
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.tmp{extension}"
+        try:
+            if not resize_image(source_path, tmp_path, width):
+                return None
+        except Exception:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+        os.replace(tmp_path, path)
+        return path
+
+
+def parse_widths(spec):
+    try:
+        widths = tuple(sorted({int(part) for part in spec.split(",")}))
+    except ValueError:
+        raise ValueError(f"invalid image widths: {spec}, expected e.g. 480,960")
+    if not widths or widths[0] < 1:
+        raise ValueError(f"invalid image widths: {spec}, expected positive widths")
+    return widths
+
+
+def variant_url(url, width):
+    root, extension = os.path.splitext(url)
+    return f"{root}-{width}w{extension}"
+
+
+def scan_images(static_dir, manifest=None, store=None, widths=()):
+    # Returns SiteImages for every image under static_dir, plus the
+    # (stored file, url, source) of each resized variant for copy_variants.
+    images = {}
+    variants = []
+    for from_path, _ in list_files(static_dir, "."):
+        if not from_path.lower().endswith(IMAGE_EXTENSIONS):
+            continue
+        size = image_size(from_path)
+        if size is None:
+            continue
+        url = "/" + os.path.relpath(from_path, static_dir).replace(os.sep, "/")
+        image_variants = []
+        if store is not None and widths:
+            digest = manifest.fingerprint(from_path) if manifest is not None else file_digest(from_path)
+            for width in sorted(widths):
+                if width >= size[0]:
+                    continue
+                stored = store.variant(from_path, digest, width)
+                if stored is None:
+                    break
+                image_variants.append((variant_url(url, width), width))
+                variants.append((stored, variant_url(url, width), from_path))
+        images[url] = ImageInfo(size[0], size[1], image_variants)
+    return SiteImages(images), variants
+
+
+def copy_variants(variants, dest_dir, manifest=None):
+    copied = 0
+    for stored, url, from_path in variants:
+        dest_path = os.path.join(dest_dir, *url.lstrip("/").split("/"))
+        if manifest is not None and manifest.is_fresh(dest_path, [from_path]):
+            manifest.record(dest_path, [from_path])
+            continue
+        os.makedirs(os.path.dirname(dest_path), exist_ok=True)
+        shutil.copyfile(stored, dest_path)
+        if manifest is not None:
+            manifest.record(dest_path, [from_path])
+        copied += 1
+    return copied
+
@@ -3,16 +3,68 @@ import re
 from textnode import TextNode, TextType
 
 
+IMAGE_PATTERN = re.compile(r"!\[([^\[\]]*)\]\(([^\(\)]*)\)")
+LINK_PATTERN = re.compile(r"\[([^\[\]]*)\]\(([^\(\)]*)\)")
+INLINE_TOKEN_PATTERN = re.compile(r"\*\*|[_`\[!]")
+
+DELIMITERS = {
+    "**": TextType.BOLD,
+    "_": TextType.ITALIC,
+    "`": TextType.CODE,
+}
+
+
 def text_to_textnodes(text):
-    nodes = [TextNode(text, TextType.TEXT)]
-    nodes = split_nodes_delimiter(nodes, "**", TextType.BOLD)
-    nodes = split_nodes_delimiter(nodes, "_", TextType.ITALIC)
-    nodes = split_nodes_delimiter(nodes, "`", TextType.CODE)
-    nodes = split_nodes_image(nodes)
-    nodes = split_nodes_link(nodes)
+    nodes = []
+    plain_start = 0
+    scan = 0
+    while True:
+        token = INLINE_TOKEN_PATTERN.search(text, scan)
+        if token is None:
+            break
+        start = token.start()
+        delimiter = token.group()
+        if delimiter == "!" or delimiter == "[":
+            pattern = IMAGE_PATTERN if delimiter == "!" else LINK_PATTERN
+            match = pattern.match(text, start)
+            if match is None:
+                scan = start + 1
+                continue
+            if plain_start < start:
+                nodes.append(TextNode(text[plain_start:start], TextType.TEXT))
+            if delimiter == "!":
+                nodes.append(TextNode(match.group(1), TextType.IMAGE, match.group(2)))
+            else:
+                nodes.append(link_to_textnode(match.group(1), match.group(2)))
+            plain_start = scan = match.end()
+            continue
+        content_start = start + len(delimiter)
+        end = text.find(delimiter, content_start)
+        if end == -1:
+            raise ValueError("invalid markdown, formatted section not closed")
+        if plain_start < start:
+            nodes.append(TextNode(text[plain_start:start], TextType.TEXT))
+        if content_start < end:
+            nodes.append(TextNode(text[content_start:end], DELIMITERS[delimiter]))
+        plain_start = scan = end + len(delimiter)
+    if plain_start < len(text):
+        nodes.append(TextNode(text[plain_start:], TextType.TEXT))
     return nodes
 
 
+def link_to_textnode(text, url):
+    if INLINE_TOKEN_PATTERN.search(text) is None:
+        return TextNode(text, TextType.LINK, url)
+    try:
+        children = text_to_textnodes(text)
+    except ValueError:
+        return TextNode(text, TextType.LINK, url)
+    if len(children) == 1 and children[0].text_type == TextType.TEXT:
+        return TextNode(children[0].text, TextType.LINK, url)
+    plain_text = "".join(child.text for child in children)
+    return TextNode(plain_text, TextType.LINK, url, children)
+
+
 def split_nodes_delimiter(old_nodes, delimiter, text_type):
     new_nodes = []
     for old_node in old_nodes:
@@ -89,9 +141,7 @@ def split_nodes_link(old_nodes):
 
 
 def extract_markdown_images(text):
-    pattern = r"!\[([^\[\]]*)\]\(([^\(\)]*)\)"
-    matches = re.findall(pattern, text)
-    return matches
+    return IMAGE_PATTERN.findall(text)
 
 
 def extract_markdown_links(text):
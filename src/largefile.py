@@ -0,0 +1,119 @@
+import mmap
+
+from block_markdown import BlockType, block_lines_to_html_node, iter_blocks
+from htmlnode import OPTIONAL_END_TAGS, end_tag_optional, iter_html, iter_minified_html
+from links import rewrite_links
+from metadata import MetadataCollector, page_metadata, read_header
+from profiling import timed
+
+# Sources at least this big are mapped and rendered a block at a time
+# instead of being read into one string and parsed into one tree.
+LARGE_FILE_SIZE = 4 << 20
+# pages already scanned are dropped from the mapping in steps of this size
+RELEASE_STEP = 1 << 20
+
+
+class MappedLines:
+    # Line iterator over a mapped file that decodes one line at a time.
+    # Pages behind the current position are handed back to the kernel, so
+    # the mapping does not keep the whole file resident.
+    def __init__(self, mapped, position=0):
+        self.mapped = mapped
+        self.position = position
+        self.released = position - position % mmap.PAGESIZE
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        mapped = self.mapped
+        position = self.position
+        if position >= len(mapped):
+            raise StopIteration
+        end = mapped.find(b"\n", position)
+        end = len(mapped) if end < 0 else end + 1
+        self.position = end
+        if end - self.released >= RELEASE_STEP:
+            self.release()
+        return mapped[position:end].decode()
+
+    def release(self):
+        end = self.position - self.position % mmap.PAGESIZE
+        if end > self.released and hasattr(mmap, "MADV_DONTNEED"):
+            self.mapped.madvise(mmap.MADV_DONTNEED, self.released, end - self.released)
+        self.released = end
+
+
+class MappedContent:
+    # Page content for Template.write, rendered straight from the mapped
+    # source: each block is parsed, serialized and dropped before the next
+    # one is decoded, so memory scales with the largest block. The title
+    # comes from a first pass that only splits blocks. With `search` the
+    # page's text is kept for the search index, which does grow with the page.
+    def __init__(self, mapped, basepath, cache=None, minify=False, images=None, search=False,
+                 timer=None):
+        self.mapped = mapped
+        self.basepath = basepath
+        self.images = images
+        lines = MappedLines(mapped)
+        first_line = next(lines, "")
+        front_matter = read_header(first_line, lines)
+        if front_matter is None:
+            front_matter = {}
+            lines.position = 0
+        self.body_start = lines.position
+        self.collector = MetadataCollector(front_matter, minify, search)
+        if cache is not None:
+            self.convert = self.collector.wrap(cache.converter(basepath, minify, images))
+        else:
+            self.convert = self.collector.wrap(block_lines_to_html_node)
+        self.build_node = self._build_node
+        if timer is not None:
+            self.build_node = timed(self._build_node, timer, "tree construction")
+        self.title = page_metadata(front_matter, front_matter.get("title") or self._scan_title()).title
+
+    def _scan_title(self):
+        for block in iter_blocks(MappedLines(self.mapped, self.body_start)):
+            if block.block_type == BlockType.HEADING and block.lines[0].startswith("# "):
+                return block.lines[0][2:]
+        return None
+
+    def iter_nodes(self):
+        for block in iter_blocks(MappedLines(self.mapped, self.body_start)):
+            yield self.build_node(block.block_type, block.lines)
+
+    def _build_node(self, block_type, lines):
+        node = self.convert(block_type, lines)
+        if self.images is not None:
+            self.images.annotate(node, self.basepath)
+        return rewrite_links(node, self.basepath)
+
+    def write_html(self, out, minify=False):
+        # Same markup as the <div> markdown_to_html_node builds; minified
+        # output looks one block ahead to decide on optional end tags.
+        out.write("<div>")
+        if not minify:
+            for node in self.iter_nodes():
+                out.writelines(iter_html(node))
+        else:
+            nodes = self.iter_nodes()
+            current = next(nodes, None)
+            while current is not None:
+                following = next(nodes, None)
+                omit = current.tag in OPTIONAL_END_TAGS and end_tag_optional(current, following, "div")
+                out.writelines(iter_minified_html(current, omit))
+                current = following
+        out.write("</div>")
+
+    def metadata(self):
+        return self.collector.metadata()
+
+    def __repr__(self):
+        return f"MappedContent({len(self.mapped)} bytes, title: {self.title!r})"
+
+
+def open_mapped(from_file):
+    mapped = mmap.mmap(from_file.fileno(), 0, access=mmap.ACCESS_READ)
+    if hasattr(mmap, "MADV_SEQUENTIAL"):
+        mapped.madvise(mmap.MADV_SEQUENTIAL)
+    return mapped
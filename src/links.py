@@ -0,0 +1,107 @@
+import os
+import posixpath
+import urllib.parse
+
+URL_PROPS = ("href", "src")
+
+
+def rewrite_links(node, basepath):
+    if basepath == "/":
+        return node
+    stack = [node]
+    while stack:
+        current = stack.pop()
+        if current.props:
+            current.props = tuple(
+                (name, basepath + value[1:])
+                if name in URL_PROPS and value.startswith("/")
+                else (name, value)
+                for name, value in current.props
+            )
+        if current.children:
+            stack.extend(current.children)
+    return node
+
+
+class LinkIndex:
+    # Every url the built site answers to, kept as a set so checking a link
+    # is a single lookup. Urls are site-relative ("/blog/post.html"), the
+    # same form links have in markdown before the basepath is applied.
+    def __init__(self, urls=()):
+        self.urls = set(urls)
+
+    @classmethod
+    def from_outputs(cls, outputs, dest_dir):
+        index = cls()
+        for path in outputs:
+            index.add(os.path.relpath(path, dest_dir).replace(os.sep, "/"))
+        return index
+
+    def add(self, rel_path):
+        url = "/" + rel_path
+        self.urls.add(url)
+        # GitHub Pages serves page.html for /page and dir/index.html for /dir/
+        if url.endswith(".html"):
+            self.urls.add(url[: -len(".html")])
+        if url == "/index.html" or url.endswith("/index.html"):
+            directory = url[: -len("index.html")]
+            self.urls.add(directory)
+            self.urls.add(directory.rstrip("/"))
+
+    def resolve(self, link, page_url):
+        # Site-relative url the link points at, or None for links that
+        # leave the site (other schemes, other hosts) or stay on the page
+        parts = urllib.parse.urlsplit(link)
+        if parts.scheme or parts.netloc or not parts.path:
+            return None
+        path = urllib.parse.unquote(parts.path)
+        if not path.startswith("/"):
+            base = page_url if page_url.endswith("/") else posixpath.dirname(page_url) + "/"
+            path = base + path
+        resolved = posixpath.normpath(path)
+        if path.endswith("/") and resolved != "/":
+            resolved += "/"
+        return resolved
+
+    def __contains__(self, url):
+        return url in self.urls
+
+    def __len__(self):
+        return len(self.urls)
+
+    def __repr__(self):
+        return f"LinkIndex({len(self.urls)} urls)"
+
+
+class LinkReport:
+    def __init__(self, checked=0, broken=None):
+        self.checked = checked
+        # page url -> sorted broken links on that page
+        self.broken = broken if broken is not None else {}
+
+    def broken_count(self):
+        return sum(len(links) for links in self.broken.values())
+
+    def summary(self):
+        lines = [f"Checked {self.checked} internal links, {self.broken_count()} broken"]
+        for page_url, links in sorted(self.broken.items()):
+            lines.append(f" * {page_url}")
+            lines.extend(f"     {link}" for link in links)
+        return "\n".join(lines)
+
+
+def check_links(pages, index):
+    # pages: PageMetadata with their url and the links parsed from them
+    report = LinkReport()
+    for page in pages:
+        broken = set()
+        for link in page.links:
+            url = index.resolve(link, page.url)
+            if url is None:
+                continue
+            report.checked += 1
+            if url not in index:
+                broken.add(link)
+        if broken:
+            report.broken[page.url] = sorted(broken)
+    return report
@@ -1,31 +1,262 @@
-import sys
+import argparse
 import os
-from gencontent import generate_pages_recursive
+import sys
+
+from build import BuildConfig, build_site, create_render_cache, merge_site
+from copystatic import SYNC_MODES
+from devserver import serve
+from images import parse_widths
+from precompress import DEFAULT_MIN_SIZE, ENCODINGS
+from scheduler import default_jobs
+from shards import SHARD_SEARCH_INDEX, default_shard_dir, find_shard_dirs, parse_shard
+from watch import watch
+
 
 def main():
-    basepath = sys.argv[1] if len(sys.argv) > 1 else "/"
-    if not basepath.endswith("/"):
-        basepath += "/"
+    if len(sys.argv) > 1 and sys.argv[1] == "merge":
+        merge_main(sys.argv[2:])
+    elif len(sys.argv) > 1 and sys.argv[1] == "serve":
+        serve_main(sys.argv[2:])
+    else:
+        build_main(sys.argv[1:])
+
+
+def merge_main(argv):
+    parser = argparse.ArgumentParser(
+        prog="main.py merge", description="Merge shard builds into docs/"
+    )
+    parser.add_argument(
+        "shard_dirs",
+        nargs="*",
+        help="shard output directories (default: the latest build's shards in .cache/shards)",
+    )
+    parser.add_argument(
+        "--site-url",
+        default="",
+        metavar="URL",
+        help="origin for absolute urls, e.g. https://example.org; sitemap.xml and the feed need it",
+    )
+    add_precompress_arguments(parser)
+    add_link_check_argument(parser)
+    args = parser.parse_args(argv)
+    shard_dirs = args.shard_dirs or find_shard_dirs()
+    merge_site(
+        BuildConfig(
+            site_url=args.site_url,
+            precompress=args.precompress,
+            precompress_min_size=args.precompress_min_size,
+            check_links=args.check_links,
+        ),
+        shard_dirs,
+    )
+
 
-    content_dir = "./content"
-    template_path = "./template.html"
-    dest_dir = "./docs"
+def serve_main(argv):
+    parser = argparse.ArgumentParser(
+        prog="main.py serve",
+        description="Serve content/ and static/ with pages rendered on request and live reload",
+    )
+    parser.add_argument("--port", type=int, default=8888)
+    parser.add_argument("--bind", default="127.0.0.1", metavar="ADDRESS")
+    parser.add_argument(
+        "--poll",
+        action="store_true",
+        help="watch by polling file mtimes instead of using inotify",
+    )
+    parser.add_argument(
+        "--minify",
+        action="store_true",
+        help="strip insignificant whitespace and optional closing tags from html output",
+    )
+    args = parser.parse_args(argv)
+    serve(BuildConfig(minify=args.minify), args.bind, args.port, args.poll)
 
-    if os.path.exists(dest_dir):
-        print("Deleting docs directory...")
-        os.system(f"rm -rf {dest_dir}")
 
-    # ✅ Crear el directorio docs antes de copiar
-    os.makedirs(dest_dir, exist_ok=True)
+def add_precompress_arguments(parser):
+    parser.add_argument(
+        "--precompress",
+        action="store_true",
+        help=f"write {', '.join(ENCODINGS)} compressed copies of html, css and text outputs",
+    )
+    parser.add_argument(
+        "--precompress-min-size",
+        type=int,
+        default=DEFAULT_MIN_SIZE,
+        metavar="BYTES",
+        help=f"skip outputs smaller than this (default: {DEFAULT_MIN_SIZE})",
+    )
 
-    print("Copying static files to docs directory...")
-    os.system(f"cp -r static/* {dest_dir}/")
 
-    print("Generating content...")
-    generate_pages_recursive(content_dir, template_path, dest_dir, basepath)
+def add_image_arguments(parser):
+    parser.add_argument(
+        "--image-widths",
+        type=parse_widths,
+        default=(),
+        metavar="W1,W2",
+        help="write resized copies of static images at these widths and list them in srcset",
+    )
+    parser.add_argument(
+        "--no-image-dimensions",
+        dest="image_dimensions",
+        action="store_false",
+        help="don't add width and height to <img> tags",
+    )
+
+
+def add_link_check_argument(parser):
+    parser.add_argument(
+        "--check-links",
+        action="store_true",
+        help="report links and images that point at no page or static asset, and fail if any do",
+    )
+
+
+def build_main(argv):
+    parser = argparse.ArgumentParser(description="Build the static site into docs/")
+    parser.add_argument("basepath", nargs="?", default="/")
+    parser.add_argument(
+        "--incremental",
+        action="store_true",
+        help="only rebuild outputs whose inputs changed since the last build",
+    )
+    parser.add_argument(
+        "-j",
+        "--jobs",
+        type=int,
+        nargs="?",
+        const=default_jobs(),
+        default=1,
+        help="render pages on a pool of N processes (default: one per CPU)",
+    )
+    parser.add_argument(
+        "--static-mode",
+        choices=SYNC_MODES,
+        default="copy",
+        help="how static assets are placed into docs/",
+    )
+    parser.add_argument(
+        "--checksum",
+        action="store_true",
+        help="compare static assets by content hash instead of size and mtime",
+    )
+    parser.add_argument(
+        "--watch",
+        action="store_true",
+        help="after building, rebuild affected outputs whenever sources change",
+    )
+    parser.add_argument(
+        "--poll",
+        action="store_true",
+        help="watch by polling file mtimes instead of using inotify",
+    )
+    parser.add_argument(
+        "--profile",
+        nargs="?",
+        const="./.cache/profile.json",
+        metavar="REPORT",
+        help="time every build stage per page and write a JSON report",
+    )
+    parser.add_argument(
+        "--cprofile",
+        metavar="STATS",
+        help="with --profile, also dump cProfile stats for the whole build",
+    )
+    parser.add_argument(
+        "--render-cache",
+        action="store_true",
+        help="reuse rendered HTML for identical markdown blocks",
+    )
+    parser.add_argument(
+        "--render-cache-memory",
+        type=int,
+        default=64,
+        metavar="MB",
+        help="size of the in-memory render cache (default: 64)",
+    )
+    parser.add_argument(
+        "--render-cache-disk",
+        type=int,
+        default=256,
+        metavar="MB",
+        help="size of the on-disk render cache in .cache/fragments, 0 disables it (default: 256)",
+    )
+    parser.add_argument(
+        "--pipeline",
+        action="store_true",
+        help="overlap reading, rendering (on --jobs processes) and writing of pages",
+    )
+    parser.add_argument(
+        "--io-threads",
+        type=int,
+        default=4,
+        metavar="N",
+        help="reader and writer threads used by --pipeline (default: 4)",
+    )
+    parser.add_argument(
+        "--shard",
+        type=parse_shard,
+        metavar="i/N",
+        help="only build the i-th of N page shards into .cache/shards/ (see main.py merge)",
+    )
+    parser.add_argument(
+        "--site-url",
+        default="",
+        metavar="URL",
+        help="origin for absolute urls, e.g. https://example.org; sitemap.xml and the feed need it",
+    )
+    add_precompress_arguments(parser)
+    parser.add_argument(
+        "--minify",
+        action="store_true",
+        help="strip insignificant whitespace and optional closing tags from html output",
+    )
+    add_image_arguments(parser)
+    add_link_check_argument(parser)
+    parser.add_argument(
+        "--search",
+        action="store_true",
+        help="write a full-text search index and search.js into docs/search/",
+    )
+    args = parser.parse_args(argv)
+
+    basepath = args.basepath
+    if not basepath.endswith("/"):
+        basepath += "/"
+
+    config = BuildConfig(
+        basepath=basepath,
+        incremental=args.incremental or args.watch,
+        jobs=args.jobs,
+        static_mode=args.static_mode,
+        checksum=args.checksum,
+        profile_path=args.profile,
+        cprofile_path=args.cprofile,
+        render_cache=args.render_cache,
+        render_cache_bytes=args.render_cache_memory << 20,
+        render_cache_disk_bytes=args.render_cache_disk << 20,
+        pipeline=args.pipeline,
+        io_threads=args.io_threads,
+        site_url=args.site_url,
+        precompress=args.precompress,
+        precompress_min_size=args.precompress_min_size,
+        minify=args.minify,
+        image_dimensions=args.image_dimensions,
+        image_widths=args.image_widths,
+        check_links=args.check_links,
+        search=args.search,
+    )
+    if args.shard is not None:
+        index, count = args.shard
+        config.shard = args.shard
+        config.dest_dir = default_shard_dir(index, count)
+        config.manifest_path = os.path.join(".", ".cache", f"manifest-{index}-of-{count}.json")
+        config.site_index_path = os.path.join(".", ".cache", f"site-index-{index}-of-{count}.json")
+        config.search_index_path = os.path.join(config.dest_dir, SHARD_SEARCH_INDEX)
+    cache = create_render_cache(config)
+    build_site(config, cache)
+    if args.watch:
+        watch(config, polling=args.poll, cache=cache)
 
-    # ✅ Desactiva Jekyll para evitar errores de GitHub Pages
-    open(os.path.join(dest_dir, ".nojekyll"), "w").close()
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,101 @@
+import hashlib
+import json
+import os
+
+MANIFEST_VERSION = 1
+
+
+def file_digest(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 16), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class Manifest:
+    def __init__(self, path, basepath=None, sources=None, outputs=None, options=None):
+        self.path = path
+        self.basepath = basepath
+        # build settings that change every page's output, like minify
+        self.options = options if options is not None else {}
+        # source path -> {"mtime_ns", "size", "hash"} as seen by the last build
+        self.sources = sources if sources is not None else {}
+        # output path -> {input path: hash} the output was built from
+        self.outputs = outputs if outputs is not None else {}
+        self._seen_sources = {}
+        self._seen_outputs = {}
+
+    @classmethod
+    def load(cls, path):
+        try:
+            with open(path, "r") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return cls(path)
+        if data.get("version") != MANIFEST_VERSION:
+            return cls(path)
+        return cls(
+            path, data.get("basepath"), data.get("sources"), data.get("outputs"), data.get("options")
+        )
+
+    def save(self):
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        data = {
+            "version": MANIFEST_VERSION,
+            "basepath": self.basepath,
+            "options": self.options,
+            "sources": self._seen_sources,
+            "outputs": self._seen_outputs,
+        }
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(data, f, indent=1, sort_keys=True)
+        os.replace(tmp_path, self.path)
+
+    def fingerprint(self, path):
+        path = os.path.normpath(path)
+        if path in self._seen_sources:
+            return self._seen_sources[path]["hash"]
+        stat = os.stat(path)
+        entry = self.sources.get(path)
+        if entry is None or entry["mtime_ns"] != stat.st_mtime_ns or entry["size"] != stat.st_size:
+            entry = {"mtime_ns": stat.st_mtime_ns, "size": stat.st_size, "hash": file_digest(path)}
+        self._seen_sources[path] = entry
+        return entry["hash"]
+
+    def is_fresh(self, output, inputs):
+        output = os.path.normpath(output)
+        recorded = self.outputs.get(output)
+        if recorded is None or not os.path.exists(output):
+            return False
+        return recorded == self._input_hashes(inputs)
+
+    def record(self, output, inputs):
+        self._seen_outputs[os.path.normpath(output)] = self._input_hashes(inputs)
+
+    def record_derived(self, output, source):
+        # Outputs made from another output of the same build, like its
+        # compressed variants, are keyed on the source's mtime and size so
+        # checking them never reads the source back.
+        self._seen_outputs[os.path.normpath(output)] = self._stat_key(source)
+
+    def is_fresh_derived(self, output, source):
+        output = os.path.normpath(output)
+        recorded = self.outputs.get(output)
+        if recorded is None or not os.path.exists(output) or not os.path.exists(source):
+            return False
+        return recorded == self._stat_key(source)
+
+    def recorded_outputs(self):
+        return list(self._seen_outputs)
+
+    def orphans(self):
+        return sorted(set(self.outputs) - set(self._seen_outputs))
+
+    def _input_hashes(self, inputs):
+        return {os.path.normpath(path): self.fingerprint(path) for path in inputs}
+
+    def _stat_key(self, source):
+        stat = os.stat(source)
+        return {os.path.normpath(source): f"{stat.st_mtime_ns}:{stat.st_size}"}
@@ -0,0 +1,234 @@
+import datetime
+import io
+import itertools
+import json
+import re
+
+from block_markdown import BlockType
+from htmlnode import end_tag_optional, iter_minified_html
+from textnode import InlineCapture, capture_inline
+
+ARRAY_ITEM_PATTERN = re.compile(r'"(?:[^"\\]|\\.)*"|\'[^\']*\'|[^,\s][^,]*[^,\s]|[^,\s]')
+# paragraphs holding nothing but a link or image, like "[< Back Home](/)",
+# are not used as the page summary
+LONE_LINK_PATTERN = re.compile(r"!?\[[^\[\]]*\]\([^\(\)]*\)")
+LIST_MARKER_PATTERN = re.compile(r"-|\d+\.")
+
+
+class PageMetadata:
+    __slots__ = ("title", "date", "tags", "word_count", "summary", "url", "links", "text")
+
+    def __init__(self, title, date=None, tags=(), word_count=0, summary="", url=None, links=(),
+                 text=None):
+        self.title = title
+        self.date = date
+        self.tags = tuple(tags)
+        self.word_count = word_count
+        self.summary = summary
+        self.url = url
+        # urls of the page's links and images, as written in the markdown
+        self.links = tuple(links)
+        # the page's inline text when it was rendered for the search index;
+        # only handed to this build's search stage, never saved
+        self.text = text
+
+    def to_dict(self):
+        return {
+            "title": self.title,
+            "date": self.date.isoformat() if self.date is not None else None,
+            "tags": list(self.tags),
+            "word_count": self.word_count,
+            "summary": self.summary,
+            "url": self.url,
+            "links": list(self.links),
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        date = datetime.date.fromisoformat(data["date"]) if data["date"] else None
+        return cls(
+            data["title"], date, data["tags"], data["word_count"], data["summary"], data["url"],
+            data.get("links", ()),
+        )
+
+    def __eq__(self, other):
+        return self.to_dict() == other.to_dict()
+
+    def __repr__(self):
+        return f"PageMetadata({self.to_dict()})"
+
+
+def split_front_matter(markdown):
+    lines = io.StringIO(markdown)
+    front_matter = read_header(lines.readline(), lines)
+    if front_matter is None:
+        return {}, markdown
+    return front_matter, lines.read()
+
+
+def read_header(first_line, lines):
+    fence = first_line.rstrip()
+    parse = FRONT_MATTER_FORMATS.get(fence)
+    if parse is None:
+        return None
+    header = []
+    for line in lines:
+        line = line.rstrip("\r\n")
+        if line.rstrip() == fence:
+            return parse(header)
+        header.append(line)
+    raise ValueError(f"invalid front matter: no closing {fence}")
+
+
+def parse_yaml_header(lines):
+    # key: value, key: [a, b] and block lists of "- item" lines
+    front_matter = {}
+    key = None
+    for number, line in enumerate(lines, 2):
+        stripped = line.strip()
+        if not stripped or stripped.startswith("#"):
+            continue
+        if stripped == "-" or stripped.startswith("- "):
+            if key is None or not isinstance(front_matter[key], list):
+                raise ValueError(f"invalid front matter on line {number}: {line}")
+            front_matter[key].append(_scalar(stripped[1:].strip()))
+            continue
+        key, separator, value = line.partition(":")
+        if not separator:
+            raise ValueError(f"invalid front matter on line {number}: {line}")
+        key = key.strip().lower()
+        value = value.strip()
+        if not value:
+            front_matter[key] = []
+        elif value.startswith("["):
+            front_matter[key] = _array(value, line, number)
+        else:
+            front_matter[key] = _scalar(value)
+    return front_matter
+
+
+def parse_toml_header(lines):
+    # key = value with strings, arrays and bare values; [table] headers
+    # prefix the keys that follow them, e.g. "extra.author"
+    front_matter = {}
+    prefix = ""
+    for number, line in enumerate(lines, 2):
+        stripped = line.strip()
+        if not stripped or stripped.startswith("#"):
+            continue
+        if stripped.startswith("[") and "=" not in stripped:
+            prefix = stripped.strip("[] ").lower() + "."
+            continue
+        key, separator, value = line.partition("=")
+        if not separator:
+            raise ValueError(f"invalid front matter on line {number}: {line}")
+        key = prefix + _scalar(key.strip()).lower()
+        value = value.strip()
+        front_matter[key] = _array(value, line, number) if value.startswith("[") else _scalar(value)
+    return front_matter
+
+
+FRONT_MATTER_FORMATS = {"---": parse_yaml_header, "+++": parse_toml_header}
+
+
+def _array(value, line, number):
+    if not value.endswith("]"):
+        raise ValueError(f"invalid front matter on line {number}: {line}")
+    return [_scalar(item) for item in ARRAY_ITEM_PATTERN.findall(value[1:-1])]
+
+
+def _scalar(value):
+    if len(value) >= 2 and value[0] == value[-1] == '"':
+        return json.loads(value)
+    if len(value) >= 2 and value[0] == value[-1] == "'":
+        return value[1:-1]
+    return value
+
+
+def scan_metadata(path):
+    # Metadata for listings without parsing the page: the front matter, and
+    # when it has no title, the lines up to the first "# " heading.
+    with open(path, "r") as f:
+        first_line = f.readline()
+        front_matter = read_header(first_line, f)
+        title = front_matter.get("title") if front_matter else None
+        if title is None:
+            lines = f if front_matter is not None else itertools.chain([first_line], f)
+            for line in lines:
+                if line.startswith("# "):
+                    title = line[2:].rstrip("\r\n")
+                    break
+    return page_metadata(front_matter or {}, title)
+
+
+def page_metadata(front_matter, title=None, word_count=0, summary="", links=(), text=None):
+    title = front_matter.get("title") or title
+    if title is None:
+        raise ValueError("no title found")
+    date = front_matter.get("date")
+    if date:
+        date = datetime.date.fromisoformat(date[:10])
+    tags = front_matter.get("tags", ())
+    if isinstance(tags, str):
+        tags = [tag.strip() for tag in tags.split(",") if tag.strip()]
+    summary = front_matter.get("summary", summary)
+    return PageMetadata(title, date or None, tags, int(word_count), summary, links=links, text=text)
+
+
+class MetadataCollector:
+    # Wraps a block converter so title, word count, summary, links and
+    # (with `search`) text are picked up from the blocks while the page is
+    # being parsed anyway.
+    def __init__(self, front_matter, minify=False, search=False):
+        self.front_matter = front_matter
+        self.minify = minify
+        self.title = None
+        self.word_count = 0
+        self.summary_node = None
+        self.capture = InlineCapture(search)
+
+    def wrap(self, convert):
+        def collect(block_type, lines):
+            node = capture_inline(convert, self.capture, block_type, lines)
+            if block_type == BlockType.HEADING:
+                if self.title is None and lines[0].startswith("# "):
+                    self.title = lines[0][2:]
+                self.word_count += len(lines[0].split()) - 1
+            elif block_type == BlockType.PARAGRAPH:
+                if self.summary_node is None and not LONE_LINK_PATTERN.fullmatch(" ".join(lines).strip()):
+                    self.summary_node = node
+                for line in lines:
+                    self.word_count += len(line.split())
+            elif block_type == BlockType.QUOTE:
+                for line in lines:
+                    self.word_count += len(line.lstrip(">").split())
+            elif block_type == BlockType.TABLE:
+                # pipes are not words and the delimiter row has none
+                for line in lines[:1] + lines[2:]:
+                    self.word_count += len(line.replace("|", " ").split())
+            elif block_type in (BlockType.ULIST, BlockType.OLIST):
+                # list items start with their marker, lazy continuations don't
+                for line in lines:
+                    words = line.split()
+                    if words:
+                        self.word_count += len(words) - (LIST_MARKER_PATTERN.fullmatch(words[0]) is not None)
+            elif block_type != BlockType.CODE:
+                # every line of other blocks starts with its marker
+                for line in lines:
+                    self.word_count += max(len(line.split()) - 1, 0)
+            return node
+        return collect
+
+    def metadata(self):
+        node = self.summary_node
+        if node is None:
+            summary = ""
+        elif self.minify:
+            # serialized the way the render cache stores a minified block
+            summary = "".join(iter_minified_html(node, end_tag_optional(node, None, "div")))
+        else:
+            summary = node.to_html()
+        text = "".join(self.capture.text) if self.capture.text is not None else None
+        return page_metadata(
+            self.front_matter, self.title, self.word_count, summary, self.capture.links, text
+        )
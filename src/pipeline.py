@@ -0,0 +1,138 @@
+import os
+import queue
+import threading
+from concurrent.futures import ProcessPoolExecutor
+
+from gencontent import render_page
+from scheduler import cache_settings, init_worker, render_markdown_job
+from template import load_template
+
+_DONE = None
+
+
+def generate_pages_pipelined(pages, template_path, basepath, jobs=1, cache=None,
+                             io_threads=4, queue_size=16, site_index=None, precompressor=None,
+                             minify=False, images=None, search=False):
+    # reader threads -> read_queue -> render (in process or on a process
+    # pool) -> write_queue -> writer threads. Both queues are bounded, so at
+    # most about 2 * queue_size pages are held in memory at once.
+    failures = []
+    failures_lock = threading.Lock()
+
+    def fail(from_path, error):
+        print(f"   ! {from_path}: {error}")
+        with failures_lock:
+            failures.append((from_path, error))
+
+    pending = queue.Queue()
+    for page in pages:
+        pending.put(page)
+    read_queue = queue.Queue(maxsize=queue_size)
+    write_queue = queue.Queue(maxsize=queue_size)
+
+    def reader():
+        while True:
+            try:
+                from_path, dest_path = pending.get_nowait()
+            except queue.Empty:
+                return
+            # exactly one item per page, whatever goes wrong: the render
+            # loop waits for one from every page
+            try:
+                with open(from_path, "r") as from_file:
+                    content = from_file.read()
+            except Exception as e:
+                read_queue.put((from_path, dest_path, None, f"{type(e).__name__}: {e}"))
+            else:
+                read_queue.put((from_path, dest_path, content, None))
+
+    def writer():
+        while True:
+            item = write_queue.get()
+            if item is _DONE:
+                return
+            from_path, dest_path, html, metadata = item
+            try:
+                os.makedirs(os.path.dirname(dest_path), exist_ok=True)
+                if precompressor is not None:
+                    out = precompressor.writer(dest_path)
+                    out.write(html)
+                    out.commit()
+                else:
+                    tmp_path = f"{dest_path}.tmp"
+                    with open(tmp_path, "w") as to_file:
+                        to_file.write(html)
+                    os.replace(tmp_path, dest_path)
+                print(f" * {from_path} {template_path} -> {dest_path}")
+                if site_index is not None:
+                    site_index.update(from_path, dest_path, metadata)
+            except Exception as e:
+                fail(from_path, f"{type(e).__name__}: {e}")
+
+    readers = [threading.Thread(target=reader, daemon=True) for _ in range(min(io_threads, len(pages)))]
+    writers = [threading.Thread(target=writer, daemon=True) for _ in range(io_threads)]
+    for thread in readers + writers:
+        thread.start()
+
+    if jobs > 1:
+        _render_on_pool(pages, read_queue, write_queue, template_path, basepath, jobs, cache,
+                        queue_size, fail, minify, images, search)
+    else:
+        template = load_template(template_path, basepath, minify)
+        for _ in range(len(pages)):
+            from_path, dest_path, markdown_content, error = read_queue.get()
+            if error is not None:
+                fail(from_path, error)
+                continue
+            try:
+                html, metadata = render_page(
+                    markdown_content, template, basepath, cache, images, search
+                )
+            except Exception as e:
+                fail(from_path, f"{type(e).__name__}: {e}")
+                continue
+            write_queue.put((from_path, dest_path, html, metadata))
+
+    for _ in writers:
+        write_queue.put(_DONE)
+    for thread in readers + writers:
+        thread.join()
+    order = {from_path: i for i, (from_path, _) in enumerate(pages)}
+    failures.sort(key=lambda failure: order[failure[0]])
+    return failures
+
+
+def _render_on_pool(pages, read_queue, write_queue, template_path, basepath, jobs, cache,
+                    queue_size, fail, minify=False, images=None, search=False):
+    in_flight = threading.BoundedSemaphore(queue_size)
+    with ProcessPoolExecutor(
+        max_workers=jobs,
+        initializer=init_worker,
+        initargs=(template_path, basepath, cache_settings(cache), None, minify, images, search),
+    ) as executor:
+        for _ in range(len(pages)):
+            from_path, dest_path, markdown_content, error = read_queue.get()
+            if error is not None:
+                fail(from_path, error)
+                continue
+            in_flight.acquire()
+            future = executor.submit(render_markdown_job, (markdown_content, basepath))
+            future.add_done_callback(
+                lambda future, from_path=from_path, dest_path=dest_path:
+                    _rendered(future, from_path, dest_path, write_queue, cache, fail, in_flight)
+            )
+
+
+def _rendered(future, from_path, dest_path, write_queue, cache, fail, in_flight):
+    try:
+        html, metadata, error, cache_stats = future.result()
+        if cache is not None and cache_stats is not None:
+            cache.merge_stats(cache_stats)
+        if error is not None:
+            fail(from_path, error)
+        else:
+            write_queue.put((from_path, dest_path, html, metadata))
+    except Exception as e:
+        fail(from_path, f"{type(e).__name__}: {e}")
+    finally:
+        in_flight.release()
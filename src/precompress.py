@@ -0,0 +1,195 @@
+import os
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+COMPRESSIBLE_EXTENSIONS = (".html", ".css", ".js", ".json", ".svg", ".txt", ".xml")
+DEFAULT_MIN_SIZE = 1024
+# pages are encoded and compressed in chunks of about this many characters
+CHUNK_SIZE = 1 << 16
+
+
+def _gzip():
+    # wbits 31 writes a gzip header with a zero mtime, so output is reproducible
+    compressor = zlib.compressobj(9, zlib.DEFLATED, 31)
+    return compressor.compress, compressor.flush
+
+
+def _brotli():
+    compressor = brotli.Compressor(quality=11)
+    return compressor.process, compressor.finish
+
+
+def _zstd():
+    compressor = zstandard.ZstdCompressor(level=19).compressobj()
+    return compressor.compress, compressor.flush
+
+
+# encoding -> (file suffix, factory returning (compress, flush))
+ENCODINGS = {"gzip": (".gz", _gzip)}
+if brotli is not None:
+    ENCODINGS["br"] = (".br", _brotli)
+if zstandard is not None:
+    ENCODINGS["zstd"] = (".zst", _zstd)
+
+
+class Precompressor:
+    def __init__(self, encodings=None, min_size=DEFAULT_MIN_SIZE):
+        encodings = tuple(encodings) if encodings is not None else tuple(ENCODINGS)
+        for encoding in encodings:
+            if encoding not in ENCODINGS:
+                raise ValueError(f"compression not available: {encoding}")
+        self.encodings = encodings
+        self.min_size = min_size
+
+    def accepts(self, path):
+        return path.endswith(COMPRESSIBLE_EXTENSIONS)
+
+    def variants(self, path):
+        return [path + ENCODINGS[encoding][0] for encoding in self.encodings]
+
+    def writer(self, dest_path):
+        return CompressedWriter(dest_path, self)
+
+    def compress_file(self, path):
+        # Returns the variants written; smaller files get none and lose
+        # any left over from an earlier build.
+        if os.path.getsize(path) < self.min_size:
+            remove_variants(self.variants(path))
+            return []
+        writer = CompressedWriter(path, self, keep_output=True)
+        try:
+            with open(path, "rb") as f:
+                for chunk in iter(lambda: f.read(CHUNK_SIZE), b""):
+                    writer.write_bytes(chunk)
+        except Exception:
+            writer.abort()
+            raise
+        return writer.commit()
+
+    def record(self, manifest, path):
+        recorded = False
+        for variant in self.variants(path):
+            if os.path.exists(variant):
+                manifest.record_derived(variant, path)
+                recorded = True
+        return recorded
+
+    def __repr__(self):
+        return f"Precompressor({self.encodings}, min_size: {self.min_size})"
+
+
+class CompressedWriter:
+    # File-like target for Template.write: the page is encoded once and the
+    # same bytes go to the output and to one compressor per encoding, so the
+    # output never has to be read back to compress it.
+    def __init__(self, dest_path, precompressor, keep_output=False):
+        self.dest_path = dest_path
+        self.min_size = precompressor.min_size
+        self.size = 0
+        self._pending = []
+        self._pending_size = 0
+        self._out = None if keep_output else open(f"{dest_path}.tmp", "wb")
+        self._variants = []
+        for encoding, variant in zip(precompressor.encodings, precompressor.variants(dest_path)):
+            compress, flush = ENCODINGS[encoding][1]()
+            self._variants.append((variant, open(f"{variant}.tmp", "wb"), compress, flush))
+
+    def write(self, text):
+        self._pending.append(text)
+        self._pending_size += len(text)
+        if self._pending_size >= CHUNK_SIZE:
+            self._flush_pending()
+
+    def writelines(self, lines):
+        for text in lines:
+            self.write(text)
+
+    def write_bytes(self, data):
+        self.size += len(data)
+        if self._out is not None:
+            self._out.write(data)
+        for _, f, compress, _ in self._variants:
+            f.write(compress(data))
+
+    def commit(self):
+        self._flush_pending()
+        for _, f, _, flush in self._variants:
+            f.write(flush())
+            f.close()
+        written = []
+        for variant, _, _, _ in self._variants:
+            if self.size >= self.min_size:
+                os.replace(f"{variant}.tmp", variant)
+                written.append(variant)
+            else:
+                os.remove(f"{variant}.tmp")
+                remove_variants([variant])
+        if self._out is not None:
+            self._out.close()
+            os.replace(f"{self.dest_path}.tmp", self.dest_path)
+        return written
+
+    def abort(self):
+        paths = [variant for variant, _, _, _ in self._variants]
+        files = [f for _, f, _, _ in self._variants]
+        if self._out is not None:
+            paths.append(self.dest_path)
+            files.append(self._out)
+        for f in files:
+            f.close()
+        for path in paths:
+            os.remove(f"{path}.tmp")
+
+    def _flush_pending(self):
+        if self._pending:
+            data = "".join(self._pending).encode()
+            self._pending = []
+            self._pending_size = 0
+            self.write_bytes(data)
+
+
+def remove_variants(variants):
+    for variant in variants:
+        if os.path.exists(variant):
+            os.remove(variant)
+
+
+def precompress_outputs(manifest, precompressor, jobs=None):
+    # Compresses every output recorded by this build whose variants are
+    # missing or older than the output itself. Variants already recorded
+    # were written along with their page.
+    stale = []
+    recorded = set(manifest.recorded_outputs())
+    for output in recorded:
+        if not precompressor.accepts(output):
+            continue
+        variants = precompressor.variants(output)
+        if any(os.path.normpath(variant) in recorded for variant in variants):
+            continue
+        if all(manifest.is_fresh_derived(variant, output) for variant in variants):
+            for variant in variants:
+                manifest.record_derived(variant, output)
+        else:
+            stale.append(output)
+    stale.sort()
+    if len(stale) > 1 and jobs != 1:
+        with ThreadPoolExecutor(max_workers=jobs) as executor:
+            results = list(executor.map(precompressor.compress_file, stale))
+    else:
+        results = [precompressor.compress_file(output) for output in stale]
+    compressed = 0
+    for output, written in zip(stale, results):
+        for variant in written:
+            manifest.record_derived(variant, output)
+        compressed += bool(written)
+    return compressed
@@ -0,0 +1,195 @@
+import cProfile
+import contextvars
+import json
+import os
+import time
+from contextlib import contextmanager, nullcontext
+
+# Stages of the page path the build renders with. gencontent times read,
+# tree construction and template render; the parser times block split,
+# block classification and inline parsing through page_timer; TimedWriter
+# splits what the template writes into serialization and write.
+PAGE_STAGES = (
+    "read",
+    "block split",
+    "block classification",
+    "inline parsing",
+    "tree construction",
+    "serialization",
+    "template render",
+    "write",
+)
+
+# StageTimer of the page being rendered, when it is profiled
+page_timer = contextvars.ContextVar("page_timer", default=None)
+
+
+class StageTimer:
+    def __init__(self):
+        self.wall = {}
+        self.cpu = {}
+        # Time spent in nested stages is only counted for the innermost one
+        self._active = []
+
+    @contextmanager
+    def stage(self, name):
+        frame = [0.0, 0.0]
+        self._active.append(frame)
+        wall = time.perf_counter()
+        cpu = time.process_time()
+        try:
+            yield
+        finally:
+            wall = time.perf_counter() - wall
+            cpu = time.process_time() - cpu
+            self._active.pop()
+            self.add(name, wall - frame[0], cpu - frame[1])
+            if self._active:
+                self._active[-1][0] += wall
+                self._active[-1][1] += cpu
+
+    def add(self, name, wall, cpu):
+        self.wall[name] = self.wall.get(name, 0.0) + wall
+        self.cpu[name] = self.cpu.get(name, 0.0) + cpu
+
+    def total_wall(self):
+        return sum(self.wall.values())
+
+    def to_dict(self):
+        return {
+            name: {"wall": self.wall[name], "cpu": self.cpu[name]}
+            for name in self.wall
+        }
+
+
+class BuildProfiler:
+    def __init__(self, report_path, cprofile_path=None):
+        self.report_path = report_path
+        self.cprofile_path = cprofile_path
+        self.pages = {}
+        self.build = StageTimer()
+        self._cprofile = None
+        self._start = None
+        self._start_cpu = None
+
+    def start(self):
+        self._start = time.perf_counter()
+        self._start_cpu = time.process_time()
+        if self.cprofile_path is not None:
+            self._cprofile = cProfile.Profile()
+            self._cprofile.enable()
+
+    def stop(self):
+        if self._cprofile is not None:
+            self._cprofile.disable()
+            os.makedirs(os.path.dirname(self.cprofile_path) or ".", exist_ok=True)
+            self._cprofile.dump_stats(self.cprofile_path)
+        self.build.add(
+            "total", time.perf_counter() - self._start, time.process_time() - self._start_cpu
+        )
+
+    def page(self, from_path):
+        timer = StageTimer()
+        self.pages[from_path] = timer
+        return timer
+
+    def stage_totals(self):
+        totals = StageTimer()
+        for timer in self.pages.values():
+            for name in timer.wall:
+                totals.add(name, timer.wall[name], timer.cpu[name])
+        return totals
+
+    def report(self):
+        return {
+            "build": self.build.to_dict(),
+            "stages": self.stage_totals().to_dict(),
+            "pages": {path: timer.to_dict() for path, timer in self.pages.items()},
+        }
+
+    def save(self):
+        os.makedirs(os.path.dirname(self.report_path) or ".", exist_ok=True)
+        with open(self.report_path, "w") as f:
+            json.dump(self.report(), f, indent=1)
+
+    def summary(self, limit=5):
+        lines = ["Stages (wall / cpu ms):"]
+        totals = self.stage_totals()
+        for name in sorted(totals.wall, key=totals.wall.get, reverse=True):
+            lines.append(f"  {name:<22} {totals.wall[name] * 1000:10.2f} {totals.cpu[name] * 1000:10.2f}")
+        for name in sorted(self.build.wall):
+            lines.append(f"  {name:<22} {self.build.wall[name] * 1000:10.2f} {self.build.cpu[name] * 1000:10.2f}")
+        lines.append(f"Slowest pages (of {len(self.pages)}):")
+        slowest = sorted(self.pages.items(), key=lambda item: item[1].total_wall(), reverse=True)
+        for path, timer in slowest[:limit]:
+            worst = max(timer.wall, key=timer.wall.get)
+            lines.append(f"  {timer.total_wall() * 1000:10.2f} ms  {path} (mostly {worst})")
+        lines.append(f"Report written to {self.report_path}")
+        if self.cprofile_path is not None:
+            lines.append(f"cProfile stats written to {self.cprofile_path}")
+        return "\n".join(lines)
+
+
+def timed(func, timer, stage):
+    # func with every call counted under stage
+    def timed_call(*args, **kwargs):
+        with timer.stage(stage):
+            return func(*args, **kwargs)
+    return timed_call
+
+
+def timed_iter(iterable, timer, stage):
+    # iterable with the work behind every item counted under stage
+    iterator = iter(iterable)
+    while True:
+        with timer.stage(stage):
+            item = next(iterator, _DONE)
+        if item is _DONE:
+            return
+        yield item
+
+
+_DONE = object()
+
+
+def timer_stage(timer, name):
+    # timer.stage(name), or nothing when the page is not being profiled
+    if timer is None:
+        return nullcontext()
+    return timer.stage(name)
+
+
+@contextmanager
+def profiled(timer):
+    # Makes timer the page_timer while a page is rendered
+    if timer is None:
+        yield
+        return
+    token = page_timer.set(timer)
+    try:
+        yield
+    finally:
+        page_timer.reset(token)
+
+
+class TimedWriter:
+    # Output wrapper for profiled pages. Serialized html reaches it through
+    # writelines, which is timed as serialization; what goes on to the
+    # file or compressor is timed as write.
+    __slots__ = ("out", "timer")
+
+    def __init__(self, out, timer):
+        self.out = out
+        self.timer = timer
+
+    def write(self, text):
+        with self.timer.stage("write"):
+            self.out.write(text)
+
+    def writelines(self, chunks):
+        with self.timer.stage("serialization"):
+            text = "".join(chunks)
+        self.write(text)
+
+    def __repr__(self):
+        return f"TimedWriter({self.out!r})"
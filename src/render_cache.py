@@ -0,0 +1,157 @@
+import hashlib
+import json
+import os
+from collections import OrderedDict
+
+from block_markdown import PARSER_VERSION, block_lines_to_html_node
+from htmlnode import RawNode, end_tag_optional, iter_minified_html
+from links import rewrite_links
+from textnode import InlineCapture, capture_inline, inline_capture
+
+STAT_NAMES = ("hits", "disk_hits", "misses", "evictions", "disk_evictions")
+# Bump when the layout of a cached entry changes
+ENTRY_VERSION = 3
+
+
+class RenderCache:
+    def __init__(self, max_bytes=64 << 20, cache_dir=None, max_disk_bytes=256 << 20, min_block_size=64):
+        self.max_bytes = max_bytes
+        self.cache_dir = cache_dir
+        self.max_disk_bytes = max_disk_bytes
+        # Smaller blocks render faster than they hash, so they bypass the cache
+        self.min_block_size = min_block_size
+        self.entries = OrderedDict()
+        self.size = 0
+        self.stats = dict.fromkeys(STAT_NAMES, 0)
+
+    def key(self, namespace, block_type, text):
+        digest = hashlib.sha256()
+        digest.update(f"{PARSER_VERSION}\0{ENTRY_VERSION}\0{namespace}\0{block_type.value}\0".encode())
+        digest.update(text.encode())
+        return digest.hexdigest()
+
+    def get(self, key):
+        html = self.entries.get(key)
+        if html is not None:
+            self.entries.move_to_end(key)
+            self.stats["hits"] += 1
+            return html
+        if self.cache_dir is not None:
+            path = self._disk_path(key)
+            try:
+                with open(path, "r") as f:
+                    html = f.read()
+            except OSError:
+                html = None
+            if html is not None:
+                os.utime(path)
+                self.stats["disk_hits"] += 1
+                self._remember(key, html)
+                return html
+        self.stats["misses"] += 1
+        return None
+
+    def put(self, key, html):
+        self._remember(key, html)
+        if self.cache_dir is not None:
+            path = self._disk_path(key)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp_path = f"{path}.{os.getpid()}.tmp"
+            with open(tmp_path, "w") as f:
+                f.write(html)
+            os.replace(tmp_path, path)
+
+    def _remember(self, key, html):
+        size = len(html)
+        if size > self.max_bytes:
+            return
+        self.entries[key] = html
+        self.size += size
+        while self.size > self.max_bytes:
+            _, evicted = self.entries.popitem(last=False)
+            self.size -= len(evicted)
+            self.stats["evictions"] += 1
+
+    def _disk_path(self, key):
+        return os.path.join(self.cache_dir, key[:2], key[2:])
+
+    def converter(self, basepath, minify=False, images=None):
+        # Cached fragments are stored with links already rewritten for
+        # `basepath`, minified or not and with image sizes filled in, which
+        # is why all three are in the key.
+        namespace = f"{basepath}\0minify" if minify else basepath
+        if images is not None:
+            namespace = f"{namespace}\0{images.version}"
+
+        def convert(block_type, lines):
+            text = "\n".join(lines)
+            if len(text) < self.min_block_size:
+                return block_lines_to_html_node(block_type, lines)
+            key = self.key(namespace, block_type, text)
+            entry = self.get(key)
+            if entry is None:
+                capture = InlineCapture(text=True)
+                node = capture_inline(block_lines_to_html_node, capture, block_type, lines)
+                if images is not None:
+                    images.annotate(node, basepath)
+                node = rewrite_links(node, basepath)
+                if minify:
+                    # a page's blocks are only ever followed by other blocks
+                    # in its div, so a trailing </p> can go here too
+                    html = "".join(iter_minified_html(node, end_tag_optional(node, None, "div")))
+                else:
+                    html = node.to_html()
+                # the block's links and text go on the first line, so cache
+                # hits can report them without parsing the block again
+                links, text = capture.links, "".join(capture.text)
+                self.put(key, f"{json.dumps([links, text])}\n{html}")
+            else:
+                split = entry.index("\n")
+                links, text = json.loads(entry[:split])
+                html = entry[split + 1 :]
+            page_capture = inline_capture.get()
+            if page_capture is not None:
+                page_capture.extend(links, text)
+            return RawNode(html)
+        return convert
+
+    def prune_disk(self):
+        if self.cache_dir is None or not os.path.isdir(self.cache_dir):
+            return
+        files = []
+        total = 0
+        for root, _, filenames in os.walk(self.cache_dir):
+            for filename in filenames:
+                path = os.path.join(root, filename)
+                stat = os.stat(path)
+                files.append((stat.st_mtime_ns, stat.st_size, path))
+                total += stat.st_size
+        files.sort()
+        for _, size, path in files:
+            if total <= self.max_disk_bytes:
+                break
+            os.remove(path)
+            total -= size
+            self.stats["disk_evictions"] += 1
+
+    def take_stats(self):
+        stats = self.stats
+        self.stats = dict.fromkeys(STAT_NAMES, 0)
+        return stats
+
+    def merge_stats(self, stats):
+        for name in STAT_NAMES:
+            self.stats[name] += stats[name]
+
+    def summary(self):
+        stats = self.stats
+        lookups = stats["hits"] + stats["disk_hits"] + stats["misses"]
+        hit_rate = (stats["hits"] + stats["disk_hits"]) / lookups if lookups else 0.0
+        return (
+            f"Render cache: {stats['hits']} memory hits, {stats['disk_hits']} disk hits, "
+            f"{stats['misses']} misses ({hit_rate:.0%} hit rate), "
+            f"{stats['evictions']} evicted from memory, {stats['disk_evictions']} from disk"
+        )
+
+    def __repr__(self):
+        return f"RenderCache(entries: {len(self.entries)}, bytes: {self.size}, dir: {self.cache_dir})"
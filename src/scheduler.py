@@ -0,0 +1,95 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+from gencontent import render_page, write_page
+from render_cache import RenderCache
+from template import load_template
+
+_worker_template = None
+_worker_cache = None
+_worker_precompressor = None
+_worker_images = None
+_worker_search = False
+
+
+def generate_pages_parallel(pages, template_path, basepath, jobs, cache=None, site_index=None,
+                            precompressor=None, minify=False, images=None, search=False):
+    failures = []
+    if not pages:
+        return failures
+    jobs = max(1, min(jobs, len(pages)))
+    chunksize = max(1, len(pages) // (jobs * 4))
+    with ProcessPoolExecutor(
+        max_workers=jobs,
+        initializer=init_worker,
+        initargs=(
+            template_path, basepath, cache_settings(cache), precompressor, minify, images, search
+        ),
+    ) as executor:
+        results = executor.map(
+            _render_page,
+            [(from_path, dest_path, basepath) for from_path, dest_path in pages],
+            chunksize=chunksize,
+        )
+        for (from_path, dest_path), (metadata, error, cache_stats) in zip(pages, results):
+            if cache is not None:
+                cache.merge_stats(cache_stats)
+            print(f" * {from_path} {template_path} -> {dest_path}")
+            if error is not None:
+                print(f"   ! {error}")
+                failures.append((from_path, error))
+            elif site_index is not None:
+                site_index.update(from_path, dest_path, metadata)
+    return failures
+
+
+def default_jobs():
+    return os.cpu_count() or 1
+
+
+def cache_settings(cache):
+    if cache is None:
+        return None
+    return (cache.max_bytes, cache.cache_dir, cache.max_disk_bytes, cache.min_block_size)
+
+
+def init_worker(template_path, basepath, settings, precompressor=None, minify=False, images=None,
+                search=False):
+    global _worker_template, _worker_cache, _worker_precompressor, _worker_images, _worker_search
+    _worker_template = load_template(template_path, basepath, minify)
+    _worker_precompressor = precompressor
+    _worker_images = images
+    _worker_search = search
+    if settings is not None:
+        _worker_cache = RenderCache(*settings)
+
+
+def _render_page(job):
+    from_path, dest_path, basepath = job
+    metadata = None
+    error = None
+    try:
+        metadata = write_page(
+            from_path, _worker_template, dest_path, basepath, _worker_cache, _worker_precompressor,
+            _worker_images, _worker_search,
+        )
+    except Exception as e:
+        error = f"{type(e).__name__}: {e}"
+    cache_stats = _worker_cache.take_stats() if _worker_cache is not None else None
+    return metadata, error, cache_stats
+
+
+def render_markdown_job(job):
+    markdown_content, basepath = job
+    html = None
+    metadata = None
+    error = None
+    try:
+        html, metadata = render_page(
+            markdown_content, _worker_template, basepath, _worker_cache, _worker_images,
+            _worker_search,
+        )
+    except Exception as e:
+        error = f"{type(e).__name__}: {e}"
+    cache_stats = _worker_cache.take_stats() if _worker_cache is not None else None
+    return html, metadata, error, cache_stats
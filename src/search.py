@@ -0,0 +1,206 @@
+import gzip
+import heapq
+import json
+import os
+import re
+import unicodedata
+
+from siteindex import write_if_changed
+
+SEARCH_INDEX_VERSION = 2
+SEARCH_DIR = "search"
+# Terms are stored in shards named after their first PREFIX_LENGTH
+# characters, so a query only fetches the shards of its own words. Shorter
+# words are not indexed.
+PREFIX_LENGTH = 2
+# Terms are runs of letters, digits and underscores once the text is
+# lowercased and its combining marks are dropped, so "café" and "cafe" are
+# one term. static/search.js tokenizes queries the same way.
+TERM_PATTERN = re.compile(rf"\w{{{PREFIX_LENGTH},}}")
+# combining marks are never ascii or \w, so only these runs are looked up
+NON_WORD_PATTERN = re.compile(r"[^\x00-\x7f\w]+")
+
+# the client, written next to the index as search.js
+SEARCH_SCRIPT_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "static", "search.js")
+
+
+def tokenize(text):
+    text = text.lower()
+    if not text.isascii():
+        text = NON_WORD_PATTERN.sub(_drop_marks, unicodedata.normalize("NFD", text))
+    return TERM_PATTERN.findall(text)
+
+
+def _drop_marks(match):
+    # other symbols still split words, as they do in \w runs
+    return "".join("" if unicodedata.category(char)[0] == "M" else " " for char in match.group())
+
+
+def term_positions(text):
+    positions = {}
+    for position, term in enumerate(tokenize(text)):
+        positions.setdefault(term, []).append(position)
+    return positions
+
+
+def pack_postings(postings):
+    # {page id: [positions]} -> flat ints, ids and positions delta-encoded
+    packed = []
+    previous_id = 0
+    for page_id in sorted(postings):
+        positions = postings[page_id]
+        packed.append(page_id - previous_id)
+        packed.append(len(positions))
+        previous = 0
+        for position in positions:
+            packed.append(position - previous)
+            previous = position
+        previous_id = page_id
+    return packed
+
+
+class SearchIndex:
+    # Inverted index over the text of every page. It is kept between builds
+    # with stable page ids, so an incremental build only patches the
+    # postings of the pages it re-rendered and rewrites the shards they
+    # touch.
+    def __init__(self, path, pages=None, postings=None):
+        self.path = path
+        # source path -> [page id, url, title, terms]
+        self.pages = pages if pages is not None else {}
+        # term -> {page id: [positions]}
+        self.postings = postings if postings is not None else {}
+        # prefixes of the shards that changed since they were last written
+        self.dirty = set()
+        # ids of removed pages, handed out again before new ones
+        used = {page[0] for page in self.pages.values()}
+        self.next_id = max(used, default=-1) + 1
+        self.free_ids = [page_id for page_id in range(self.next_id) if page_id not in used]
+
+    @classmethod
+    def load(cls, path):
+        try:
+            with open(path, "r") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if data.get("version") != SEARCH_INDEX_VERSION:
+            return None
+        postings = {
+            term: {int(page_id): positions for page_id, positions in pages.items()}
+            for term, pages in data["postings"].items()
+        }
+        return cls(path, data["pages"], postings)
+
+    def save(self):
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        data = {"version": SEARCH_INDEX_VERSION, "pages": self.pages, "postings": self.postings}
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(data, f, separators=(",", ":"), sort_keys=True)
+        os.replace(tmp_path, self.path)
+
+    def update(self, source, url, title, text):
+        # A page keeps its id, so only the shards holding terms whose
+        # positions on this page changed have to be written again
+        page_id, old = self._drop(source)
+        if page_id is None:
+            page_id = self._new_id()
+        positions = term_positions(text)
+        for term, found in positions.items():
+            self.postings.setdefault(term, {})[page_id] = found
+            if old.get(term) != found:
+                self.dirty.add(term[:PREFIX_LENGTH])
+        self.dirty.update(term[:PREFIX_LENGTH] for term in old.keys() - positions.keys())
+        self.pages[source] = [page_id, url, title, sorted(positions)]
+
+    def remove(self, source):
+        page_id, old = self._drop(source)
+        if page_id is not None:
+            self.dirty.update(term[:PREFIX_LENGTH] for term in old)
+            heapq.heappush(self.free_ids, page_id)
+
+    def _drop(self, source):
+        # Takes a page's postings out; returns (its id, {term: positions})
+        page = self.pages.pop(source, None)
+        if page is None:
+            return None, {}
+        page_id, _, _, terms = page
+        old = {}
+        for term in terms:
+            postings = self.postings[term]
+            old[term] = postings.pop(page_id)
+            if not postings:
+                del self.postings[term]
+        return page_id, old
+
+    def retain(self, sources):
+        for source in self.pages.keys() - set(sources):
+            self.remove(source)
+
+    def merge(self, others):
+        # Adds the pages of other indexes, e.g. those built for shards. New
+        # ids go out in source order, as they do in a single build.
+        pages = sorted((source, other) for other in others for source in other.pages)
+        for source, other in pages:
+            page_id, url, title, terms = other.pages[source]
+            self.remove(source)
+            new_id = self._new_id()
+            for term in terms:
+                self.postings.setdefault(term, {})[new_id] = other.postings[term][page_id]
+                self.dirty.add(term[:PREFIX_LENGTH])
+            self.pages[source] = [new_id, url, title, terms]
+
+    def _new_id(self):
+        if self.free_ids:
+            return heapq.heappop(self.free_ids)
+        self.next_id += 1
+        return self.next_id - 1
+
+    def shards(self):
+        # prefix -> terms in that shard
+        shards = {}
+        for term in self.postings:
+            shards.setdefault(term[:PREFIX_LENGTH], []).append(term)
+        return shards
+
+    def write(self, dest_dir, basepath):
+        # Writes the shards that changed (or are missing), the page table and
+        # the client script into dest_dir/search/; returns every output path
+        search_dir = os.path.join(dest_dir, SEARCH_DIR)
+        os.makedirs(search_dir, exist_ok=True)
+        outputs = []
+        shards = self.shards()
+        for prefix, terms in sorted(shards.items()):
+            path = os.path.join(search_dir, f"{prefix}.json.gz")
+            outputs.append(path)
+            if prefix not in self.dirty and os.path.exists(path):
+                continue
+            data = {term: pack_postings(self.postings[term]) for term in sorted(terms)}
+            text = json.dumps(data, separators=(",", ":"), ensure_ascii=False)
+            write_if_changed(path, gzip.compress(text.encode(), 9, mtime=0))
+        table = [None] * self.next_id
+        for page_id, url, title, _ in self.pages.values():
+            table[page_id] = [url, title]
+        manifest = {
+            "version": SEARCH_INDEX_VERSION,
+            "basepath": basepath,
+            "prefix_length": PREFIX_LENGTH,
+            "pages": table,
+            "shards": sorted(shards),
+        }
+        with open(SEARCH_SCRIPT_PATH, "r") as f:
+            script = f.read()
+        for name, content in (
+            ("index.json", json.dumps(manifest, separators=(",", ":"), ensure_ascii=False)),
+            ("search.js", script),
+        ):
+            path = os.path.join(search_dir, name)
+            write_if_changed(path, content.encode())
+            outputs.append(path)
+        self.dirty.clear()
+        return outputs
+
+    def __repr__(self):
+        return f"SearchIndex({self.path}, pages: {len(self.pages)}, terms: {len(self.postings)})"
+
@@ -0,0 +1,134 @@
+import hashlib
+import json
+import os
+import shutil
+
+from copystatic import list_files
+from manifest import file_digest
+from metadata import PageMetadata
+
+SHARD_MANIFEST = "shard-manifest.json"
+# a shard's search index, kept in its directory for merge to combine
+SHARD_SEARCH_INDEX = "search-index.json"
+SHARDS_DIR = os.path.join(".", ".cache", "shards")
+
+
+def parse_shard(spec):
+    try:
+        index, count = (int(part) for part in spec.split("/"))
+    except ValueError:
+        raise ValueError(f"invalid shard: {spec}, expected i/N")
+    if count < 1 or not 1 <= index <= count:
+        raise ValueError(f"invalid shard: {spec}, expected 1 <= i <= N")
+    return index, count
+
+
+def shard_of(rel_path, count):
+    digest = hashlib.sha1(rel_path.replace(os.sep, "/").encode()).digest()
+    return int.from_bytes(digest[:8], "big") % count + 1
+
+
+def select_shard(pages, content_dir, index, count):
+    return [
+        (from_path, dest_path)
+        for from_path, dest_path in pages
+        if shard_of(os.path.relpath(from_path, content_dir), count) == index
+    ]
+
+
+def default_shard_dir(index, count):
+    return os.path.join(SHARDS_DIR, f"{index}-of-{count}")
+
+
+def find_shard_dirs(shards_dir=None):
+    # The shards of the latest sharded build. Directories left from builds
+    # with another shard count are not merged with them.
+    shards_dir = shards_dir or SHARDS_DIR
+    found = []
+    for name in sorted(os.listdir(shards_dir)) if os.path.isdir(shards_dir) else ():
+        manifest_path = os.path.join(shards_dir, name, SHARD_MANIFEST)
+        if os.path.isfile(manifest_path):
+            with open(manifest_path) as f:
+                count = json.load(f)["shards"]
+            found.append((os.path.getmtime(manifest_path), count, os.path.join(shards_dir, name)))
+    if not found:
+        return []
+    latest_count = max(found)[1]
+    return [shard_dir for _, count, shard_dir in found if count == latest_count]
+
+
+def write_shard_manifest(dest_dir, index, count, settings, pages, site_index=None):
+    # `settings` holds everything that changes a page's output: shards are
+    # only merged when they all agree on it
+    outputs = {}
+    for _, dest_path in pages:
+        if os.path.exists(dest_path):
+            outputs[os.path.relpath(dest_path, dest_dir)] = file_digest(dest_path)
+    data = {"shard": index, "shards": count, "settings": settings, "outputs": outputs}
+    if site_index is not None:
+        data["pages"] = site_index.to_dict(from_path for from_path, _ in pages)
+    with open(os.path.join(dest_dir, SHARD_MANIFEST), "w") as f:
+        json.dump(data, f, indent=1, sort_keys=True)
+    return data
+
+
+def load_shard_manifests(shard_dirs):
+    manifests = []
+    for shard_dir in shard_dirs:
+        with open(os.path.join(shard_dir, SHARD_MANIFEST)) as f:
+            manifests.append((shard_dir, json.load(f)))
+    if not manifests:
+        raise ValueError("no shards to merge")
+    count = manifests[0][1]["shards"]
+    settings = manifests[0][1].get("settings")
+    seen = set()
+    for shard_dir, data in manifests:
+        if data["shards"] != count:
+            raise ValueError(f"shard {shard_dir} is one of {data['shards']} shards, not {count}")
+        if data.get("settings") != settings:
+            raise ValueError(f"shard {shard_dir} was built with different settings")
+        if not 1 <= data["shard"] <= count:
+            raise ValueError(f"shard {shard_dir} has an invalid index {data['shard']}/{count}")
+        if data["shard"] in seen:
+            raise ValueError(f"shard {data['shard']}/{count} given twice")
+        seen.add(data["shard"])
+    missing = sorted(set(range(1, count + 1)) - seen)
+    if missing:
+        raise ValueError(f"missing shards: {', '.join(f'{i}/{count}' for i in missing)}")
+    if settings is None:
+        raise ValueError(f"shard {manifests[0][0]} has no recorded settings, rebuild it")
+    return manifests
+
+
+def merge_shards(manifests, dest_dir, static_dir):
+    # `manifests` as returned by load_shard_manifests
+    owners = {}
+    conflicts = []
+    for shard_dir, data in manifests:
+        for rel_path, digest in data["outputs"].items():
+            if rel_path in owners and owners[rel_path][1] != digest:
+                conflicts.append(f"{rel_path} ({owners[rel_path][0]} and {shard_dir})")
+            owners.setdefault(rel_path, (shard_dir, digest))
+    static_outputs = {
+        os.path.relpath(dest_path, dest_dir) for _, dest_path in list_files(static_dir, dest_dir)
+    }
+    conflicts.extend(
+        f"{rel_path} (page output and static asset)" for rel_path in sorted(static_outputs & owners.keys())
+    )
+    if conflicts:
+        raise ValueError("conflicting shard outputs: " + ", ".join(conflicts))
+
+    if os.path.exists(dest_dir):
+        shutil.rmtree(dest_dir)
+    os.makedirs(dest_dir)
+    for rel_path, (shard_dir, _) in sorted(owners.items()):
+        dest_path = os.path.join(dest_dir, rel_path)
+        os.makedirs(os.path.dirname(dest_path), exist_ok=True)
+        shutil.copy2(os.path.join(shard_dir, rel_path), dest_path)
+    print(f"Merged {len(owners)} pages from {len(manifests)} shards into {dest_dir}")
+    pages = {}
+    for _, data in manifests:
+        for source, page in data.get("pages", {}).items():
+            pages[source] = PageMetadata.from_dict(page)
+    return [os.path.join(dest_dir, rel_path) for rel_path in sorted(owners)], pages
+
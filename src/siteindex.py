@@ -0,0 +1,240 @@
+import datetime
+import email.utils
+import json
+import os
+import re
+from xml.sax.saxutils import escape
+
+from htmlnode import LeafNode, ParentNode, RawNode
+from links import rewrite_links
+from metadata import PageMetadata
+
+SITE_INDEX_VERSION = 2
+FEED_ITEMS = 20
+
+
+class SiteIndex:
+    def __init__(self, path, dest_dir, basepath=None, pages=None):
+        self.path = path
+        self.dest_dir = dest_dir
+        self.basepath = basepath
+        # source path -> PageMetadata, kept between builds so incremental
+        # builds only extract metadata from the pages they re-render
+        self.pages = pages if pages is not None else {}
+
+    @classmethod
+    def load(cls, path, dest_dir):
+        try:
+            with open(path, "r") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return cls(path, dest_dir)
+        if data.get("version") != SITE_INDEX_VERSION:
+            return cls(path, dest_dir)
+        pages = {source: PageMetadata.from_dict(page) for source, page in data["pages"].items()}
+        return cls(path, dest_dir, data.get("basepath"), pages)
+
+    def save(self):
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        data = {
+            "version": SITE_INDEX_VERSION,
+            "basepath": self.basepath,
+            "pages": self.to_dict(),
+        }
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(data, f, indent=1, sort_keys=True)
+        os.replace(tmp_path, self.path)
+
+    def to_dict(self, sources=None):
+        if sources is None:
+            sources = self.pages.keys()
+        return {source: self.pages[source].to_dict() for source in sources if source in self.pages}
+
+    def update(self, source, dest_path, metadata):
+        metadata.url = page_url(dest_path, self.dest_dir)
+        self.pages[source] = metadata
+
+    def retain(self, sources):
+        for source in self.pages.keys() - set(sources):
+            del self.pages[source]
+
+    def by_url(self):
+        return {page.url: page for page in self.pages.values()}
+
+    def section(self, name):
+        prefix = f"/{name}/"
+        pages = [page for page in self.pages.values() if page.url.startswith(prefix) and page.url != prefix]
+        return sorted(pages, key=_newest_first)
+
+    def tags(self):
+        tags = {}
+        for page in sorted(self.pages.values(), key=_newest_first):
+            for tag in page.tags:
+                tags.setdefault(tag, []).append(page)
+        return dict(sorted(tags.items()))
+
+
+def _newest_first(page):
+    # undated pages go last, ties keep a stable url order
+    return (page.date is None, -(page.date.toordinal() if page.date else 0), page.url)
+
+
+def page_url(dest_path, dest_dir):
+    rel_path = os.path.relpath(dest_path, dest_dir).replace(os.sep, "/")
+    if rel_path == "index.html":
+        return "/"
+    if rel_path.endswith("/index.html"):
+        return "/" + rel_path[: -len("index.html")]
+    return "/" + rel_path
+
+
+def tag_slug(tag):
+    return re.sub(r"[^a-z0-9]+", "-", tag.lower()).strip("-") or "tag"
+
+
+def absolute_url(site_url, basepath, url):
+    return site_url.rstrip("/") + basepath + url.lstrip("/")
+
+
+def sitemap_xml(pages, site_url, basepath):
+    lines = [
+        '<?xml version="1.0" encoding="UTF-8"?>',
+        '<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">',
+    ]
+    for page in sorted(pages, key=lambda page: page.url):
+        lines.append("  <url>")
+        lines.append(f"    <loc>{escape(absolute_url(site_url, basepath, page.url))}</loc>")
+        if page.date is not None:
+            lines.append(f"    <lastmod>{page.date.isoformat()}</lastmod>")
+        lines.append("  </url>")
+    lines.append("</urlset>")
+    return "\n".join(lines) + "\n"
+
+
+def rss_xml(title, posts, site_url, basepath, feed_url):
+    lines = [
+        '<?xml version="1.0" encoding="UTF-8"?>',
+        '<rss version="2.0" xmlns:atom="http://www.w3.org/2005/Atom">',
+        "<channel>",
+        f"  <title>{escape(title)}</title>",
+        f"  <link>{escape(absolute_url(site_url, basepath, '/'))}</link>",
+        f"  <description>{escape(title)}</description>",
+        f'  <atom:link href="{escape(absolute_url(site_url, basepath, feed_url))}" rel="self" type="application/rss+xml"/>',
+    ]
+    for post in posts[:FEED_ITEMS]:
+        link = escape(absolute_url(site_url, basepath, post.url))
+        lines.append("  <item>")
+        lines.append(f"    <title>{escape(post.title)}</title>")
+        lines.append(f"    <link>{link}</link>")
+        lines.append(f"    <guid>{link}</guid>")
+        if post.date is not None:
+            published = datetime.datetime.combine(post.date, datetime.time(), datetime.timezone.utc)
+            lines.append(f"    <pubDate>{email.utils.format_datetime(published)}</pubDate>")
+        if post.summary:
+            lines.append(f"    <description>{escape(post.summary)}</description>")
+        lines.append("  </item>")
+    lines.append("</channel>")
+    lines.append("</rss>")
+    return "\n".join(lines) + "\n"
+
+
+def listing_node(pages, basepath, newer_url=None, older_url=None):
+    items = []
+    for page in pages:
+        children = [ParentNode("a", [LeafNode(None, page.title)], {"href": page.url})]
+        if page.date is not None:
+            children.append(LeafNode("time", page.date.isoformat(), {"datetime": page.date.isoformat()}))
+        if page.summary:
+            children.append(RawNode(page.summary))
+        items.append(ParentNode("li", children))
+    children = [ParentNode("ul", items)] if items else []
+    nav = []
+    if newer_url is not None:
+        nav.append(LeafNode("a", "Newer", {"href": newer_url, "rel": "prev"}))
+    if older_url is not None:
+        nav.append(LeafNode("a", "Older", {"href": older_url, "rel": "next"}))
+    if nav:
+        children.append(ParentNode("nav", nav))
+    return rewrite_links(ParentNode("div", children), basepath)
+
+
+def tags_node(tags, basepath):
+    items = [
+        ParentNode("li", [
+            LeafNode("a", tag, {"href": f"/tags/{tag_slug(tag)}/"}),
+            LeafNode(None, f" ({len(pages)})"),
+        ])
+        for tag, pages in tags.items()
+    ]
+    return rewrite_links(ParentNode("div", [ParentNode("ul", items)] if items else []), basepath)
+
+
+def site_pages(index, section="blog", page_size=10):
+    # (url, title, build_node) for every generated listing page
+    posts = index.section(section)
+    pages = []
+    chunks = [posts[i : i + page_size] for i in range(0, len(posts), page_size)] or [[]]
+    urls = [f"/{section}/"] + [f"/{section}/page/{number}/" for number in range(2, len(chunks) + 1)]
+    for number, chunk in enumerate(chunks):
+        newer = urls[number - 1] if number > 0 else None
+        older = urls[number + 1] if number + 1 < len(chunks) else None
+        title = section.capitalize() if number == 0 else f"{section.capitalize()} - page {number + 1}"
+        pages.append((urls[number], title, lambda basepath, chunk=chunk, newer=newer, older=older:
+                      listing_node(chunk, basepath, newer, older)))
+    tags = index.tags()
+    if tags:
+        pages.append(("/tags/", "Tags", lambda basepath: tags_node(tags, basepath)))
+        for tag, tagged in tags.items():
+            pages.append((f"/tags/{tag_slug(tag)}/", f"Tagged: {tag}",
+                          lambda basepath, tagged=tagged: listing_node(tagged, basepath)))
+    return pages
+
+
+def write_site_files(index, template, site_url, basepath, section="blog", page_size=10):
+    # Every site-wide file comes from the in-memory index, so no markdown is
+    # read again here. Returns the paths that belong to the build.
+    dest_dir = index.dest_dir
+    content_urls = index.by_url()
+    outputs = []
+    generated = []
+    for url, title, build_node in site_pages(index, section, page_size):
+        if url in content_urls:
+            continue
+        dest_path = os.path.join(dest_dir, *url.strip("/").split("/"), "index.html")
+        write_if_changed(dest_path, template.render(Title=title, Content=build_node(basepath)))
+        outputs.append(dest_path)
+        generated.append(PageMetadata(title, url=url))
+
+    # sitemaps and feeds need absolute urls, so they wait for a site url
+    if not site_url:
+        return outputs
+    sitemap_path = os.path.join(dest_dir, "sitemap.xml")
+    write_if_changed(sitemap_path, sitemap_xml(list(index.pages.values()) + generated, site_url, basepath))
+    outputs.append(sitemap_path)
+
+    feed_url = f"/{section}/feed.xml"
+    feed_path = os.path.join(dest_dir, section, "feed.xml")
+    home = content_urls.get("/")
+    feed_title = home.title if home is not None else section.capitalize()
+    write_if_changed(feed_path, rss_xml(feed_title, index.section(section), site_url, basepath, feed_url))
+    outputs.append(feed_path)
+    return outputs
+
+
+def write_if_changed(path, data):
+    # leaves unchanged files alone so their mtimes stay put; data is str or
+    # bytes
+    mode = "b" if isinstance(data, bytes) else ""
+    try:
+        with open(path, "r" + mode) as f:
+            if f.read() == data:
+                return False
+    except OSError:
+        pass
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w" + mode) as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+    return True
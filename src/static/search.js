@@ -0,0 +1,82 @@
+// Loaded by pages that offer search. window.search("some words") resolves to
+// [{url, title, score}], best first; the last word matches as a prefix so
+// results can follow typing. Shards are fetched on first use and kept.
+(() => {
+  const base = new URL(".", document.currentScript.src);
+  const shards = new Map();
+  let manifest = null;
+
+  const load = async (name) => {
+    const response = await fetch(new URL(name, base));
+    if (!response.ok) throw new Error(`${name}: HTTP ${response.status}`);
+    let bytes = new Uint8Array(await response.arrayBuffer());
+    // servers that add Content-Encoding: gzip themselves hand back plain json
+    if (bytes[0] === 0x1f && bytes[1] === 0x8b) {
+      const stream = new Blob([bytes]).stream().pipeThrough(new DecompressionStream("gzip"));
+      bytes = new Uint8Array(await new Response(stream).arrayBuffer());
+    }
+    return JSON.parse(new TextDecoder().decode(bytes));
+  };
+
+  // Same terms as search.tokenize: lowercased, combining marks dropped,
+  // runs of letters, digits and underscores at least prefix_length code
+  // points long
+  const tokenize = (text, minLength) =>
+    (text.toLowerCase().normalize("NFD").replace(/\p{M}/gu, "").match(/[\p{L}\p{N}_]+/gu) || [])
+      .filter((term) => Array.from(term).length >= minLength);
+
+  // shard names are the first prefix_length code points of their terms
+  const prefix = (term, length) => Array.from(term).slice(0, length).join("");
+
+  const shard = async (name) => {
+    const index = await manifest;
+    if (!shards.has(name)) {
+      const exists = index.shards.includes(name);
+      shards.set(name, exists ? load(`${encodeURIComponent(name)}.json.gz`) : Promise.resolve({}));
+    }
+    return shards.get(name);
+  };
+
+  // [page id delta, count, position deltas...]... -> Map(page id -> positions)
+  const decode = (packed) => {
+    const postings = new Map();
+    let id = 0;
+    for (let i = 0; i < packed.length; ) {
+      id += packed[i++];
+      const count = packed[i++];
+      const end = i + count;
+      const positions = [];
+      for (let position = 0; i < end; i++) positions.push((position += packed[i]));
+      postings.set(id, positions);
+    }
+    return postings;
+  };
+
+  window.search = async (query) => {
+    manifest ??= load("index.json");
+    const index = await manifest;
+    const words = tokenize(query, index.prefix_length);
+    let scores = null;
+    for (const [i, word] of words.entries()) {
+      const terms = await shard(prefix(word, index.prefix_length));
+      const matches = i === words.length - 1
+        ? Object.keys(terms).filter((term) => term.startsWith(word))
+        : (word in terms ? [word] : []);
+      const found = new Map();
+      for (const term of matches) {
+        for (const [id, positions] of decode(terms[term])) {
+          found.set(id, (found.get(id) || 0) + positions.length);
+        }
+      }
+      scores = scores === null
+        ? found
+        : new Map([...scores].filter(([id]) => found.has(id)).map(([id, score]) => [id, score + found.get(id)]));
+    }
+    return [...(scores || [])]
+      .sort((a, b) => b[1] - a[1])
+      .map(([id, score]) => {
+        const [url, title] = index.pages[id];
+        return { url: index.basepath + url.slice(1), title, score };
+      });
+  };
+})();
@@ -0,0 +1,99 @@
+import os
+import re
+
+from htmlnode import iter_html
+
+PLACEHOLDER_PATTERN = re.compile(r"\{\{ (\w+) \}\}")
+PRESERVED_BLOCK_PATTERN = re.compile(r"<(pre|textarea|script|style)\b.*?</\1\s*>", re.S | re.I)
+COMMENT_PATTERN = re.compile(r"<!--(?!\[).*?-->", re.S)
+# line breaks and indentation next to a tag or placeholder carry no meaning
+TAG_INDENT_PATTERN = re.compile(r"(?<=[>}])\s*\n\s*|\s*\n\s*(?=[<{])")
+SPACES_PATTERN = re.compile(r"\s+")
+
+
+class Template:
+    def __init__(self, text, basepath="/", minify=False):
+        self.minify = minify
+        if minify:
+            text = minify_markup(text)
+        # Even indexes hold literal text, odd indexes hold placeholder names.
+        self.segments = []
+        position = 0
+        for match in PLACEHOLDER_PATTERN.finditer(text):
+            self.segments.append(rewrite_urls(text[position : match.start()], basepath))
+            self.segments.append(match.group(1))
+            position = match.end()
+        self.segments.append(rewrite_urls(text[position:], basepath))
+
+    def render(self, **values):
+        parts = []
+        segments = self.segments
+        for i in range(0, len(segments) - 1, 2):
+            parts.append(segments[i])
+            name = segments[i + 1]
+            value = values.get(name)
+            if value is None:
+                parts.append(f"{{{{ {name} }}}}")
+            elif isinstance(value, str):
+                parts.append(value)
+            else:
+                parts.extend(iter_html(value, self.minify))
+        parts.append(segments[-1])
+        return "".join(parts)
+
+    def write(self, out, **values):
+        segments = self.segments
+        for i in range(0, len(segments) - 1, 2):
+            out.write(segments[i])
+            name = segments[i + 1]
+            value = values.get(name)
+            if value is None:
+                out.write(f"{{{{ {name} }}}}")
+            elif isinstance(value, str):
+                out.write(value)
+            else:
+                value.write_html(out, self.minify)
+        out.write(segments[-1])
+
+    def __repr__(self):
+        return f"Template({self.segments})"
+
+
+def minify_markup(text):
+    # Drops comments and insignificant whitespace from template markup;
+    # pre, textarea, script and style blocks are kept as written.
+    parts = []
+    position = 0
+    for match in PRESERVED_BLOCK_PATTERN.finditer(text):
+        parts.append(_collapse_whitespace(text[position : match.start()]))
+        parts.append(match.group(0))
+        position = match.end()
+    parts.append(_collapse_whitespace(text[position:]))
+    return "".join(parts).strip()
+
+
+def _collapse_whitespace(text):
+    text = COMMENT_PATTERN.sub("", text)
+    return SPACES_PATTERN.sub(" ", TAG_INDENT_PATTERN.sub("", text))
+
+
+def rewrite_urls(html, basepath):
+    if basepath == "/":
+        return html
+    html = html.replace('href="/', f'href="{basepath}')
+    return html.replace('src="/', f'src="{basepath}')
+
+
+_template_cache = {}
+
+
+def load_template(template_path, basepath="/", minify=False):
+    mtime = os.stat(template_path).st_mtime_ns
+    key = (os.path.abspath(template_path), basepath, minify)
+    cached = _template_cache.get(key)
+    if cached is not None and cached[0] == mtime:
+        return cached[1]
+    with open(template_path, "r") as template_file:
+        template = Template(template_file.read(), basepath, minify)
+    _template_cache[key] = (mtime, template)
+    return template
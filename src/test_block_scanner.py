@@ -0,0 +1,98 @@
+import io
+import unittest
+
+import block_markdown
+from block_markdown import (
+    Block,
+    BlockType,
+    block_to_block_type,
+    iter_blocks,
+    markdown_to_blocks,
+    markdown_to_html_node,
+    register_block_type,
+)
+from htmlnode import LeafNode, ParentNode
+
+
+class TestBlockScanner(unittest.TestCase):
+    def test_blocks_are_classified_while_scanning(self):
+        markdown = "# Title\n\nSome text\nmore text\n\n- a\n- b\n\n1. one\n2. two\n\n> quoted\n> text"
+        self.assertEqual(
+            list(iter_blocks(markdown.split("\n"))),
+            [
+                Block(BlockType.HEADING, ["# Title"]),
+                Block(BlockType.PARAGRAPH, ["Some text", "more text"]),
+                Block(BlockType.ULIST, ["- a", "- b"]),
+                Block(BlockType.OLIST, ["1. one", "2. two"]),
+                Block(BlockType.QUOTE, ["> quoted", "> text"]),
+            ],
+        )
+
+    def test_broken_list_is_a_paragraph(self):
+        blocks = list(iter_blocks(["1. one", "3. three"]))
+        self.assertEqual(blocks, [Block(BlockType.PARAGRAPH, ["1. one", "3. three"])])
+
+    def test_fenced_code_keeps_blank_lines(self):
+        markdown = "```\nfirst\n\n    second\n```\n\nafter"
+        self.assertEqual(markdown_to_blocks(markdown), ["```\nfirst\n\n    second\n```", "after"])
+        self.assertEqual(
+            markdown_to_html_node(markdown).to_html(),
+            "<div><pre><code>first\n\n    second\n</code></pre><p>after</p></div>",
+        )
+
+    def test_unclosed_fence_runs_to_end(self):
+        blocks = list(iter_blocks(["```", "code", "", "more"]))
+        self.assertEqual(blocks, [Block(BlockType.CODE, ["```", "code", "", "more"])])
+
+    def test_reads_lines_from_a_file(self):
+        source = io.StringIO("# Title\r\n\r\n  Text with trailing space   \n")
+        self.assertEqual(
+            list(iter_blocks(source)),
+            [
+                Block(BlockType.HEADING, ["# Title"]),
+                Block(BlockType.PARAGRAPH, ["Text with trailing space"]),
+            ],
+        )
+
+    def test_blank_input(self):
+        self.assertEqual(markdown_to_blocks("\n\n\n"), [])
+
+
+class TestBlockRegistry(unittest.TestCase):
+    def setUp(self):
+        self.syntaxes = dict(block_markdown.SYNTAXES_BY_MARKER)
+        self.converters = dict(block_markdown.BLOCK_CONVERTERS)
+
+    def tearDown(self):
+        block_markdown.SYNTAXES_BY_MARKER = self.syntaxes
+        block_markdown.BLOCK_CONVERTERS = self.converters
+
+    def test_registered_block_type(self):
+        def convert(lines):
+            kind = lines[0][4:]
+            return ParentNode("div", [LeafNode("p", " ".join(lines[1:]))], {"class": f"admonition {kind}"})
+
+        admonition = register_block_type(
+            "admonition", "!", lambda line: line.startswith("!!! "), convert,
+            lambda line, line_number: line.startswith("    "),
+        )
+        markdown = "!!! note\n    Mind the\n    Balrog\n\n!!! warning\nnot indented\n\n! plain"
+        self.assertEqual(
+            [block.block_type for block in iter_blocks(markdown.split("\n"))],
+            [admonition, BlockType.PARAGRAPH, BlockType.PARAGRAPH],
+        )
+        self.assertEqual(
+            markdown_to_html_node("!!! note\n    Mind the Balrog").to_html(),
+            '<div><div class="admonition note"><p>    Mind the Balrog</p></div></div>',
+        )
+
+    def test_registration_can_take_over_a_marker(self):
+        checklist = register_block_type(
+            "checklist", "-", lambda line: line.startswith("- [ ] "), lambda lines: LeafNode("p", "todo")
+        )
+        self.assertEqual(block_to_block_type("- [ ] milk"), checklist)
+        self.assertEqual(block_to_block_type("- milk\n- bread"), BlockType.ULIST)
+
+
+if __name__ == "__main__":
+    unittest.main()
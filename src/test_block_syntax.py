@@ -0,0 +1,155 @@
+import unittest
+
+from block_markdown import BlockType, block_to_block_type, iter_blocks, iter_lines, markdown_to_html_node
+from gencontent import build_page_node
+
+
+def render(markdown):
+    return markdown_to_html_node(markdown).to_html()
+
+
+class TestTables(unittest.TestCase):
+    def test_table_with_alignment(self):
+        markdown = "| Name | Size | Note |\n| :--- | ---: | :-: |\n| a | **1** | `x\\|y` |\n| b | 2 |"
+        self.assertEqual(block_to_block_type(markdown), BlockType.TABLE)
+        self.assertEqual(
+            render(markdown),
+            "<div><table><thead><tr>"
+            '<th align="left">Name</th><th align="right">Size</th><th align="center">Note</th>'
+            "</tr></thead><tbody><tr>"
+            '<td align="left">a</td><td align="right"><b>1</b></td><td align="center"><code>x|y</code></td>'
+            "</tr><tr>"
+            '<td align="left">b</td><td align="right">2</td><td align="center"></td>'
+            "</tr></tbody></table></div>",
+        )
+
+    def test_header_only_table(self):
+        self.assertEqual(
+            render("a | b\n--- | ---"),
+            "<div><table><thead><tr><th>a</th><th>b</th></tr></thead></table></div>",
+        )
+        self.assertEqual(
+            render("|a|b|\n|-|-|"),
+            "<div><table><thead><tr><th>a</th><th>b</th></tr></thead></table></div>",
+        )
+
+    def test_without_outer_pipes(self):
+        markdown = "a | b\n--- | :---:\n1 | **2**\n| 3 | 4 |"
+        self.assertEqual(block_to_block_type(markdown), BlockType.TABLE)
+        self.assertEqual(
+            render(markdown),
+            "<div><table><thead><tr>"
+            '<th>a</th><th align="center">b</th>'
+            "</tr></thead><tbody><tr>"
+            '<td>1</td><td align="center"><b>2</b></td>'
+            "</tr><tr>"
+            '<td>3</td><td align="center">4</td>'
+            "</tr></tbody></table></div>",
+        )
+        self.assertEqual(
+            render("| a | b |\n--- | ---\n1 | 2"),
+            "<div><table><thead><tr><th>a</th><th>b</th></tr></thead>"
+            "<tbody><tr><td>1</td><td>2</td></tr></tbody></table></div>",
+        )
+
+    def test_lone_rule_is_not_a_delimiter_row(self):
+        self.assertEqual(block_to_block_type("a | b\n---"), BlockType.PARAGRAPH)
+        self.assertEqual(render("a | b\nc | d"), "<div><p>a | b c | d</p></div>")
+
+    def test_without_delimiter_row_is_a_paragraph(self):
+        self.assertEqual(block_to_block_type("| a |\n| b |"), BlockType.PARAGRAPH)
+        self.assertEqual(render("| just pipes |"), "<div><p>| just pipes |</p></div>")
+
+    def test_word_count_skips_pipes_and_delimiters(self):
+        metadata, _ = build_page_node("# T\n\n| one | two |\n| --- | --- |\n| three | four five |", "/")
+        self.assertEqual(metadata.word_count, 6)
+
+
+class TestNestedLists(unittest.TestCase):
+    def test_nested_lists(self):
+        markdown = "- a\n  - b\n    1. c\n    2. d\n  - e\n- f"
+        self.assertEqual(block_to_block_type(markdown), BlockType.ULIST)
+        self.assertEqual(
+            render(markdown),
+            "<div><ul><li>a<ul><li>b<ol><li>c</li><li>d</li></ol></li><li>e</li></ul></li><li>f</li></ul></div>",
+        )
+
+    def test_nested_numbering_does_not_break_the_outer_list(self):
+        self.assertEqual(
+            render("1. one\n   - x\n   - y\n2. two"),
+            "<div><ol><li>one<ul><li>x</li><li>y</li></ul></li><li>two</li></ol></div>",
+        )
+
+    def test_dedent_between_levels_stays_in_the_nested_list(self):
+        self.assertEqual(
+            render("- a\n    - b\n  - c\n- d"),
+            "<div><ul><li>a<ul><li>b</li><li>c</li></ul></li><li>d</li></ul></div>",
+        )
+        self.assertEqual(
+            render("- a\n    - b\n      - x\n  - c\n   - y"),
+            "<div><ul><li>a<ul><li>b<ul><li>x</li></ul></li><li>c<ul><li>y</li></ul></li></ul></li></ul></div>",
+        )
+
+    def test_uniformly_indented_blocks(self):
+        self.assertEqual(
+            render("  - indented first\n  - second"),
+            "<div><ul><li>indented first</li><li>second</li></ul></div>",
+        )
+        self.assertEqual(
+            render("  1. a\n  2. b\n     - c"),
+            "<div><ol><li>a</li><li>b<ul><li>c</li></ul></li></ol></div>",
+        )
+        self.assertEqual(render("  > a\n  > b"), "<div><blockquote>a b</blockquote></div>")
+
+    def test_continuation_lines_join_the_item(self):
+        self.assertEqual(
+            render("- first\n  continued _here_\n- second"),
+            "<div><ul><li>first continued <i>here</i></li><li>second</li></ul></div>",
+        )
+
+    def test_flat_lists_are_unchanged(self):
+        self.assertEqual(render("- a\n- b"), "<div><ul><li>a</li><li>b</li></ul></div>")
+        self.assertEqual(render("1. a\n2. b"), "<div><ol><li>a</li><li>b</li></ol></div>")
+        self.assertEqual(block_to_block_type("1. a\n3. b"), BlockType.PARAGRAPH)
+
+    def test_deep_nesting(self):
+        depth = 5000
+        markdown = "\n".join(" " * (2 * level) + f"- item {level}" for level in range(depth))
+        node = markdown_to_html_node(markdown).children[0]
+        levels = 0
+        while node is not None:
+            levels += 1
+            item = node.children[0]
+            node = item.children[-1] if item.children[-1].tag == "ul" else None
+        self.assertEqual(levels, depth)
+        metadata, _ = build_page_node("# T\n\n" + markdown, "/")
+        self.assertEqual(metadata.word_count, 2 * depth + 1)
+
+
+class TestFencedCode(unittest.TestCase):
+    def test_language_class(self):
+        self.assertEqual(
+            render("```python\nprint(1)\n```"),
+            '<div><pre><code class="language-python">print(1)\n</code></pre></div>',
+        )
+        self.assertEqual(
+            render("``` c++ extra\nx\n```"),
+            '<div><pre><code class="language-c++">x\n</code></pre></div>',
+        )
+
+    def test_no_language(self):
+        self.assertEqual(render("```\nx\n```"), "<div><pre><code>x\n</code></pre></div>")
+
+    def test_language_is_escaped_by_the_pattern(self):
+        self.assertEqual(render('```"><b>\nx\n```'), "<div><pre><code>x\n</code></pre></div>")
+
+    def test_scanner_types(self):
+        markdown = "| a |\n| - |\n\n- x\n  - y\n\n```js\n1\n```"
+        self.assertEqual(
+            [block.block_type for block in iter_blocks(iter_lines(markdown))],
+            [BlockType.TABLE, BlockType.ULIST, BlockType.CODE],
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,67 @@
+import os
+import tempfile
+import unittest
+
+from copystatic import sync_tree
+
+
+class TestSyncTree(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.source = os.path.join(self.tmp.name, "static")
+        self.dest = os.path.join(self.tmp.name, "docs")
+        self.write(os.path.join(self.source, "index.css"), "body {}")
+        self.write(os.path.join(self.source, "images", "a.png"), "png")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def write(self, path, text):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w") as f:
+            f.write(text)
+
+    def read(self, path):
+        with open(path) as f:
+            return f.read()
+
+    def test_copies_then_skips_unchanged_files(self):
+        result = sync_tree(self.source, self.dest)
+        self.assertEqual(len(result.copied), 2)
+        self.assertEqual(self.read(os.path.join(self.dest, "images", "a.png")), "png")
+        result = sync_tree(self.source, self.dest)
+        self.assertEqual(result.copied, [])
+        self.assertEqual(result.skipped, 2)
+
+    def test_recopies_changed_file(self):
+        sync_tree(self.source, self.dest)
+        self.write(os.path.join(self.source, "index.css"), "body { margin: 0 }")
+        result = sync_tree(self.source, self.dest, checksum=True)
+        self.assertEqual([os.path.basename(dest) for _, dest in result.copied], ["index.css"])
+        self.assertEqual(self.read(os.path.join(self.dest, "index.css")), "body { margin: 0 }")
+
+    def test_hardlink_mode(self):
+        sync_tree(self.source, self.dest, mode="hardlink")
+        self.assertTrue(os.path.samefile(
+            os.path.join(self.source, "index.css"),
+            os.path.join(self.dest, "index.css"),
+        ))
+
+    def test_reflink_mode_falls_back_to_copy(self):
+        sync_tree(self.source, self.dest, mode="reflink")
+        self.assertEqual(self.read(os.path.join(self.dest, "index.css")), "body {}")
+
+    def test_prune_removes_deleted_files(self):
+        sync_tree(self.source, self.dest)
+        os.remove(os.path.join(self.source, "images", "a.png"))
+        result = sync_tree(self.source, self.dest, prune=True)
+        self.assertEqual(result.pruned, [os.path.join(self.dest, "images", "a.png")])
+        self.assertFalse(os.path.exists(os.path.join(self.dest, "images")))
+
+    def test_invalid_mode(self):
+        with self.assertRaises(ValueError):
+            sync_tree(self.source, self.dest, mode="symlink")
+
+
+if __name__ == "__main__":
+    unittest.main()
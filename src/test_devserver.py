@@ -0,0 +1,112 @@
+import http.client
+import os
+import tempfile
+import threading
+import unittest
+
+from build import BuildConfig
+from devserver import RELOAD_PATH, clean_path, create_server
+
+
+class TestDevServer(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        root = self.tmp.name
+        self.content = os.path.join(root, "content")
+        self.static = os.path.join(root, "static")
+        self.template = os.path.join(root, "template.html")
+        self.write(self.template, "<html><body>{{ Content }}</body></html>")
+        self.write(os.path.join(self.content, "index.md"), "# Home")
+        self.write(os.path.join(self.content, "blog", "post.md"), "---\ndate: 2024-01-02\n---\n# Post\n\nHello.")
+        self.write(os.path.join(self.static, "index.css"), "body {}")
+        config = BuildConfig(self.content, self.template, self.static, os.path.join(root, "docs"))
+        self.server = create_server(config, port=0)
+        self.site = self.server.site
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+        self.tmp.cleanup()
+
+    def write(self, path, text):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w") as f:
+            f.write(text)
+
+    def get(self, path):
+        connection = http.client.HTTPConnection("127.0.0.1", self.server.server_port, timeout=5)
+        connection.request("GET", path)
+        response = connection.getresponse()
+        body = response.read().decode()
+        connection.close()
+        return response.status, body
+
+    def test_clean_path(self):
+        self.assertEqual(clean_path("/blog/%70ost.html?x=1"), "/blog/post.html")
+        self.assertEqual(clean_path("/blog/"), "/blog/")
+        self.assertEqual(clean_path("/../../etc/passwd"), "/etc/passwd")
+
+    def test_pages_are_rendered_on_request(self):
+        self.assertEqual(self.site.pages, {})
+        status, body = self.get("/")
+        self.assertEqual(status, 200)
+        self.assertTrue(body.startswith("<html><body><div><h1>Home</h1></div><script>"))
+        self.assertEqual(self.get("/blog/post.html")[0], 200)
+        self.assertEqual(len(self.site.pages), 2)
+        self.assertEqual(self.get("/index.css"), (200, "body {}"))
+        self.assertEqual(self.get("/missing.html")[0], 404)
+
+    def test_listings(self):
+        status, body = self.get("/blog/")
+        self.assertEqual(status, 200)
+        self.assertIn('<a href="/blog/post.html">Post</a><time datetime="2024-01-02">2024-01-02</time><p>Hello.</p>', body)
+        self.assertEqual(self.get("/blog")[0], 301)
+
+    def test_unknown_listing_urls_only_scan_headers(self):
+        self.assertEqual(self.get("/blog/page/9/")[0], 404)
+        self.assertEqual(self.get("/tags/missing")[0], 404)
+        self.assertIsNone(self.site.site_index)
+        self.assertEqual(len(self.site.header_index.pages), 2)
+        self.assertEqual(self.get("/blog/")[0], 200)
+        self.assertIsNotNone(self.site.site_index)
+
+    def test_pages_rendered_across_an_invalidation_are_not_kept(self):
+        source = os.path.join(self.content, "index.md")
+        template = self.site.template
+
+        def edit_while_rendering():
+            self.write(source, "# Changed")
+            self.site.invalidate({source})
+            return template()
+
+        self.site.template = edit_while_rendering
+        self.assertIn("<h1>Home</h1>", self.get("/")[1])
+        self.assertEqual(self.site.pages, {})
+        self.site.template = template
+        self.assertIn("<h1>Changed</h1>", self.get("/")[1])
+
+    def test_changes_invalidate_and_reload(self):
+        connection = http.client.HTTPConnection("127.0.0.1", self.server.server_port, timeout=5)
+        connection.request("GET", RELOAD_PATH)
+        events = connection.getresponse()
+        self.assertEqual(events.getheader("Content-Type"), "text/event-stream")
+        self.assertEqual(events.readline(), b"retry: 1000\n")
+        events.readline()
+
+        self.get("/")
+        self.get("/blog/post.html")
+        source = os.path.join(self.content, "index.md")
+        self.write(source, "# Changed")
+        self.site.invalidate({source})
+        self.assertEqual(events.readline(), b"data: reload\n")
+        connection.close()
+        self.assertEqual(list(self.site.pages), [os.path.normpath(os.path.join(self.content, "blog", "post.md"))])
+        self.assertIn("<h1>Changed</h1>", self.get("/")[1])
+
+        self.site.invalidate({self.template})
+        self.assertEqual(self.site.pages, {})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -12,6 +12,14 @@ class TestHTMLNode(unittest.TestCase):
         node = HTMLNode(tag="p")
         self.assertEqual(node.props_to_html(), "")
 
+    def test_props_are_stored_compactly(self):
+        """Test if props passed as a dict are stored as a tuple and render in order"""
+        node = HTMLNode(tag="img", props={"src": "/a.png", "alt": "a"})
+        self.assertEqual(node.props, (("src", "/a.png"), ("alt", "a")))
+        self.assertEqual(node.get_prop("alt"), "a")
+        self.assertEqual(node.get_prop("title"), None)
+        self.assertFalse(hasattr(node, "__dict__"))
+
     def test_repr(self):
         """Test if __repr__ gives a correct string representation of the object"""
         node = HTMLNode(tag="div", value="Hello", children=[], props={"class": "container"})
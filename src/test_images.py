@@ -0,0 +1,127 @@
+import os
+import struct
+import tempfile
+import unittest
+
+from build import BuildConfig, build_site
+from gencontent import build_page_node
+from imageresize import decode_png, encode_png
+from images import ImageInfo, ImageStore, SiteImages, image_size, parse_widths, scan_images
+
+
+def png_bytes(width, height):
+    rows = [bytearray(b for x in range(width) for b in (x * 10 % 256, y * 10 % 256, 128)) for y in range(height)]
+    return encode_png(width, height, 3, rows)
+
+
+class TestImageSize(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.dir = self.tmp.name
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def size_of(self, data):
+        path = os.path.join(self.dir, "image")
+        with open(path, "wb") as f:
+            f.write(data)
+        return image_size(path)
+
+    def test_png(self):
+        self.assertEqual(self.size_of(png_bytes(7, 3)), (7, 3))
+
+    def test_gif(self):
+        self.assertEqual(self.size_of(b"GIF89a" + struct.pack("<HH", 300, 200) + b"\0" * 30), (300, 200))
+
+    def test_jpeg(self):
+        app0 = b"\xff\xe0" + struct.pack(">H", 16) + b"JFIF\0" + b"\0" * 9
+        sof = b"\xff\xc0" + struct.pack(">HBHHB", 11, 8, 480, 640, 3) + b"\0" * 3
+        self.assertEqual(self.size_of(b"\xff\xd8" + app0 + sof + b"\xff\xd9"), (640, 480))
+
+    def test_webp(self):
+        vp8x = b"VP8X" + struct.pack("<I", 10) + b"\0" * 4 + (799).to_bytes(3, "little") + (599).to_bytes(3, "little")
+        self.assertEqual(self.size_of(b"RIFF" + struct.pack("<I", 30) + b"WEBP" + vp8x), (800, 600))
+
+    def test_unknown(self):
+        self.assertIsNone(self.size_of(b"not an image at all"))
+
+    def test_parse_widths(self):
+        self.assertEqual(parse_widths("960,480,960"), (480, 960))
+        with self.assertRaises(ValueError):
+            parse_widths("wide")
+
+
+class TestImageVariants(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.dir = self.tmp.name
+        self.static_dir = os.path.join(self.dir, "static")
+        os.makedirs(os.path.join(self.static_dir, "images"))
+        with open(os.path.join(self.static_dir, "images", "photo.png"), "wb") as f:
+            f.write(png_bytes(40, 20))
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_resized_variants_are_stored_once(self):
+        store = ImageStore(os.path.join(self.dir, "store"))
+        images, variants = scan_images(self.static_dir, store=store, widths=(10, 80))
+        self.assertEqual(images.images["/images/photo.png"], ImageInfo(40, 20, [("/images/photo-10w.png", 10)]))
+        stored, url, _ = variants[0]
+        self.assertEqual(url, "/images/photo-10w.png")
+        with open(stored, "rb") as f:
+            width, height, channels, rows = decode_png(f.read())
+        self.assertEqual((width, height, channels), (10, 5, 3))
+        # the average of a 4x4 block of the gradient
+        self.assertEqual(rows[0][:3], bytearray((15, 15, 128)))
+
+        mtime = os.stat(stored).st_mtime_ns
+        self.assertEqual(scan_images(self.static_dir, store=store, widths=(10,))[1], variants)
+        self.assertEqual(os.stat(stored).st_mtime_ns, mtime)
+
+    def test_annotate(self):
+        images = SiteImages({"/images/photo.png": ImageInfo(40, 20, [("/images/photo-10w.png", 10)])})
+        _, node = build_page_node("# Photo\n\n![a photo](/images/photo.png) ![other](/other.png)", "/base/", images=images)
+        self.assertEqual(
+            node.to_html(),
+            '<div><h1>Photo</h1><p><img src="/base/images/photo.png" alt="a photo" width="40" height="20" '
+            'srcset="/base/images/photo-10w.png 10w, /base/images/photo.png 40w"></img> '
+            '<img src="/base/other.png" alt="other"></img></p></div>',
+        )
+
+    def test_build_adds_dimensions_and_rebuilds_when_they_change(self):
+        content_dir = os.path.join(self.dir, "content")
+        os.makedirs(content_dir)
+        template_path = os.path.join(self.dir, "template.html")
+        with open(template_path, "w") as f:
+            f.write("{{ Content }}")
+        with open(os.path.join(content_dir, "index.md"), "w") as f:
+            f.write("# Home\n\n![photo](/images/photo.png)")
+        config = BuildConfig(
+            content_dir=content_dir,
+            template_path=template_path,
+            static_dir=self.static_dir,
+            dest_dir=os.path.join(self.dir, "docs"),
+            incremental=True,
+            manifest_path=os.path.join(self.dir, "manifest.json"),
+            site_index_path=os.path.join(self.dir, "site-index.json"),
+            image_widths=(20,),
+            image_store_dir=os.path.join(self.dir, "store"),
+        )
+        build_site(config)
+        index = os.path.join(config.dest_dir, "index.html")
+        with open(index) as f:
+            self.assertIn('width="40" height="20" srcset="/images/photo-20w.png 20w', f.read())
+        self.assertTrue(os.path.exists(os.path.join(config.dest_dir, "images", "photo-20w.png")))
+
+        with open(os.path.join(self.static_dir, "images", "photo.png"), "wb") as f:
+            f.write(png_bytes(16, 16))
+        build_site(config)
+        with open(index) as f:
+            self.assertIn('width="16" height="16">', f.read())
+        self.assertFalse(os.path.exists(os.path.join(config.dest_dir, "images", "photo-20w.png")))
+
+
+if __name__ == "__main__":
+    unittest.main()
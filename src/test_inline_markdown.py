@@ -1,6 +1,6 @@
 import unittest
 
-from textnode import TextNode, TextType
+from textnode import TextNode, TextType, text_node_to_html_node
 from inline_markdown import *
 
 
@@ -335,5 +335,60 @@ class TestInlineMarkdown(unittest.TestCase):
         self.assertEqual(text_to_textnodes(text), expected)
 
 
+class TestInlineTokenizer(unittest.TestCase):
+
+    def test_mixed_inline_markdown(self):
+        text = "A **bold** word, an _italic_ one, `code`, ![img](/a.png) and [a link](/b)"
+        expected = [
+            TextNode("A ", TextType.TEXT),
+            TextNode("bold", TextType.BOLD),
+            TextNode(" word, an ", TextType.TEXT),
+            TextNode("italic", TextType.ITALIC),
+            TextNode(" one, ", TextType.TEXT),
+            TextNode("code", TextType.CODE),
+            TextNode(", ", TextType.TEXT),
+            TextNode("img", TextType.IMAGE, "/a.png"),
+            TextNode(" and ", TextType.TEXT),
+            TextNode("a link", TextType.LINK, "/b"),
+        ]
+        self.assertEqual(text_to_textnodes(text), expected)
+
+    def test_underscores_in_link_url(self):
+        text = "see [docs](https://example.com/some_long_path)"
+        expected = [
+            TextNode("see ", TextType.TEXT),
+            TextNode("docs", TextType.LINK, "https://example.com/some_long_path"),
+        ]
+        self.assertEqual(text_to_textnodes(text), expected)
+
+    def test_bold_inside_link(self):
+        text = "[a **bold** link](/x)"
+        expected = [
+            TextNode(
+                "a bold link",
+                TextType.LINK,
+                "/x",
+                [
+                    TextNode("a ", TextType.TEXT),
+                    TextNode("bold", TextType.BOLD),
+                    TextNode(" link", TextType.TEXT),
+                ],
+            )
+        ]
+        self.assertEqual(text_to_textnodes(text), expected)
+        self.assertEqual(
+            text_node_to_html_node(expected[0]).to_html(),
+            '<a href="/x">a <b>bold</b> link</a>',
+        )
+
+    def test_unclosed_delimiter_raises(self):
+        with self.assertRaises(ValueError):
+            text_to_textnodes("This is **broken")
+
+    def test_lone_bracket_is_text(self):
+        text = "a [b and !c"
+        self.assertEqual(text_to_textnodes(text), [TextNode(text, TextType.TEXT)])
+
+
 if __name__ == "__main__":
     unittest.main()
\ No newline at end of file
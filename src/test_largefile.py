@@ -0,0 +1,63 @@
+import io
+import mmap
+import os
+import tempfile
+import unittest
+
+from gencontent import build_page_node
+from htmlnode import iter_html
+from largefile import MappedContent, MappedLines
+from template import Template
+
+CONTENT_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "content")
+
+
+class TestLargeFile(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.dir = self.tmp.name
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def mapped(self, markdown):
+        path = os.path.join(self.dir, "page.md")
+        with open(path, "w") as f:
+            f.write(markdown)
+        with open(path, "rb") as f:
+            return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+    def assert_same_page(self, markdown, basepath="/", minify=False):
+        metadata, node = build_page_node(markdown, basepath, minify=minify)
+        with self.mapped(markdown) as mapped:
+            content = MappedContent(mapped, basepath, minify=minify)
+            out = io.StringIO()
+            Template("{{ Title }}|{{ Content }}", basepath, minify).write(out, Title=content.title, Content=content)
+            self.assertEqual(out.getvalue(), f"{metadata.title}|{''.join(iter_html(node, minify))}")
+            self.assertEqual(content.metadata(), metadata)
+
+    def test_lines_keep_their_endings(self):
+        with self.mapped("é one\r\ntwo\n\nthree") as mapped:
+            self.assertEqual(list(MappedLines(mapped)), ["é one\r\n", "two\n", "\n", "three"])
+
+    def test_matches_the_in_memory_render(self):
+        for root, _, filenames in os.walk(CONTENT_DIR):
+            for filename in filenames:
+                with open(os.path.join(root, filename)) as f:
+                    markdown = f.read()
+                for minify in (False, True):
+                    with self.subTest(filename=filename, minify=minify):
+                        self.assert_same_page(markdown, "/base/", minify)
+
+    def test_front_matter_and_late_title(self):
+        self.assert_same_page("---\ntags: [a]\n---\nIntro text.\n\n```\n# not a title\n```\n\n# Title\n\n- item")
+        self.assert_same_page("+++\ntitle = \"Front\"\n+++\nJust a paragraph.\n\nAnother one.", minify=True)
+
+    def test_missing_title(self):
+        with self.mapped("no heading here") as mapped:
+            with self.assertRaises(ValueError):
+                MappedContent(mapped, "/")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,129 @@
+import os
+import tempfile
+import unittest
+
+from build import BuildConfig, build_site
+from gencontent import build_page_node
+from links import LinkIndex, check_links
+from metadata import PageMetadata
+from render_cache import RenderCache
+
+
+class TestLinkIndex(unittest.TestCase):
+    def setUp(self):
+        self.index = LinkIndex()
+        for rel_path in ("index.html", "blog/post.html", "blog/index.html", "images/a b.png"):
+            self.index.add(rel_path)
+
+    def test_pages_answer_to_their_pretty_urls(self):
+        for url in ("/", "/index.html", "/blog/post", "/blog/post.html", "/blog/", "/blog", "/images/a b.png"):
+            self.assertIn(url, self.index)
+        self.assertNotIn("/blog/post/", self.index)
+
+    def test_resolve(self):
+        resolve = self.index.resolve
+        self.assertEqual(resolve("/blog/post#top", "/"), "/blog/post")
+        self.assertEqual(resolve("post.html?x=1", "/blog/"), "/blog/post.html")
+        self.assertEqual(resolve("../images/a%20b.png", "/blog/post.html"), "/images/a b.png")
+        self.assertEqual(resolve("./", "/blog/post.html"), "/blog/")
+        for link in ("https://example.org/", "//cdn.example.org/x.js", "mailto:a@example.org", "#top", ""):
+            self.assertIsNone(resolve(link, "/"))
+
+    def test_check_links(self):
+        pages = [
+            PageMetadata("Home", url="/", links=["/blog/post", "https://example.org", "/missing"]),
+            PageMetadata("Post", url="/blog/post.html", links=["../images/a b.png", "gone.png", "gone.png"]),
+        ]
+        report = check_links(pages, self.index)
+        self.assertEqual(report.checked, 5)
+        self.assertEqual(report.broken, {"/": ["/missing"], "/blog/post.html": ["gone.png"]})
+        self.assertEqual(report.broken_count(), 2)
+        self.assertIn("Checked 5 internal links, 2 broken", report.summary())
+
+
+class TestLinkCollection(unittest.TestCase):
+    MARKDOWN = (
+        "# Title [home](/)\n\n"
+        "A paragraph long enough to go through the render cache, linking [a post](/blog/post) "
+        "and showing ![an image](/images/a.png).\n\n"
+        "```\n[not a link](/code)\n```\n\n"
+        "- [item](item.html)"
+    )
+    LINKS = ("/", "/blog/post", "/images/a.png", "item.html")
+
+    def test_links_are_collected_while_parsing(self):
+        metadata, _ = build_page_node(self.MARKDOWN, "/base/")
+        self.assertEqual(metadata.links, self.LINKS)
+
+    def test_cache_hits_keep_their_links(self):
+        cache = RenderCache(min_block_size=0)
+        first, first_node = build_page_node(self.MARKDOWN, "/base/", cache)
+        second, second_node = build_page_node(self.MARKDOWN, "/base/", cache)
+        self.assertGreater(cache.stats["hits"], 0)
+        self.assertEqual(first.links, self.LINKS)
+        self.assertEqual(second.links, self.LINKS)
+        self.assertEqual(first_node.to_html(), second_node.to_html())
+
+    def test_links_round_trip(self):
+        metadata = PageMetadata("T", url="/", links=["/a"])
+        self.assertEqual(PageMetadata.from_dict(metadata.to_dict()).links, ("/a",))
+
+
+class TestLinkCheckBuild(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.dir = self.tmp.name
+        self.content_dir = os.path.join(self.dir, "content")
+        self.static_dir = os.path.join(self.dir, "static")
+        os.makedirs(os.path.join(self.static_dir, "images"))
+        with open(os.path.join(self.static_dir, "images", "a.png"), "wb") as f:
+            f.write(b"not really a png")
+        self.template_path = os.path.join(self.dir, "template.html")
+        with open(self.template_path, "w") as f:
+            f.write("{{ Content }}")
+        self.write("index.md", "# Home\n\n[Post](/blog/post) ![a](/images/a.png) [Tags](/tags/)")
+        self.write("blog/post.md", "---\ntags: [x]\n---\n# Post\n\n[Home](../index.html) [Other](other)")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def write(self, rel_path, text):
+        path = os.path.join(self.content_dir, rel_path)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w") as f:
+            f.write(text)
+
+    def config(self, **options):
+        return BuildConfig(
+            content_dir=self.content_dir,
+            template_path=self.template_path,
+            static_dir=self.static_dir,
+            dest_dir=os.path.join(self.dir, "docs"),
+            manifest_path=os.path.join(self.dir, "manifest.json"),
+            site_index_path=os.path.join(self.dir, "site-index.json"),
+            check_links=True,
+            **options,
+        )
+
+    def test_broken_links_fail_the_build(self):
+        with self.assertRaisesRegex(ValueError, "1 broken links"):
+            build_site(self.config())
+        self.write("blog/other.md", "# Other")
+        build_site(self.config())
+
+    def test_incremental_build_checks_unchanged_pages(self):
+        self.write("blog/other.md", "# Other")
+        config = self.config(incremental=True)
+        build_site(config)
+        # no page is rendered again, their links come from the site index
+        os.remove(os.path.join(self.content_dir, "blog", "other.md"))
+        with self.assertRaisesRegex(ValueError, "1 broken links"):
+            build_site(config)
+
+    def test_parallel_build(self):
+        with self.assertRaisesRegex(ValueError, "1 broken links"):
+            build_site(self.config(jobs=2))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,62 @@
+import os
+import tempfile
+import unittest
+
+from manifest import Manifest
+
+
+class TestManifest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.dir = self.tmp.name
+        self.manifest_path = os.path.join(self.dir, "manifest.json")
+        self.source = os.path.join(self.dir, "page.md")
+        self.output = os.path.join(self.dir, "page.html")
+        with open(self.source, "w") as f:
+            f.write("# Page")
+        with open(self.output, "w") as f:
+            f.write("<h1>Page</h1>")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_unknown_output_is_stale(self):
+        manifest = Manifest(self.manifest_path)
+        self.assertFalse(manifest.is_fresh(self.output, [self.source]))
+
+    def test_recorded_output_is_fresh_after_reload(self):
+        manifest = Manifest(self.manifest_path)
+        manifest.record(self.output, [self.source])
+        manifest.save()
+        manifest = Manifest.load(self.manifest_path)
+        self.assertTrue(manifest.is_fresh(self.output, [self.source]))
+
+    def test_changed_source_is_stale(self):
+        manifest = Manifest(self.manifest_path)
+        manifest.record(self.output, [self.source])
+        manifest.save()
+        with open(self.source, "w") as f:
+            f.write("# Changed page")
+        manifest = Manifest.load(self.manifest_path)
+        self.assertFalse(manifest.is_fresh(self.output, [self.source]))
+
+    def test_missing_output_is_stale(self):
+        manifest = Manifest(self.manifest_path)
+        manifest.record(self.output, [self.source])
+        manifest.save()
+        os.remove(self.output)
+        manifest = Manifest.load(self.manifest_path)
+        self.assertFalse(manifest.is_fresh(self.output, [self.source]))
+
+    def test_orphans(self):
+        manifest = Manifest(self.manifest_path)
+        manifest.record(self.output, [self.source])
+        manifest.save()
+        manifest = Manifest.load(self.manifest_path)
+        self.assertEqual(manifest.orphans(), [os.path.normpath(self.output)])
+        manifest.record(self.output, [self.source])
+        self.assertEqual(manifest.orphans(), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
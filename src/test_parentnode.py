@@ -1,5 +1,7 @@
+import io
+import sys
 import unittest
-from htmlnode import LeafNode, ParentNode
+from htmlnode import LeafNode, ParentNode, RawNode, iter_html
 
 
 class TestParentNode(unittest.TestCase):
@@ -28,5 +30,68 @@ class TestParentNode(unittest.TestCase):
         parent = ParentNode("section", [child], {"class": "container"})
         self.assertEqual(parent.to_html(), '<section class="container"><p>Hello</p></section>')
 
+    def test_deep_nesting_does_not_recurse(self):
+        """Test if very deep trees render without hitting the recursion limit"""
+        depth = sys.getrecursionlimit() * 2
+        node = LeafNode("b", "deep")
+        for _ in range(depth):
+            node = ParentNode("span", [node])
+        html = node.to_html()
+        self.assertTrue(html.startswith("<span>" * depth + "<b>deep</b>"))
+        self.assertTrue(html.endswith("</span>" * depth))
+
+    def test_write_html_streams_to_file_object(self):
+        """Test if write_html writes the same markup as to_html"""
+        parent = ParentNode("ul", [
+            ParentNode("li", [LeafNode(None, "one "), LeafNode("i", "two")]),
+            ParentNode("li", [LeafNode("a", "three", {"href": "/3"})]),
+        ])
+        out = io.StringIO()
+        parent.write_html(out)
+        self.assertEqual(out.getvalue(), parent.to_html())
+        self.assertEqual(
+            out.getvalue(),
+            '<ul><li>one <i>two</i></li><li><a href="/3">three</a></li></ul>',
+        )
+
+    def test_invalid_child_raises(self):
+        """Test if an invalid nested node raises while serializing"""
+        parent = ParentNode("div", [ParentNode("p", None)])
+        with self.assertRaises(ValueError):
+            parent.to_html()
+
+class TestMinifiedHTML(unittest.TestCase):
+    def minify(self, node):
+        return "".join(iter_html(node, minify=True))
+
+    def test_collapses_whitespace_outside_pre(self):
+        node = ParentNode("div", [
+            ParentNode("p", [LeafNode(None, "some\n   text "), LeafNode("b", "bold  words")]),
+            ParentNode("pre", [LeafNode("code", "keep\n    this")]),
+            RawNode("<p>raw\n  html</p>"),
+        ])
+        self.assertEqual(
+            self.minify(node),
+            "<div><p>some text <b>bold words</b><pre><code>keep\n    this</code></pre><p>raw\n  html</p></div>",
+        )
+
+    def test_optional_end_tags(self):
+        node = ParentNode("div", [
+            ParentNode("ul", [LeafNode("li", "one"), LeafNode("li", "two")]),
+            LeafNode("p", "before text"),
+            LeafNode(None, "text"),
+            ParentNode("a", [LeafNode("p", "in a link")]),
+            LeafNode("p", "last"),
+        ])
+        self.assertEqual(
+            self.minify(node),
+            "<div><ul><li>one<li>two</ul><p>before text</p>text<a><p>in a link</p></a><p>last</div>",
+        )
+
+    def test_matches_plain_output_when_nothing_to_strip(self):
+        node = ParentNode("div", [ParentNode("h1", [LeafNode(None, "Title")])])
+        self.assertEqual(self.minify(node), node.to_html())
+
+
 if __name__ == "__main__":
     unittest.main()
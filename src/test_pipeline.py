@@ -0,0 +1,86 @@
+import os
+import tempfile
+import threading
+import unittest
+
+from pipeline import generate_pages_pipelined
+from render_cache import RenderCache
+
+
+class TestPipeline(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.dir = self.tmp.name
+        self.template_path = os.path.join(self.dir, "template.html")
+        with open(self.template_path, "w") as f:
+            f.write("<title>{{ Title }}</title>{{ Content }}")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def make_pages(self, count):
+        pages = []
+        for i in range(count):
+            from_path = os.path.join(self.dir, f"page{i}.md")
+            with open(from_path, "w") as f:
+                f.write(f"# Page {i}\n\n[home](/)")
+            pages.append((from_path, os.path.join(self.dir, "out", f"page{i}", "index.html")))
+        return pages
+
+    def read(self, path):
+        with open(path) as f:
+            return f.read()
+
+    def test_renders_all_pages_through_small_queues(self):
+        pages = self.make_pages(10)
+        failures = generate_pages_pipelined(
+            pages, self.template_path, "/site/", io_threads=2, queue_size=1
+        )
+        self.assertEqual(failures, [])
+        self.assertEqual(
+            self.read(pages[7][1]),
+            '<title>Page 7</title><div><h1>Page 7</h1><p><a href="/site/">home</a></p></div>',
+        )
+
+    def test_render_stage_on_process_pool(self):
+        pages = self.make_pages(4)
+        cache = RenderCache(min_block_size=0)
+        failures = generate_pages_pipelined(pages, self.template_path, "/", jobs=2, cache=cache)
+        self.assertEqual(failures, [])
+        self.assertEqual(cache.stats["misses"] + cache.stats["hits"], 8)
+        for _, dest_path in pages:
+            self.assertTrue(os.path.exists(dest_path))
+
+    def test_failures_are_reported_in_page_order(self):
+        pages = self.make_pages(3)
+        missing = (os.path.join(self.dir, "missing.md"), os.path.join(self.dir, "missing.html"))
+        bad = os.path.join(self.dir, "bad.md")
+        with open(bad, "w") as f:
+            f.write("# Bad\n\n**unclosed")
+        pages = [missing] + pages + [(bad, os.path.join(self.dir, "bad.html"))]
+        failures = generate_pages_pipelined(pages, self.template_path, "/")
+        self.assertEqual([from_path for from_path, _ in failures], [missing[0], bad])
+
+    def test_undecodable_page_fails_without_hanging(self):
+        pages = self.make_pages(2)
+        binary = os.path.join(self.dir, "binary.md")
+        with open(binary, "wb") as f:
+            f.write(b"\xff\xfe# not utf-8")
+        pages.insert(1, (binary, os.path.join(self.dir, "binary.html")))
+        for jobs in (1, 2):
+            results = []
+
+            def build():
+                results.append(generate_pages_pipelined(pages, self.template_path, "/", jobs=jobs))
+
+            # a lost page used to leave the render loop waiting forever
+            thread = threading.Thread(target=build, daemon=True)
+            thread.start()
+            thread.join(30)
+            self.assertFalse(thread.is_alive())
+            self.assertEqual([from_path for from_path, _ in results[0]], [binary])
+            self.assertIn("UnicodeDecodeError", results[0][0][1])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,99 @@
+import gzip
+import os
+import tempfile
+import unittest
+
+from build import BuildConfig, build_site
+from manifest import Manifest
+from precompress import Precompressor, precompress_outputs
+
+
+class TestPrecompress(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.dir = self.tmp.name
+        self.precompressor = Precompressor(["gzip"], min_size=100)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def write(self, name, text):
+        path = os.path.join(self.dir, name)
+        with open(path, "w") as f:
+            f.write(text)
+        return path
+
+    def test_writer_compresses_while_writing(self):
+        path = os.path.join(self.dir, "page.html")
+        writer = self.precompressor.writer(path)
+        writer.writelines(["<p>", "é" * 200, "</p>"] * 1000)
+        self.assertEqual(writer.commit(), [path + ".gz"])
+        with open(path, "rb") as f, gzip.open(path + ".gz") as compressed:
+            self.assertEqual(f.read(), compressed.read())
+
+    def test_small_files_lose_their_variants(self):
+        path = self.write("small.css", "a" * 200)
+        self.assertEqual(self.precompressor.compress_file(path), [path + ".gz"])
+        self.write("small.css", "a")
+        self.assertEqual(self.precompressor.compress_file(path), [])
+        self.assertFalse(os.path.exists(path + ".gz"))
+
+    def test_unchanged_outputs_are_reused(self):
+        manifest_path = os.path.join(self.dir, "manifest.json")
+        css = self.write("site.css", "body { color: red; }\n" * 20)
+        image = self.write("image.png", "x" * 200)
+
+        def run():
+            manifest = Manifest.load(manifest_path)
+            manifest.record(css, [])
+            manifest.record(image, [])
+            compressed = precompress_outputs(manifest, self.precompressor)
+            manifest.save()
+            return compressed, manifest
+
+        self.assertEqual(run()[0], 1)
+        self.assertFalse(os.path.exists(image + ".gz"))
+        compressed, manifest = run()
+        self.assertEqual(compressed, 0)
+        self.assertEqual(manifest.orphans(), [])
+        self.write("site.css", "body { color: blue; }\n" * 20)
+        self.assertEqual(run()[0], 1)
+        with gzip.open(css + ".gz", "rt") as f:
+            self.assertIn("blue", f.read())
+
+    def test_build_writes_variants_for_pages(self):
+        content_dir = os.path.join(self.dir, "content")
+        os.makedirs(os.path.join(content_dir, "blog"))
+        os.makedirs(os.path.join(self.dir, "static"))
+        template_path = self.write("template.html", "<html>{{ Title }}{{ Content }}</html>")
+        with open(os.path.join(content_dir, "index.md"), "w") as f:
+            f.write("# Home\n\n" + "Some words here. " * 100)
+        with open(os.path.join(content_dir, "blog", "short.md"), "w") as f:
+            f.write("# Short")
+        config = BuildConfig(
+            content_dir=content_dir,
+            template_path=template_path,
+            static_dir=os.path.join(self.dir, "static"),
+            dest_dir=os.path.join(self.dir, "docs"),
+            incremental=True,
+            manifest_path=os.path.join(self.dir, "manifest.json"),
+            site_index_path=os.path.join(self.dir, "site-index.json"),
+            precompress=True,
+            precompress_min_size=500,
+        )
+        build_site(config)
+        index = os.path.join(config.dest_dir, "index.html")
+        with open(index, "rb") as f, gzip.open(index + ".gz") as compressed:
+            self.assertEqual(f.read(), compressed.read())
+        self.assertFalse(os.path.exists(os.path.join(config.dest_dir, "blog", "short.html.gz")))
+        mtime = os.stat(index + ".gz").st_mtime_ns
+        build_site(config)
+        self.assertEqual(os.stat(index + ".gz").st_mtime_ns, mtime)
+
+        config.precompress = False
+        build_site(config)
+        self.assertFalse(os.path.exists(index + ".gz"))
+
+
+if __name__ == "__main__":
+    unittest.main()
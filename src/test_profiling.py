@@ -0,0 +1,83 @@
+import json
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+from build import BuildConfig, build_site
+from gencontent import write_page
+from profiling import PAGE_STAGES, BuildProfiler
+from render_cache import RenderCache
+from template import Template
+
+
+class TestProfiling(unittest.TestCase):
+    def test_write_page_times_every_stage(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            from_path = os.path.join(tmp, "index.md")
+            dest_path = os.path.join(tmp, "out", "index.html")
+            with open(from_path, "w") as f:
+                f.write("# Title\n\nSome **bold** text\n\n- a\n- b")
+            profiler = BuildProfiler(os.path.join(tmp, "profile.json"))
+            profiler.start()
+            cache = RenderCache(min_block_size=0)
+            write_page(from_path, Template("{{ Content }}"), dest_path, "/", cache, timer=profiler.page(from_path))
+            profiler.stop()
+            profiler.save()
+
+            # the profiled page goes through the render cache like any other
+            self.assertGreater(cache.stats["misses"], 0)
+            with open(dest_path) as f:
+                self.assertTrue(f.read().startswith("<div><h1>Title</h1>"))
+            with open(profiler.report_path) as f:
+                report = json.load(f)
+            self.assertEqual(set(report["pages"][from_path]), set(PAGE_STAGES))
+            self.assertIn("total", report["build"])
+            self.assertIn(from_path, profiler.summary())
+
+    def test_mapped_page_times_the_same_stages(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            from_path = os.path.join(tmp, "big.md")
+            dest_path = os.path.join(tmp, "out", "big.html")
+            with open(from_path, "w") as f:
+                f.write("# Title\n\nSome **bold** text\n\n- a\n- b")
+            profiler = BuildProfiler(os.path.join(tmp, "profile.json"))
+            # every page counts as large, so it is rendered from the mapped file
+            with mock.patch("gencontent.LARGE_FILE_SIZE", 0):
+                write_page(from_path, Template("{{ Content }}"), dest_path, "/", timer=profiler.page(from_path))
+
+            with open(dest_path) as f:
+                self.assertTrue(f.read().startswith("<div><h1>Title</h1>"))
+            # the mapped path has no separate read, the file is decoded block by block
+            self.assertEqual(set(profiler.pages[from_path].wall), set(PAGE_STAGES) - {"read"})
+
+    def test_profiled_build(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            content_dir = os.path.join(tmp, "content")
+            os.makedirs(content_dir)
+            os.makedirs(os.path.join(tmp, "static"))
+            with open(os.path.join(content_dir, "index.md"), "w") as f:
+                f.write("# Home\n\nWelcome.")
+            template_path = os.path.join(tmp, "template.html")
+            with open(template_path, "w") as f:
+                f.write("{{ Title }}: {{ Content }}")
+            config = BuildConfig(
+                content_dir=content_dir,
+                template_path=template_path,
+                static_dir=os.path.join(tmp, "static"),
+                dest_dir=os.path.join(tmp, "docs"),
+                manifest_path=os.path.join(tmp, "manifest.json"),
+                site_index_path=os.path.join(tmp, "site-index.json"),
+                profile_path=os.path.join(tmp, "profile.json"),
+            )
+            build_site(config)
+
+            with open(os.path.join(config.dest_dir, "index.html")) as f:
+                self.assertTrue(f.read().startswith("Home: <div>"))
+            with open(config.profile_path) as f:
+                report = json.load(f)
+            self.assertEqual(len(report["pages"]), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
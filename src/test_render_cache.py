@@ -0,0 +1,77 @@
+import os
+import tempfile
+import unittest
+
+from block_markdown import BlockType, markdown_to_html_node
+from htmlnode import iter_html
+from render_cache import RenderCache
+
+DISCLAIMER = "This page is **not** affiliated with the [Tolkien Estate](/estate) in any way."
+
+
+class TestRenderCache(unittest.TestCase):
+    def test_repeated_blocks_hit_the_cache(self):
+        cache = RenderCache(min_block_size=0)
+        markdown = f"# Title\n\n{DISCLAIMER}\n\n{DISCLAIMER}"
+        node = markdown_to_html_node(markdown, cache.converter("/"))
+        self.assertEqual(node.to_html(), markdown_to_html_node(markdown).to_html())
+        self.assertEqual(cache.stats["hits"], 1)
+        self.assertEqual(cache.stats["misses"], 2)
+
+    def test_links_are_rewritten_before_caching(self):
+        cache = RenderCache(min_block_size=0)
+        convert = cache.converter("/site/")
+        first = convert(BlockType.PARAGRAPH, [DISCLAIMER]).to_html()
+        second = convert(BlockType.PARAGRAPH, [DISCLAIMER]).to_html()
+        self.assertIn('href="/site/estate"', first)
+        self.assertEqual(first, second)
+        other = cache.converter("/")(BlockType.PARAGRAPH, [DISCLAIMER]).to_html()
+        self.assertIn('href="/estate"', other)
+
+    def test_minified_fragments_match_uncached_output(self):
+        cache = RenderCache(min_block_size=0)
+        markdown = f"# Title\n\n{DISCLAIMER}\n\n- one\n- two\n\n{DISCLAIMER}"
+        cached = markdown_to_html_node(markdown, cache.converter("/", minify=True))
+        plain = markdown_to_html_node(markdown)
+        self.assertEqual("".join(iter_html(cached, True)), "".join(iter_html(plain, True)))
+        self.assertEqual(cache.stats["misses"], 3)
+        cache.converter("/")(BlockType.PARAGRAPH, [DISCLAIMER])
+        self.assertEqual(cache.stats["misses"], 4)
+
+    def test_small_blocks_bypass_the_cache(self):
+        cache = RenderCache(min_block_size=64)
+        cache.converter("/")(BlockType.HEADING, ["# Short"])
+        self.assertEqual(cache.stats["misses"], 0)
+        self.assertEqual(len(cache.entries), 0)
+
+    def test_memory_limit_evicts_least_recently_used(self):
+        cache = RenderCache(max_bytes=10)
+        cache.put("a", "12345")
+        cache.put("b", "12345")
+        cache.get("a")
+        cache.put("c", "12345")
+        self.assertEqual(list(cache.entries), ["a", "c"])
+        self.assertEqual(cache.stats["evictions"], 1)
+
+    def test_disk_tier_survives_new_cache(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            RenderCache(cache_dir=tmp).put("abcdef", "<p>cached</p>")
+            cache = RenderCache(cache_dir=tmp)
+            self.assertEqual(cache.get("abcdef"), "<p>cached</p>")
+            self.assertEqual(cache.stats["disk_hits"], 1)
+            self.assertEqual(cache.get("abcdef"), "<p>cached</p>")
+            self.assertEqual(cache.stats["hits"], 1)
+
+    def test_prune_disk(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            cache = RenderCache(cache_dir=tmp, max_disk_bytes=10)
+            cache.put("aa1", "123456")
+            os.utime(cache._disk_path("aa1"), (1, 1))
+            cache.put("aa2", "123456")
+            cache.prune_disk()
+            self.assertFalse(os.path.exists(cache._disk_path("aa1")))
+            self.assertTrue(os.path.exists(cache._disk_path("aa2")))
+
+
+if __name__ == "__main__":
+    unittest.main()
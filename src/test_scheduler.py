@@ -0,0 +1,51 @@
+import os
+import tempfile
+import unittest
+
+from scheduler import generate_pages_parallel
+
+
+class TestGeneratePagesParallel(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.dir = self.tmp.name
+        self.template_path = os.path.join(self.dir, "template.html")
+        with open(self.template_path, "w") as f:
+            f.write("<title>{{ Title }}</title>{{ Content }}")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def write_source(self, name, markdown):
+        path = os.path.join(self.dir, name)
+        with open(path, "w") as f:
+            f.write(markdown)
+        return path
+
+    def test_renders_every_page(self):
+        pages = []
+        for i in range(6):
+            from_path = self.write_source(f"page{i}.md", f"# Page {i}\n\nText **{i}**")
+            pages.append((from_path, os.path.join(self.dir, "out", f"page{i}.html")))
+        failures = generate_pages_parallel(pages, self.template_path, "/", 3)
+        self.assertEqual(failures, [])
+        with open(pages[4][1]) as f:
+            self.assertEqual(
+                f.read(),
+                "<title>Page 4</title><div><h1>Page 4</h1><p>Text <b>4</b></p></div>",
+            )
+
+    def test_reports_failures_per_page(self):
+        good = self.write_source("good.md", "# Good")
+        bad = self.write_source("bad.md", "# Bad\n\nunclosed **bold")
+        pages = [
+            (good, os.path.join(self.dir, "good.html")),
+            (bad, os.path.join(self.dir, "bad.html")),
+        ]
+        failures = generate_pages_parallel(pages, self.template_path, "/", 2)
+        self.assertEqual([from_path for from_path, _ in failures], [bad])
+        self.assertTrue(os.path.exists(os.path.join(self.dir, "good.html")))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,186 @@
+import gzip
+import json
+import os
+import tempfile
+import unittest
+
+from build import BuildConfig, build_site
+from gencontent import build_page_node
+from render_cache import RenderCache
+from search import SEARCH_DIR, SearchIndex, pack_postings, term_positions, tokenize
+
+
+def read_shard(path):
+    with open(path, "rb") as f:
+        return json.loads(gzip.decompress(f.read()))
+
+
+class TestSearchIndex(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.dir = self.tmp.name
+        self.index = SearchIndex(os.path.join(self.dir, "search-index.json"))
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_terms_and_packing(self):
+        self.assertEqual(
+            term_positions("Hello, hello wörld! a x_y 42"),
+            {"hello": [0, 1], "world": [2], "x_y": [3], "42": [4]},
+        )
+        self.assertEqual(pack_postings({3: [2], 0: [1, 5, 9]}), [0, 3, 1, 4, 4, 3, 1, 2])
+
+    def test_combining_marks_are_dropped(self):
+        # composed, decomposed and spacing marks, as search.js drops them
+        self.assertEqual(tokenize("Café cafe\u0301 na\u00efve ka\u0903m"), ["cafe", "cafe", "naive", "kam"])
+        self.assertEqual(tokenize("\U0001d4b3\U0001d4b4z, \u2014 \U0001d4b3"), ["\U0001d4b3\U0001d4b4z"])
+
+    def test_shards_are_named_by_code_points(self):
+        self.index.update("a.md", "/a.html", "A", "\U0001d4b3\U0001d4b4z")
+        self.assertEqual(list(self.index.shards()), ["\U0001d4b3\U0001d4b4"])
+
+    def test_update_only_dirties_changed_terms(self):
+        self.index.update("a.md", "/a.html", "A", "apple banana")
+        self.index.update("b.md", "/b.html", "B", "banana cherry")
+        self.assertEqual(self.index.postings["banana"], {0: [1], 1: [0]})
+        self.index.dirty.clear()
+        self.index.update("a.md", "/a.html", "A", "apple banana date")
+        self.assertEqual(self.index.dirty, {"da"})
+        self.index.update("a.md", "/a.html", "A", "banana apple date")
+        self.assertEqual(self.index.dirty, {"da", "ap", "ba"})
+
+    def test_removed_ids_are_reused(self):
+        for name in "abc":
+            self.index.update(f"{name}.md", f"/{name}.html", name, f"word {name}{name}")
+        self.index.retain(["a.md", "c.md"])
+        self.assertNotIn("bb", self.index.postings)
+        self.assertEqual(self.index.postings["word"], {0: [0], 2: [0]})
+        self.index.update("d.md", "/d.html", "d", "word")
+        self.assertEqual(self.index.pages["d.md"][0], 1)
+
+    def test_save_and_load(self):
+        self.index.update("a.md", "/a.html", "A", "apple banana apple")
+        self.index.save()
+        loaded = SearchIndex.load(self.index.path)
+        self.assertEqual(loaded.pages, self.index.pages)
+        self.assertEqual(loaded.postings, {"apple": {0: [0, 2]}, "banana": {0: [1]}})
+        self.assertEqual(loaded.next_id, 1)
+
+    def test_merge(self):
+        first = SearchIndex(None)
+        first.update("b.md", "/b.html", "B", "banana")
+        second = SearchIndex(None)
+        second.update("a.md", "/a.html", "A", "apple banana")
+        self.index.merge([first, second])
+        self.assertEqual(self.index.pages["a.md"][0], 0)
+        self.assertEqual(self.index.postings["banana"], {0: [1], 1: [0]})
+
+    def test_write(self):
+        self.index.update("a.md", "/a.html", "A", "apple apricot")
+        self.index.update("b.md", "/b.html", "B", "apple")
+        outputs = self.index.write(self.dir, "/base/")
+        search_dir = os.path.join(self.dir, SEARCH_DIR)
+        self.assertEqual(
+            sorted(os.path.relpath(path, search_dir) for path in outputs),
+            ["ap.json.gz", "index.json", "search.js"],
+        )
+        self.assertEqual(
+            read_shard(os.path.join(search_dir, "ap.json.gz")),
+            {"apple": [0, 1, 0, 1, 1, 0], "apricot": [0, 1, 1]},
+        )
+        with open(os.path.join(search_dir, "index.json")) as f:
+            manifest = json.load(f)
+        self.assertEqual(manifest["pages"], [["/a.html", "A"], ["/b.html", "B"]])
+        self.assertEqual(manifest["basepath"], "/base/")
+        self.assertEqual(manifest["shards"], ["ap"])
+        self.assertEqual(self.index.dirty, set())
+
+
+class TestSearchText(unittest.TestCase):
+    MARKDOWN = (
+        "# Title\n\n"
+        "A paragraph with **bold** text, a [link](/x) and `code`, long enough for the render cache.\n\n"
+        "```\nfenced code is not indexed\n```\n\n"
+        "- one\n- two"
+    )
+
+    def test_text_comes_from_the_text_nodes(self):
+        metadata, _ = build_page_node(self.MARKDOWN, "/", search=True)
+        self.assertEqual(
+            metadata.text,
+            "Title\nA paragraph with bold text, a link and code, long enough for the render cache.\none\ntwo\n",
+        )
+        self.assertIsNone(build_page_node(self.MARKDOWN, "/")[0].text)
+
+    def test_cache_hits_keep_their_text(self):
+        cache = RenderCache(min_block_size=0)
+        first, _ = build_page_node(self.MARKDOWN, "/", cache, search=True)
+        second, _ = build_page_node(self.MARKDOWN, "/", cache, search=True)
+        self.assertGreater(cache.stats["hits"], 0)
+        self.assertEqual(first.text, second.text)
+
+
+class TestSearchBuild(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.dir = self.tmp.name
+        self.content_dir = os.path.join(self.dir, "content")
+        os.makedirs(os.path.join(self.dir, "static"))
+        self.template_path = os.path.join(self.dir, "template.html")
+        with open(self.template_path, "w") as f:
+            f.write("{{ Content }}")
+        self.write("index.md", "# Home\n\nWelcome to the orchard.")
+        self.write("blog/apples.md", "# Apples\n\nApples grow in the orchard.")
+        self.config = BuildConfig(
+            content_dir=self.content_dir,
+            template_path=self.template_path,
+            static_dir=os.path.join(self.dir, "static"),
+            dest_dir=os.path.join(self.dir, "docs"),
+            incremental=True,
+            manifest_path=os.path.join(self.dir, "manifest.json"),
+            site_index_path=os.path.join(self.dir, "site-index.json"),
+            search=True,
+            search_index_path=os.path.join(self.dir, "search-index.json"),
+        )
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def write(self, rel_path, text):
+        path = os.path.join(self.content_dir, rel_path)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w") as f:
+            f.write(text)
+
+    def shard(self, prefix):
+        return os.path.join(self.config.dest_dir, SEARCH_DIR, f"{prefix}.json.gz")
+
+    def test_incremental_build_patches_changed_postings(self):
+        build_site(self.config)
+        self.assertEqual(read_shard(self.shard("or")), {"orchard": [0, 1, 5, 1, 1, 4]})
+        for prefix in ("or", "ap", "gr"):
+            os.utime(self.shard(prefix), (0, 0))
+        self.write("blog/apples.md", "# Apples\n\nApples grow in the orchard, and grapes.")
+        build_site(self.config)
+        # the positions of "orchard" and "apples" on the page stayed the same
+        self.assertEqual(os.path.getmtime(self.shard("or")), 0)
+        self.assertEqual(os.path.getmtime(self.shard("ap")), 0)
+        self.assertNotEqual(os.path.getmtime(self.shard("gr")), 0)
+        self.assertEqual(read_shard(self.shard("gr")), {"grapes": [0, 1, 7], "grow": [0, 1, 2]})
+
+        os.remove(os.path.join(self.content_dir, "blog", "apples.md"))
+        build_site(self.config)
+        self.assertFalse(os.path.exists(self.shard("gr")))
+        self.assertEqual(read_shard(self.shard("or")), {"orchard": [1, 1, 4]})
+
+    def test_enabling_search_rebuilds_every_page(self):
+        self.config.search = False
+        build_site(self.config)
+        self.config.search = True
+        build_site(self.config)
+        self.assertEqual(read_shard(self.shard("or")), {"orchard": [0, 1, 5, 1, 1, 4]})
+
+
+if __name__ == "__main__":
+    unittest.main()
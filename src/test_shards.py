@@ -0,0 +1,96 @@
+import filecmp
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import unittest
+
+from shards import parse_shard, select_shard
+
+SRC_DIR = os.path.dirname(os.path.abspath(__file__))
+ROOT_DIR = os.path.dirname(SRC_DIR)
+
+
+class TestShardSelection(unittest.TestCase):
+    def test_parse_shard(self):
+        self.assertEqual(parse_shard("2/4"), (2, 4))
+        for spec in ("0/4", "5/4", "a/b", "3"):
+            with self.assertRaises(ValueError):
+                parse_shard(spec)
+
+    def test_shards_partition_the_pages(self):
+        pages = [(f"./content/page{i}/index.md", f"./docs/page{i}/index.html") for i in range(50)]
+        selected = [select_shard(pages, "./content", i, 4) for i in range(1, 5)]
+        self.assertEqual(sorted(sum(selected, [])), sorted(pages))
+        self.assertTrue(all(selected))
+        self.assertEqual(selected[0], select_shard(pages, "content", 1, 4))
+
+
+class TestShardedBuild(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.site = self.tmp.name
+        for name in ("content", "static"):
+            shutil.copytree(os.path.join(ROOT_DIR, name), os.path.join(self.site, name))
+        shutil.copy(os.path.join(ROOT_DIR, "template.html"), self.site)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def run_main(self, *args):
+        return subprocess.Popen(
+            [sys.executable, os.path.join(SRC_DIR, "main.py"), *args],
+            cwd=self.site,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.PIPE,
+        )
+
+    def wait(self, *processes):
+        for process in processes:
+            _, stderr = process.communicate()
+            self.assertEqual(process.returncode, 0, stderr.decode())
+
+    def test_merged_shards_match_a_full_build(self):
+        self.wait(self.run_main("/base/"))
+        os.rename(os.path.join(self.site, "docs"), os.path.join(self.site, "full"))
+        self.wait(*[self.run_main("/base/", "--shard", f"{i}/3") for i in range(1, 4)])
+        self.wait(self.run_main("merge"))
+        comparison = filecmp.dircmp(os.path.join(self.site, "full"), os.path.join(self.site, "docs"))
+        self.assertEqual(self._differences(comparison), [])
+
+    def test_merge_requires_every_shard(self):
+        self.wait(self.run_main("--shard", "1/2"))
+        process = self.run_main("merge")
+        _, stderr = process.communicate()
+        self.assertNotEqual(process.returncode, 0)
+        self.assertIn("missing shards: 2/2", stderr.decode())
+
+    def test_merge_takes_the_latest_shard_count_and_its_settings(self):
+        self.wait(self.run_main("/base/", "--no-image-dimensions"))
+        os.rename(os.path.join(self.site, "docs"), os.path.join(self.site, "full"))
+        # left over from an earlier sharded build with other settings
+        self.wait(self.run_main("/base/", "--shard", "1/2"))
+        self.wait(*[
+            self.run_main("/base/", "--no-image-dimensions", "--shard", f"{i}/3") for i in range(1, 4)
+        ])
+        self.wait(self.run_main("merge"))
+        comparison = filecmp.dircmp(os.path.join(self.site, "full"), os.path.join(self.site, "docs"))
+        self.assertEqual(self._differences(comparison), [])
+
+    def test_merge_rejects_shards_built_with_different_settings(self):
+        self.wait(self.run_main("--shard", "1/2"), self.run_main("--no-image-dimensions", "--shard", "2/2"))
+        process = self.run_main("merge")
+        _, stderr = process.communicate()
+        self.assertNotEqual(process.returncode, 0)
+        self.assertIn("was built with different settings", stderr.decode())
+
+    def _differences(self, comparison):
+        differences = comparison.left_only + comparison.right_only + comparison.diff_files
+        for sub in comparison.subdirs.values():
+            differences.extend(self._differences(sub))
+        return differences
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,157 @@
+import datetime
+import os
+import tempfile
+import unittest
+
+from build import BuildConfig, build_site
+from gencontent import build_page_node
+from metadata import PageMetadata, scan_metadata, split_front_matter
+from siteindex import SiteIndex, page_url, write_site_files
+from template import Template
+
+
+class TestPageMetadata(unittest.TestCase):
+    def test_metadata_comes_from_the_parse(self):
+        markdown = "# Title\n\n[< Back](/)\n\nFirst **real** paragraph.\n\n- one item\n- two items\n\n```\nnot counted\n```"
+        metadata, node = build_page_node(markdown, "/")
+        self.assertEqual(metadata.title, "Title")
+        self.assertEqual(metadata.summary, "<p>First <b>real</b> paragraph.</p>")
+        self.assertEqual(metadata.word_count, 1 + 2 + 3 + 4)
+        self.assertIn("<h1>Title</h1>", node.to_html())
+
+    def test_front_matter(self):
+        markdown = "---\ntitle: Front\ndate: 2024-02-03\ntags: [elves, \"rings\"]\n---\n# Heading\n\nBody"
+        front_matter, body = split_front_matter(markdown)
+        self.assertEqual(front_matter, {"title": "Front", "date": "2024-02-03", "tags": ["elves", "rings"]})
+        self.assertEqual(body, "# Heading\n\nBody")
+        metadata, node = build_page_node(markdown, "/")
+        self.assertEqual(metadata.title, "Front")
+        self.assertEqual(metadata.date, datetime.date(2024, 2, 3))
+        self.assertEqual(metadata.tags, ("elves", "rings"))
+        self.assertNotIn("title:", node.to_html())
+
+    def test_yaml_block_list(self):
+        front_matter, body = split_front_matter("---\ntitle: 'A: B'\ntags:\n  - one\n  - \"two, three\"\n---\nBody")
+        self.assertEqual(front_matter, {"title": "A: B", "tags": ["one", "two, three"]})
+        self.assertEqual(body, "Body")
+
+    def test_toml_front_matter(self):
+        markdown = '+++\ntitle = "Say \\"hi\\""\ndate = 2024-02-03T10:00:00Z\ntags = ["a", \'b\']\n[extra]\nauthor = "me"\n+++\n# Heading'
+        front_matter, body = split_front_matter(markdown)
+        self.assertEqual(front_matter, {
+            "title": 'Say "hi"', "date": "2024-02-03T10:00:00Z", "tags": ["a", "b"], "extra.author": "me",
+        })
+        self.assertEqual(build_page_node(markdown, "/")[0].date, datetime.date(2024, 2, 3))
+
+    def test_unclosed_front_matter(self):
+        with self.assertRaises(ValueError):
+            split_front_matter("---\ntitle: x\n# Heading")
+
+    def test_missing_title(self):
+        with self.assertRaises(ValueError):
+            build_page_node("no heading here", "/")
+
+    def test_header_only_scan(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "page.md")
+            with open(path, "w") as f:
+                f.write("---\ntitle: Front\ntags: [x]\n---\n# Heading\n\n_unclosed")
+            metadata = scan_metadata(path)
+            self.assertEqual((metadata.title, metadata.tags), ("Front", ("x",)))
+            with open(path, "w") as f:
+                f.write("Intro\n\n# Heading\n\n_unclosed")
+            self.assertEqual(scan_metadata(path).title, "Heading")
+
+    def test_round_trip(self):
+        metadata = PageMetadata("T", datetime.date(2024, 1, 1), ["a"], 3, "<p>s</p>", "/t/")
+        self.assertEqual(PageMetadata.from_dict(metadata.to_dict()), metadata)
+
+
+class TestSiteIndex(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.dir = self.tmp.name
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_page_url(self):
+        self.assertEqual(page_url("docs/index.html", "docs"), "/")
+        self.assertEqual(page_url("docs/blog/tom/index.html", "docs"), "/blog/tom/")
+        self.assertEqual(page_url("docs/about.html", "docs"), "/about.html")
+
+    def test_site_files(self):
+        dest_dir = os.path.join(self.dir, "docs")
+        index = SiteIndex(os.path.join(self.dir, "index.json"), dest_dir)
+        index.update("content/index.md", os.path.join(dest_dir, "index.html"), PageMetadata("Home"))
+        for day in range(1, 4):
+            index.update(
+                f"content/blog/post{day}.md",
+                os.path.join(dest_dir, "blog", f"post{day}", "index.html"),
+                PageMetadata(f"Post {day}", datetime.date(2024, 1, day), ["News & Notes"], summary="<p>s</p>"),
+            )
+        outputs = write_site_files(index, Template("{{ Title }}|{{ Content }}"), "https://example.org", "/base/", page_size=2)
+
+        rel_outputs = sorted(os.path.relpath(path, dest_dir) for path in outputs)
+        self.assertEqual(rel_outputs, [
+            "blog/feed.xml", "blog/index.html", "blog/page/2/index.html",
+            "sitemap.xml", "tags/index.html", "tags/news-notes/index.html",
+        ])
+        with open(os.path.join(dest_dir, "blog", "index.html")) as f:
+            first_page = f.read()
+        self.assertLess(first_page.index("Post 3"), first_page.index("Post 2"))
+        self.assertNotIn("Post 1", first_page)
+        self.assertIn('href="/base/blog/page/2/"', first_page)
+        with open(os.path.join(dest_dir, "sitemap.xml")) as f:
+            sitemap = f.read()
+        self.assertIn("<loc>https://example.org/base/blog/post1/</loc>", sitemap)
+        self.assertIn("<lastmod>2024-01-01</lastmod>", sitemap)
+        with open(os.path.join(dest_dir, "blog", "feed.xml")) as f:
+            feed = f.read()
+        self.assertIn("<title>Home</title>", feed)
+        self.assertIn("<pubDate>Wed, 03 Jan 2024 00:00:00 +0000</pubDate>", feed)
+        self.assertIn("&lt;p&gt;s&lt;/p&gt;", feed)
+
+    def test_no_sitemap_or_feed_without_site_url(self):
+        dest_dir = os.path.join(self.dir, "docs")
+        index = SiteIndex(os.path.join(self.dir, "index.json"), dest_dir)
+        index.update("content/blog/post.md", os.path.join(dest_dir, "blog", "post", "index.html"), PageMetadata("Post"))
+        outputs = write_site_files(index, Template("{{ Content }}"), "", "/")
+        self.assertEqual([os.path.relpath(path, dest_dir) for path in outputs], ["blog/index.html"])
+        self.assertFalse(os.path.exists(os.path.join(dest_dir, "sitemap.xml")))
+
+    def test_incremental_build_only_reads_changed_pages(self):
+        content_dir = os.path.join(self.dir, "content")
+        os.makedirs(os.path.join(content_dir, "blog"))
+        template_path = os.path.join(self.dir, "template.html")
+        with open(template_path, "w") as f:
+            f.write("{{ Content }}")
+        for name in ("one", "two"):
+            with open(os.path.join(content_dir, "blog", f"{name}.md"), "w") as f:
+                f.write(f"# Post {name}\n\nAbout {name}.")
+        config = BuildConfig(
+            content_dir=content_dir,
+            template_path=template_path,
+            static_dir=os.path.join(self.dir, "static"),
+            dest_dir=os.path.join(self.dir, "docs"),
+            incremental=True,
+            manifest_path=os.path.join(self.dir, "manifest.json"),
+            site_index_path=os.path.join(self.dir, "site-index.json"),
+        )
+        os.makedirs(config.static_dir)
+        build_site(config)
+        with open(os.path.join(content_dir, "blog", "two.md"), "w") as f:
+            f.write("# Post two, edited\n\nAbout two.")
+        os.remove(os.path.join(content_dir, "blog", "one.md"))
+        build_site(config)
+
+        index = SiteIndex.load(config.site_index_path, config.dest_dir)
+        self.assertEqual([page.title for page in index.pages.values()], ["Post two, edited"])
+        with open(os.path.join(config.dest_dir, "blog", "index.html")) as f:
+            listing = f.read()
+        self.assertIn("Post two, edited", listing)
+        self.assertNotIn("Post one", listing)
+
+
+if __name__ == "__main__":
+    unittest.main()
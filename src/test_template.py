@@ -0,0 +1,79 @@
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+from gencontent import write_output
+from htmlnode import LeafNode, ParentNode
+from links import rewrite_links
+from template import Template, load_template
+
+
+class TestTemplate(unittest.TestCase):
+    def test_minify_template(self):
+        template = Template(
+            "<!DOCTYPE html>\n<html>\n  <!-- note -->\n  <title> {{ Title }} </title>\n"
+            "  <pre>\n  keep\n</pre>\n  <article>\n    {{ Content }}\n  </article>\n</html>\n",
+            minify=True,
+        )
+        self.assertEqual(
+            template.render(Title="T", Content=ParentNode("ul", [LeafNode("li", "a  b")])),
+            "<!DOCTYPE html><html><title> T </title><pre>\n  keep\n</pre><article><ul><li>a b</ul></article></html>",
+        )
+
+    def test_render(self):
+        template = Template("<title>{{ Title }}</title><main>{{ Content }}</main>")
+        self.assertEqual(
+            template.render(Title="Home", Content="<p>hi</p>"),
+            "<title>Home</title><main><p>hi</p></main>",
+        )
+
+    def test_unknown_placeholder_is_kept(self):
+        template = Template("{{ Title }} {{ Footer }}")
+        self.assertEqual(template.render(Title="Home"), "Home {{ Footer }}")
+
+    def test_basepath_only_rewrites_template_urls(self):
+        template = Template('<link href="/index.css">{{ Content }}', "/site/")
+        self.assertEqual(
+            template.render(Content='<code>href="/x"</code>'),
+            '<link href="/site/index.css"><code>href="/x"</code>',
+        )
+
+    def test_load_template_is_cached_until_modified(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "template.html")
+            with open(path, "w") as f:
+                f.write("a {{ Content }}")
+            first = load_template(path)
+            self.assertIs(load_template(path), first)
+            with open(path, "w") as f:
+                f.write("b {{ Content }}")
+            os.utime(path, ns=(0, os.stat(path).st_mtime_ns + 1))
+            self.assertEqual(load_template(path).render(Content="x"), "b x")
+
+
+class TestRewriteLinks(unittest.TestCase):
+    def test_write_output_keeps_the_open_error(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            dest_path = os.path.join(tmp, "index.html")
+            denied = mock.patch("gencontent.open", side_effect=PermissionError("denied"), create=True)
+            with denied, self.assertRaises(PermissionError):
+                write_output(dest_path, Template("{{ Content }}"), Content="x")
+            self.assertEqual(os.listdir(tmp), [])
+
+    def test_rewrites_root_relative_urls(self):
+        node = ParentNode("p", [
+            LeafNode("a", "home", {"href": "/blog"}),
+            LeafNode("img", "", {"src": "/images/a.png", "alt": "a"}),
+            LeafNode("a", "out", {"href": "https://example.com"}),
+        ])
+        rewrite_links(node, "/site/")
+        self.assertEqual(
+            node.to_html(),
+            '<p><a href="/site/blog">home</a><img src="/site/images/a.png" alt="a"></img>'
+            '<a href="https://example.com">out</a></p>',
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
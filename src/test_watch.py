@@ -0,0 +1,82 @@
+import os
+import tempfile
+import unittest
+
+from build import BuildConfig
+from watch import PollingWatcher, build_graph, rebuild_changed
+
+
+class TestWatch(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        root = self.tmp.name
+        self.content = os.path.join(root, "content")
+        self.static = os.path.join(root, "static")
+        self.dest = os.path.join(root, "docs")
+        self.template = os.path.join(root, "template.html")
+        self.write(self.template, "{{ Content }}")
+        self.write(os.path.join(self.content, "index.md"), "# Home")
+        self.write(os.path.join(self.content, "blog", "index.md"), "# Blog")
+        self.write(os.path.join(self.static, "index.css"), "body {}")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def write(self, path, text):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w") as f:
+            f.write(text)
+
+    def graph(self):
+        return build_graph(self.content, self.template, self.static, self.dest)
+
+    def rebuild(self, changed, graph):
+        changed = {os.path.normpath(path) for path in changed}
+        config = BuildConfig(self.content, self.template, self.static, self.dest)
+        return rebuild_changed(changed, graph, config)
+
+    def test_page_depends_on_its_source_and_template(self):
+        graph = self.graph()
+        home = os.path.join(self.dest, "index.html")
+        blog = os.path.join(self.dest, "blog", "index.html")
+        self.assertEqual(graph.affected({os.path.join(self.content, "index.md")}), {home})
+        self.assertEqual(graph.affected({self.template}), {home, blog})
+        self.assertEqual(
+            graph.affected({os.path.join(self.static, "index.css")}),
+            {os.path.join(self.dest, "index.css")},
+        )
+
+    def test_rebuilds_only_affected_page(self):
+        graph = self.graph()
+        source = os.path.join(self.content, "index.md")
+        self.write(source, "# Changed")
+        graph, count = self.rebuild({source}, graph)
+        self.assertEqual(count, 1)
+        with open(os.path.join(self.dest, "index.html")) as f:
+            self.assertEqual(f.read(), "<div><h1>Changed</h1></div>")
+        self.assertFalse(os.path.exists(os.path.join(self.dest, "blog", "index.html")))
+
+    def test_added_and_removed_pages(self):
+        graph = self.graph()
+        source = os.path.join(self.content, "new", "index.md")
+        self.write(source, "# New")
+        graph, count = self.rebuild({source}, graph)
+        output = os.path.join(self.dest, "new", "index.html")
+        self.assertTrue(os.path.exists(output))
+        os.remove(source)
+        os.rmdir(os.path.dirname(source))
+        graph, count = self.rebuild({source}, graph)
+        self.assertFalse(os.path.exists(output))
+        self.assertNotIn(output, graph.actions)
+
+    def test_polling_watcher_reports_changes(self):
+        watcher = PollingWatcher([self.content], [self.template], interval=0)
+        self.assertEqual(watcher.wait(0), set())
+        self.write(os.path.join(self.content, "other.md"), "# Other")
+        self.assertEqual(
+            watcher.wait(0), {os.path.normpath(os.path.join(self.content, "other.md"))}
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
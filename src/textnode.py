@@ -1,6 +1,8 @@
-from htmlnode import LeafNode
+import contextvars
 from enum import Enum
 
+from htmlnode import LeafNode, ParentNode
+
 
 class TextType(Enum):
     TEXT = "text"
@@ -12,33 +14,90 @@ class TextType(Enum):
 
 
 class TextNode:
-    def __init__(self, text, text_type, url=None):
+    __slots__ = ("text", "text_type", "url", "children")
+
+    def __init__(self, text, text_type, url=None, children=None):
         self.text = text
         self.text_type = text_type
         self.url = url
+        # Nested inline nodes, e.g. emphasis inside link text
+        self.children = children
 
     def __eq__(self, other):
         return (
             self.text_type == other.text_type
             and self.text == other.text
             and self.url == other.url
+            and self.children == other.children
         )
 
     def __repr__(self):
+        if self.children:
+            return f"TextNode({self.text}, {self.text_type.value}, {self.url}, {self.children})"
         return f"TextNode({self.text}, {self.text_type.value}, {self.url})"
 
 
+class InlineCapture:
+    # What the inline text nodes of the blocks parsed under capture_inline
+    # add up to besides their html: the urls of links and images, and, when
+    # `text` is set, their text for the search index. Known as the nodes are
+    # made, so none of it is read back out of the html.
+    __slots__ = ("links", "text")
+
+    def __init__(self, text=False):
+        self.links = []
+        self.text = [] if text else None
+
+    def record(self, text_nodes):
+        for text_node in text_nodes:
+            if text_node.url is not None:
+                self.links.append(text_node.url)
+        if self.text is not None:
+            self.text.extend(text_node.text for text_node in text_nodes)
+            # separates list items, table cells and blocks
+            self.text.append("\n")
+
+    def extend(self, links, text):
+        self.links.extend(links)
+        if self.text is not None:
+            self.text.append(text)
+
+    def __repr__(self):
+        return f"InlineCapture(links: {len(self.links)}, text: {self.text is not None})"
+
+
+# the InlineCapture of the block being parsed, if any
+inline_capture = contextvars.ContextVar("inline_capture", default=None)
+
+
+def capture_inline(convert, capture, block_type, lines):
+    # Runs convert(block_type, lines) with its text nodes recorded in capture
+    token = inline_capture.set(capture)
+    try:
+        return convert(block_type, lines)
+    finally:
+        inline_capture.reset(token)
+
+
+# Shared tag names so every converted node points at the same strings
+TEXT_TYPE_TAGS = {
+    TextType.TEXT: None,
+    TextType.BOLD: "b",
+    TextType.ITALIC: "i",
+    TextType.CODE: "code",
+}
+
+
 def text_node_to_html_node(text_node):
-    if text_node.text_type == TextType.TEXT:
-        return LeafNode(None, text_node.text)
-    if text_node.text_type == TextType.BOLD:
-        return LeafNode("b", text_node.text)
-    if text_node.text_type == TextType.ITALIC:
-        return LeafNode("i", text_node.text)
-    if text_node.text_type == TextType.CODE:
-        return LeafNode("code", text_node.text)
-    if text_node.text_type == TextType.LINK:
-        return LeafNode("a", text_node.text, {"href": text_node.url})
-    if text_node.text_type == TextType.IMAGE:
-        return LeafNode("img", "", {"src": text_node.url, "alt": text_node.text})
+    text_type = text_node.text_type
+    if text_type in TEXT_TYPE_TAGS:
+        return LeafNode(TEXT_TYPE_TAGS[text_type], text_node.text)
+    if text_type == TextType.LINK:
+        props = (("href", text_node.url),)
+        if text_node.children:
+            children = [text_node_to_html_node(child) for child in text_node.children]
+            return ParentNode("a", children, props)
+        return LeafNode("a", text_node.text, props)
+    if text_type == TextType.IMAGE:
+        return LeafNode("img", "", (("src", text_node.url), ("alt", text_node.text)))
     raise ValueError(f"invalid text type: {text_node.text_type}")
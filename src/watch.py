@@ -0,0 +1,296 @@
+import ctypes
+import ctypes.util
+import os
+import select
+import struct
+import time
+
+from build import (
+    check_site_links,
+    create_precompressor,
+    remove_orphans,
+    scan_site_images,
+    write_site_index,
+)
+from copystatic import list_files, sync_file
+from gencontent import collect_pages, generate_page
+from images import IMAGE_EXTENSIONS, copy_variants
+from search import SearchIndex
+from siteindex import SiteIndex, page_url
+
+IN_MODIFY = 0x00000002
+IN_ATTRIB = 0x00000004
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_ISDIR = 0x40000000
+IN_NONBLOCK = 0o4000
+IN_CLOEXEC = 0o2000000
+WATCH_MASK = (
+    IN_MODIFY | IN_ATTRIB | IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO
+    | IN_CREATE | IN_DELETE | IN_DELETE_SELF
+)
+EVENT_HEADER = struct.Struct("iIII")
+
+
+class DependencyGraph:
+    def __init__(self):
+        # input path -> set of output paths built from it
+        self.dependents = {}
+        # output path -> (kind, source path) used to rebuild it
+        self.actions = {}
+
+    def add(self, output, inputs, kind, source):
+        self.actions[output] = (kind, source)
+        for path in inputs:
+            self.dependents.setdefault(os.path.normpath(path), set()).add(output)
+
+    def affected(self, changed_paths):
+        outputs = set()
+        for path in changed_paths:
+            outputs.update(self.dependents.get(path, ()))
+        return outputs
+
+    def __repr__(self):
+        return f"DependencyGraph(inputs: {len(self.dependents)}, outputs: {len(self.actions)})"
+
+
+def build_graph(content_dir, template_path, static_dir, dest_dir):
+    graph = DependencyGraph()
+    for from_path, dest_path in collect_pages(content_dir, dest_dir):
+        graph.add(os.path.normpath(dest_path), [from_path, template_path], "page", from_path)
+    for from_path, dest_path in list_files(static_dir, dest_dir):
+        graph.add(dest_path, [from_path], "asset", from_path)
+    return graph
+
+
+class PollingWatcher:
+    def __init__(self, directories, files, interval=0.1):
+        self.directories = [os.path.normpath(path) for path in directories]
+        self.files = [os.path.normpath(path) for path in files]
+        self.interval = interval
+        self.snapshot = self.scan()
+
+    def scan(self):
+        snapshot = {}
+        for directory in self.directories:
+            for root, _, filenames in os.walk(directory):
+                for filename in filenames:
+                    self._stat_into(snapshot, os.path.join(root, filename))
+        for path in self.files:
+            self._stat_into(snapshot, path)
+        return snapshot
+
+    def _stat_into(self, snapshot, path):
+        try:
+            stat = os.stat(path)
+        except FileNotFoundError:
+            return
+        snapshot[os.path.normpath(path)] = (stat.st_mtime_ns, stat.st_size)
+
+    def wait(self, timeout):
+        time.sleep(min(timeout, self.interval))
+        snapshot = self.scan()
+        changed = {
+            path for path in snapshot.keys() | self.snapshot.keys()
+            if snapshot.get(path) != self.snapshot.get(path)
+        }
+        self.snapshot = snapshot
+        return changed
+
+    def close(self):
+        pass
+
+
+class InotifyWatcher:
+    def __init__(self, directories, files):
+        libc_name = ctypes.util.find_library("c")
+        if libc_name is None:
+            raise OSError("libc not found")
+        self.libc = ctypes.CDLL(libc_name, use_errno=True)
+        if not hasattr(self.libc, "inotify_init1"):
+            raise OSError("inotify is not available")
+        self.fd = self.libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        self.watches = {}
+        self.tree_dirs = set()
+        # Files are watched through their parent directory so editors that
+        # save by renaming a temporary file are still noticed.
+        self.files = {os.path.normpath(path) for path in files}
+        self.file_dirs = {os.path.dirname(path) or "." for path in self.files}
+        for directory in directories:
+            self.add_tree(os.path.normpath(directory))
+        for directory in self.file_dirs:
+            self.add_watch(directory)
+
+    def add_watch(self, directory):
+        wd = self.libc.inotify_add_watch(self.fd, os.fsencode(directory), WATCH_MASK)
+        if wd < 0:
+            raise OSError(ctypes.get_errno(), f"inotify_add_watch failed for {directory}")
+        self.watches[wd] = directory
+
+    def add_tree(self, directory):
+        for root, dirs, _ in os.walk(directory):
+            root = os.path.normpath(root)
+            self.tree_dirs.add(root)
+            self.add_watch(root)
+
+    def wait(self, timeout):
+        readable, _, _ = select.select([self.fd], [], [], timeout)
+        if not readable:
+            return set()
+        try:
+            data = os.read(self.fd, 64 * 1024)
+        except BlockingIOError:
+            return set()
+        changed = set()
+        offset = 0
+        while offset < len(data):
+            wd, mask, _, length = EVENT_HEADER.unpack_from(data, offset)
+            offset += EVENT_HEADER.size
+            name = data[offset : offset + length].rstrip(b"\0")
+            offset += length
+            directory = self.watches.get(wd)
+            if directory is None:
+                continue
+            path = os.path.normpath(os.path.join(directory, os.fsdecode(name)))
+            if directory not in self.tree_dirs and path not in self.files:
+                continue
+            if mask & IN_ISDIR:
+                if mask & (IN_CREATE | IN_MOVED_TO):
+                    self.add_tree(path)
+                    changed.update(_files_under(path))
+                continue
+            changed.add(path)
+        return changed
+
+    def close(self):
+        os.close(self.fd)
+
+
+def _files_under(directory):
+    paths = set()
+    for root, _, filenames in os.walk(directory):
+        for filename in filenames:
+            paths.add(os.path.normpath(os.path.join(root, filename)))
+    return paths
+
+
+def create_watcher(directories, files, polling=False):
+    if not polling:
+        try:
+            return InotifyWatcher(directories, files)
+        except (OSError, AttributeError):
+            pass
+    return PollingWatcher(directories, files)
+
+
+def collect_changes(watcher, debounce):
+    # Blocks until something changes, then keeps collecting until the
+    # filesystem has been quiet for `debounce` seconds.
+    changed = set()
+    while not changed:
+        changed = watcher.wait(1.0)
+    while True:
+        more = watcher.wait(debounce)
+        if not more:
+            return changed
+        changed.update(more)
+
+
+def rebuild_changed(changed, graph, config, cache=None, site_index=None, precompressor=None,
+                    images=None, search_index=None):
+    outputs = graph.affected(changed)
+    known_inputs = graph.dependents.keys()
+    if any(path not in known_inputs or not os.path.exists(path) for path in changed):
+        new_graph = build_graph(
+            config.content_dir, config.template_path, config.static_dir, config.dest_dir
+        )
+        removed = sorted(graph.actions.keys() - new_graph.actions.keys())
+        if precompressor is not None:
+            removed_variants = [variant for output in removed for variant in precompressor.variants(output)]
+            remove_orphans(removed_variants, config.dest_dir)
+        remove_orphans(removed, config.dest_dir)
+        for output in removed:
+            print(f" - {output}")
+        outputs.update(new_graph.actions.keys() - graph.actions.keys())
+        outputs.intersection_update(new_graph.actions.keys())
+        graph = new_graph
+
+    for output in sorted(outputs):
+        kind, source = graph.actions[output]
+        try:
+            if kind == "page":
+                metadata = generate_page(
+                    source, config.template_path, output, config.basepath, cache, precompressor,
+                    config.minify, images, search_index is not None,
+                )
+                if site_index is not None:
+                    site_index.update(source, output, metadata)
+                if search_index is not None:
+                    url = page_url(output, config.dest_dir)
+                    search_index.update(source, url, metadata.title, metadata.text)
+            else:
+                os.makedirs(os.path.dirname(output), exist_ok=True)
+                sync_file(source, output)
+                print(f" * {source} -> {output}")
+                if precompressor is not None and precompressor.accepts(output):
+                    precompressor.compress_file(output)
+        except Exception as e:
+            print(f"   ! {source}: {type(e).__name__}: {e}")
+    if site_index is not None and outputs:
+        site_index.retain(source for kind, source in graph.actions.values() if kind == "page")
+        site_outputs = write_site_index(config, site_index)
+        if search_index is not None:
+            search_index.retain(site_index.pages)
+            site_outputs += search_index.write(config.dest_dir, config.basepath)
+            search_index.save()
+        for output in site_outputs:
+            if precompressor is not None and precompressor.accepts(output):
+                precompressor.compress_file(output)
+        site_index.save()
+        if config.check_links:
+            print(check_site_links(config, site_index, list(graph.actions) + site_outputs).summary())
+    return graph, len(outputs)
+
+
+def rescan_images(config, graph, images, changed):
+    # A changed image size shows up in every page that might embed it
+    rescanned, variants = scan_site_images(config)
+    copy_variants(variants, config.dest_dir)
+    if rescanned.version != images.version:
+        changed = changed | {source for kind, source in graph.actions.values() if kind == "page"}
+    return rescanned, changed
+
+
+def watch(config, debounce=0.05, polling=False, cache=None):
+    graph = build_graph(config.content_dir, config.template_path, config.static_dir, config.dest_dir)
+    site_index = SiteIndex.load(config.site_index_path, config.dest_dir)
+    search_index = SearchIndex.load(config.search_index_path) if config.search else None
+    precompressor = create_precompressor(config)
+    images, _ = scan_site_images(config)
+    watcher = create_watcher([config.content_dir, config.static_dir], [config.template_path], polling)
+    print(
+        f"Watching {config.content_dir}, {config.static_dir} and {config.template_path} "
+        f"({type(watcher).__name__})..."
+    )
+    try:
+        while True:
+            changed = collect_changes(watcher, debounce)
+            start = time.perf_counter()
+            if images is not None and any(path.lower().endswith(IMAGE_EXTENSIONS) for path in changed):
+                images, changed = rescan_images(config, graph, images, changed)
+            graph, count = rebuild_changed(
+                changed, graph, config, cache, site_index, precompressor, images, search_index
+            )
+            elapsed = (time.perf_counter() - start) * 1000
+            if count:
+                print(f"Rebuilt {count} outputs in {elapsed:.1f} ms")
+    except KeyboardInterrupt:
+        pass
+    finally:
+        watcher.close()